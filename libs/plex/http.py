@@ -54,7 +54,12 @@ class HTTP(object):
     def SetPassword(self, url, username, password, realm=None):
         pass
 
-    def PreCache(self, url, values=None, headers={}, cacheTime=None, encoding=None, errors=None):
+    @staticmethod
+    def PreCache(url, values=None, headers={}, cacheTime=None, encoding=None, errors=None):
+        """
+        Instructs the framework to pre-cache the result of a given HTTP request in a background thread. This method
+        returns nothing - it is designed to ensure that cached data is available for future calls to HTTP.Request.
+        """
         pass
 
     @property
@@ -0,0 +1,54 @@
+"""
+Measures how long the agent takes from being imported until it is ready to serve its first search.
+Every run starts a fresh python process, so imports are not cached between runs.
+
+    python scripts/benchmark-agent-startup.py --runs 5
+    python scripts/benchmark-agent-startup.py --runs 5 --eager
+"""
+import argparse
+import subprocess
+import sys
+import time
+from os.path import dirname, abspath, join
+
+root_dir = dirname(dirname(abspath(__file__)))
+
+
+def measure(eager):
+    sys.path.insert(0, join(root_dir, 'src'))
+    sys.path.insert(0, join(root_dir, 'libs'))
+    start_time_in_seconds = time.time()
+    from utility import mixpanel_helper
+    mixpanel_helper.initialize('benchmark', test_mode=True)
+    import agent
+    agent.lazy_initialization = not eager
+    imported_time_in_seconds = time.time()
+    agent.JavMovieAgent('benchmark')
+    ready_time_in_seconds = time.time()
+    print 'startup: {:.3f} {:.3f}'.format(imported_time_in_seconds - start_time_in_seconds, ready_time_in_seconds - start_time_in_seconds)
+
+
+def benchmark(runs, eager):
+    import_times, ready_times = [], []
+    for run in range(runs):
+        command = [sys.executable, abspath(__file__), '--single'] + (['--eager'] if eager else [])
+        output = subprocess.check_output(command, cwd=root_dir)
+        line = [line for line in output.splitlines() if line.startswith('startup: ')][0]
+        import_time, ready_time = [float(value) for value in line.split()[1:]]
+        import_times.append(import_time)
+        ready_times.append(ready_time)
+        print 'run {}: imported in {:.3f}s, ready in {:.3f}s'.format(run + 1, import_time, ready_time)
+    print 'mode: {}'.format('eager' if eager else 'lazy')
+    print 'import: min {:.3f}s, avg {:.3f}s'.format(min(import_times), sum(import_times) / runs)
+    print 'ready:  min {:.3f}s, avg {:.3f}s'.format(min(ready_times), sum(ready_times) / runs)
+
+
+parser = argparse.ArgumentParser("benchmark-agent-startup.py")
+parser.add_argument('-r', '--runs', help="number of startups to measure", type=int, default=5)
+parser.add_argument('-e', '--eager', help="send startup telemetry and load image libraries before being ready", action='store_true')
+parser.add_argument('--single', help=argparse.SUPPRESS, action='store_true')
+args = parser.parse_args()
+if args.single:
+    measure(args.eager)
+else:
+    benchmark(args.runs, args.eager)
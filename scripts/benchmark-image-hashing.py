@@ -0,0 +1,96 @@
+"""
+Measures CPU time and peak memory of comparing Fanza images by their hashes, decoding them in full size
+or in the reduced size used by the agent. Every mode runs in a fresh python process, so peak memory is not shared.
+
+    python scripts/benchmark-image-hashing.py
+    python scripts/benchmark-image-hashing.py --runs 10 https://pics.dmm.co.jp/digital/video/ssni00558/ssni00558jp-1.jpg
+"""
+import argparse
+import io
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import dirname, abspath, join
+
+root_dir = dirname(dirname(abspath(__file__)))
+default_urls = [
+    "https://pics.dmm.co.jp/mono/movie/adult/ssni558/ssni558pl.jpg",
+    "https://pics.dmm.co.jp/mono/movie/adult/ssni558/ssni558ps.jpg",
+    "https://pics.dmm.co.jp/digital/video/ssni00558/ssni00558jp-1.jpg",
+    "https://pics.dmm.co.jp/digital/video/ssni00558/ssni00558jp-2.jpg",
+    "https://pics.dmm.co.jp/digital/video/ssni00558/ssni00558jp-3.jpg",
+    "https://pics.dmm.co.jp/digital/video/hnvr00007/hnvr00007pl.jpg",
+    "https://pics.dmm.co.jp/digital/video/hnvr00007/hnvr00007ps.jpg",
+]
+
+
+def measure(mode, runs, paths):
+    sys.path.insert(0, join(root_dir, 'src'))
+    sys.path.insert(0, join(root_dir, 'libs'))
+    from utility import image_helper
+    image_helper.load_image_libraries()
+    data_list = []
+    for path in paths:
+        with open(path, 'rb') as image_file:
+            data_list.append(image_file.read())
+    comparisons = 0
+    start_time_in_seconds = time.clock()
+    for _ in range(runs):
+        for index in range(1, len(data_list)):  # the cover is compared to every other image, as the fanza updater does
+            hashes = [get_hash(image_helper, mode, data) for data in (data_list[0], data_list[index])]
+            image_helper.hashes_are_similar(hashes[0], hashes[1])
+            comparisons += 1
+    cpu_time_in_seconds = time.clock() - start_time_in_seconds
+    peak_rss_in_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print 'hashing: {:.6f} {}'.format(cpu_time_in_seconds / comparisons, peak_rss_in_kb)
+
+
+def get_hash(image_helper, mode, data):
+    if mode == 'full':
+        image = image_helper.Image.open(io.BytesIO(data))
+    else:
+        image = image_helper.open_image_for_hash(data)
+    return image_helper.average_hash(image)
+
+
+def download(urls, directory):
+    import requests
+    paths = []
+    for index, url in enumerate(urls):
+        path = join(directory, "{}.jpg".format(index))
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        with open(path, 'wb') as image_file:
+            image_file.write(response.content)
+        paths.append(path)
+    return paths
+
+
+def benchmark(runs, urls):
+    directory = tempfile.mkdtemp()
+    try:
+        paths = download(urls, directory)
+        print 'images: {}, total {} bytes'.format(len(paths), sum(os.path.getsize(path) for path in paths))
+        for mode in ['full', 'reduced']:
+            command = [sys.executable, abspath(__file__), '--single', mode, '--runs', str(runs)] + paths
+            output = subprocess.check_output(command, cwd=root_dir)
+            line = [line for line in output.splitlines() if line.startswith('hashing: ')][0]
+            cpu_time_in_seconds, peak_rss_in_kb = line.split()[1:]
+            print '{:<8} cpu {:.2f}ms per comparison, peak rss {} KB'.format(mode, float(cpu_time_in_seconds) * 1000, peak_rss_in_kb)
+    finally:
+        shutil.rmtree(directory)
+
+
+parser = argparse.ArgumentParser("benchmark-image-hashing.py")
+parser.add_argument('-r', '--runs', help="number of times every comparison is repeated", type=int, default=5)
+parser.add_argument('--single', help=argparse.SUPPRESS, choices=['full', 'reduced'])
+parser.add_argument('images', help="urls of the images to compare, the first one is compared to the others", nargs='*')
+args = parser.parse_args()
+if args.single:
+    measure(args.single, args.runs, args.images)
+else:
+    benchmark(args.runs, args.images or default_urls)
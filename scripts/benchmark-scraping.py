@@ -0,0 +1,246 @@
+"""
+Measures how long it takes to extract an item from a product page of every scraped service, with the PyQuery
+extraction the services used before, which decodes the response into text first, and with the compiled selectors
+on the response bytes used now. Pages are replayed from recorded http cassettes, a service whose cassette is
+missing fails unless --record is given to record it from the live site. Both extractions must give the same item.
+
+    python scripts/benchmark-scraping.py
+    python scripts/benchmark-scraping.py --service heyzo --runs 200
+    python scripts/benchmark-scraping.py --service heyzo --record
+"""
+import argparse
+import re
+import sys
+import time
+from datetime import datetime, time as day_time, timedelta
+from os.path import dirname, abspath, join
+
+from pyquery import PyQuery
+
+root_dir = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, join(root_dir, 'src'))
+sys.path.insert(0, join(root_dir, 'libs'))
+
+from service.caribbeancom import api as caribbeancom_api  # noqa: E402
+from service.heyzo import api as heyzo_api  # noqa: E402
+from service.knights_visual import api as knights_visual_api  # noqa: E402
+from service.s_cute import api as s_cute_api  # noqa: E402
+from utility import cassette_helper  # noqa: E402
+from utility import fingerprint_helper  # noqa: E402
+from utility import http_helper  # noqa: E402
+
+cassettes_dir = join(root_dir, 'cassettes', 'scraping')
+
+
+def query_caribbeancom_item(url, html):
+    """
+    The extraction of caribbeancom_api.get_item before the selectors were compiled.
+    """
+    id = '070116-197'
+    base_url = caribbeancom_api.base_url
+    resource_base_url = caribbeancom_api.resource_base_url
+    query = PyQuery(html, parser='html')
+    item = caribbeancom_api.CaribbeancomItem()
+    item.id = id
+    item.url = url
+    item.title = query("h1[itemprop='name']").text()
+    item.description = query("p[itemprop='description']").text()
+    item.actor_name = query("div.movie-info span[itemprop='name']").text()
+    item.actor_id = int(query("a[itemprop='actor']").attr("href")
+                        .replace("/search_act/", "").replace("/1.html", ""))
+    item.actor_url = base_url + query("a[itemprop='actor']").attr("href")
+    item.actor_small_picture_url = "{}/images/actress/50x50/actor_{}.jpg".format(base_url, item.actor_id)
+    item.actor_large_picture_url = "{}/box/search_act/{}/images/top.jpg".format(base_url, item.actor_id)
+    item.sample_video_url = "{}/sample/movies/{}/480p.mp4".format(resource_base_url, id)
+    item.poster_url = "{}/moviepages/{}/images/jacket.jpg".format(resource_base_url, id)
+    item.background_url = "{}/moviepages/{}/images/l_l.jpg".format(resource_base_url, id)
+    item.upload_date = datetime.strptime(query("span[itemprop='uploadDate']").text(), '%Y/%m/%d').date()
+    item.duration = datetime.strptime(query("span[itemprop='duration']").text(), '%H:%M:%S').time()
+    item.duration_in_seconds = int(timedelta(hours=item.duration.hour, minutes=item.duration.minute,
+                                             seconds=item.duration.second).total_seconds())
+    item.rating = len(query("span.spec-content.rating.meta-rating").text())
+
+    series = query("a[onclick*='Series Name']")
+    if series.length > 0:
+        item.series_name = series.text()
+        item.series_url = "{}{}".format(base_url, series.attr("href"))
+        item.series_id = int(series.attr("href").replace("/series/", "").replace("/index.html", ""))
+
+    for element in query("span.spec-content > a[itemprop='url']"):
+        tag = caribbeancom_api.CaribbeancomItem.Tag()
+        tag.name = element.text
+        tag.url = base_url + element.attrib['href']
+        tag.slug = element.attrib['href'].replace("/listpages/", "").replace("1.htm", "")
+        item.tags.append(tag)
+
+    for element in query("a[itemprop='genre']"):
+        genre = caribbeancom_api.CaribbeancomItem.Genre()
+        genre.name = element.text
+        genre.url = base_url + element.attrib['href']
+        genre.slug = element.attrib['href'].replace("/listpages/", "").replace("1.htm", "")
+        item.genres.append(genre)
+
+    for element in query("div.movie-gallery.section a.gallery-image-wrap.fancy-gallery"):
+        if "member" not in element.attrib['href']:
+            item.sample_image_urls.append(base_url + element.attrib['href'])
+
+    for element in query("img.gallery-image[itemprop='thumbnail']"):
+        item.sample_image_thumbnail_urls.append(base_url + element.attrib['src'])
+
+    return item
+
+
+def query_heyzo_item(url, html):
+    """
+    The extraction of heyzo_api.get_by_id before the selectors were compiled.
+    """
+    id = '2272'
+    base_url = heyzo_api.base_url
+    query = PyQuery(html, parser='html')
+    item = heyzo_api.HeyzoItem()
+    item.id = id
+    item.url = url
+    item.title = query('#movie h1').text().split('-')[0].strip()
+    item.description = query('p.memo').text().strip()
+    item.actress_name = query('.table-actor span').text()
+    item.actress_url = base_url + query('.table-actor a').attr('href')
+    item.actress_id = int(item.actress_url.split('_')[1])
+    item.actress_picture_url = "{}/actorprofile/3000/{}/profile.jpg".format(base_url, str(item.actress_id).zfill(4))
+    item.release_date = datetime.strptime(query('.table-release-day td')[1].text.strip(), '%Y-%m-%d').date()
+    item.rating = float(query("span[itemprop='ratingValue']").text())
+    item.cover_url = "{}/contents/3000/{}/images/player_thumbnail.jpg".format(base_url, id)
+
+    for element in query(".table-actor-type a"):
+        category = heyzo_api.HeyzoItem.Category()
+        category.name = element.text
+        category.url = base_url + element.attrib['href']
+        category.id = int(category.url.split('_')[1])
+        item.categories.append(category)
+
+    for element in query(".table-tag-keyword-small .tag-keyword-list a"):
+        tag = heyzo_api.HeyzoItem.Tag()
+        tag.name = element.text
+        tag.url = base_url + element.attrib['href']
+        item.tags.append(tag)
+
+    return item
+
+
+def query_knights_visual_item(url, html):
+    """
+    The extraction of knights_visual_api.get_by_url before the selectors were compiled, but the upload date.
+    """
+    base_url = knights_visual_api.base_url
+    query = PyQuery(html, parser='html')
+    item = knights_visual_api.KnightVisualItem()
+
+    table_data = query("div.kvp_goods_info_table td.data")
+    item.url = url
+    item.id = table_data[0].text
+    item.label = table_data[1].text
+    item.actress_name = table_data[2].text
+    item.author_name = table_data[3].text
+    item.duration_in_minutes = int(table_data[4].text[:-1])
+    item.duration = day_time(hour=item.duration_in_minutes / 60, minute=item.duration_in_minutes % 60)
+    item.title = query("h1.entry-title > a").text()
+    item.description = query("div.entry-content > p").text().strip()
+    item.poster_url = base_url + query("div.entry-content > p > a > img").attr("data-lazy-src")
+    item.cover_url = base_url + query("div.entry-content > p > a").attr("href")
+    item.sample_video_url = query("div.entry-content > video").attr("src")
+    item.sample_image_thumbnail_urls = list(query(".gallery img").map(lambda i, e: PyQuery(e).attr("data-lazy-src")))
+    item.sample_image_urls = list(query(".gallery a").map(lambda i, e: PyQuery(e).attr("href")))
+    return item
+
+
+def query_s_cute_item(url, html):
+    """
+    The extraction of s_cute_api.get_by_id before the selectors were compiled.
+    """
+    query = PyQuery(html, parser='html')
+    item = s_cute_api.SCuteItem()
+    item.id = '734_reona_01'
+    item.url = url
+    item.title = query('h3.h1').text()
+    item.description = query('.blog-single > p').text()
+    item.cover_url = query('.content-cover > img:first').attr('src')
+    item.duration_in_min = int(re.findall(r"\d+", query(".blog-single .meta .comment").text())[0])
+    item.photo_count = int(re.findall(r"\d+", query(".blog-single .meta .views").text())[0])
+
+    actress_id_and_name = re.findall(r"#(\d+)\s(.*?)$", query('.about-author h5').text())
+    item.actress.id = int(actress_id_and_name[0][0])
+    item.actress.name = actress_id_and_name[0][1]
+    item.actress.description = query('.about-author p:last').text()
+    item.actress.url = "{}{}".format(s_cute_api.base_url, query('.about-author a:first').attr('href'))
+    item.actress.photo_url = query('.about-author img').attr('src')
+
+    date = re.findall(r"\d+/\d+/\d+", query(".blog-single .meta .date").text())[0]
+    item.release_date = datetime.strptime(date, '%Y/%m/%d')
+
+    for element in query(".tags a"):
+        tag = s_cute_api.SCuteItem.Tag()
+        tag.name = element.text
+        tag.url = element.attrib['href']
+        item.tags.append(tag)
+
+    for element in query(".photos a[data-lightbox='gallery']"):
+        photo = s_cute_api.SCuteItem.Photo()
+        photo.image_url = element.attrib['href']
+        photo.thumbnail_url = PyQuery(element).find('img').attr('src')
+        item.photos.append(photo)
+
+    return item
+
+
+scenarios = [
+    ('caribbeancom', "{}/moviepages/070116-197/index.html".format(caribbeancom_api.base_url),
+     query_caribbeancom_item,
+     lambda url, content, encoding: caribbeancom_api.parse_item('070116-197', url, content, encoding)),
+    ('heyzo', "{}/moviepages/2272/index.html".format(heyzo_api.base_url),
+     query_heyzo_item,
+     lambda url, content, encoding: heyzo_api.parse_item('2272', url, content, encoding)),
+    ('knights_visual', "{}/works/furasupi/kv-094".format(knights_visual_api.base_url),
+     query_knights_visual_item,
+     knights_visual_api.parse_item),
+    ('s_cute', "{}/contents/734_reona_01".format(s_cute_api.base_url),
+     query_s_cute_item,
+     lambda url, content, encoding: s_cute_api.parse_item('734_reona_01', url, content, encoding)),
+]
+
+
+def measure(extract, runs):
+    """
+    :rtype: (float, object)
+    """
+    item = extract()  # warm up
+    start_time_in_seconds = time.clock()
+    for _ in range(runs):
+        extract()
+    return (time.clock() - start_time_in_seconds) / runs, item
+
+
+parser = argparse.ArgumentParser("benchmark-scraping.py")
+parser.add_argument('-s', '--service', help="only run the given service", action='append')
+parser.add_argument('-r', '--runs', help="number of times every page is parsed", type=int, default=100)
+parser.add_argument('--record', help="record missing cassettes from the live sites", action='store_true')
+args = parser.parse_args()
+
+print '{:<16} {:>10} {:>16} {:>16}'.format('service', 'bytes', 'pyquery ms/page', 'compiled ms/page')
+for service, url, query_item, parse_item in scenarios:
+    if args.service and service not in args.service:
+        continue
+    try:
+        with cassette_helper.use_cassette(join(cassettes_dir, "{}.json".format(service)), args.record):
+            response = http_helper.get(url)
+            response.raise_for_status()
+            content = response.content
+    except Exception as exception:
+        print '{:<16} failed: {}'.format(service, exception)
+        continue
+    encoding = http_helper.get_charset(response)
+    # response.text decodes the content again on every access, as it did for every page the services fetched
+    pyquery, pyquery_item = measure(lambda: query_item(url, response.text), args.runs)
+    compiled, compiled_item = measure(lambda: parse_item(url, content, encoding), args.runs)
+    if fingerprint_helper.to_plain_value(pyquery_item) != fingerprint_helper.to_plain_value(compiled_item):
+        print '{:<16} failed: the compiled selectors extract a different item'.format(service)
+        continue
+    print '{:<16} {:>10} {:>16.3f} {:>16.3f}'.format(service, len(content), pyquery * 1000, compiled * 1000)
@@ -0,0 +1,109 @@
+"""
+Runs search and update of every service against recorded http cassettes, and reports time spent,
+number of requests and bytes read. The benchmark runs offline and deterministically, a scenario whose cassette
+is missing fails unless --record is given to record it from the live sites.
+
+    python scripts/benchmark-services.py
+    python scripts/benchmark-services.py --service fanza --runs 5
+    python scripts/benchmark-services.py --service heyzo --record
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from os.path import dirname, abspath, join
+
+root_dir = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, join(root_dir, 'src'))
+sys.path.insert(0, join(root_dir, 'libs'))
+
+from plex.container import ObjectContainer  # noqa: E402
+from plex.metadata import Movie  # noqa: E402
+from service.caribbeancom import searcher as caribbeancom_searcher  # noqa: E402
+from service.caribbeancom import updater as caribbeancom_updater  # noqa: E402
+from service.caribbeancom_pr import searcher as caribbeancom_pr_searcher  # noqa: E402
+from service.caribbeancom_pr import updater as caribbeancom_pr_updater  # noqa: E402
+from service.fanza import searcher as fanza_searcher  # noqa: E402
+from service.fanza import updater as fanza_updater  # noqa: E402
+from service.heyzo import searcher as heyzo_searcher  # noqa: E402
+from service.heyzo import updater as heyzo_updater  # noqa: E402
+from service.ichi_pondo import searcher as ichi_pondo_searcher  # noqa: E402
+from service.ichi_pondo import updater as ichi_pondo_updater  # noqa: E402
+from service.knights_visual import searcher as knights_visual_searcher  # noqa: E402
+from service.knights_visual import updater as knights_visual_updater  # noqa: E402
+from service.s_cute import searcher as s_cute_searcher  # noqa: E402
+from service.s_cute import updater as s_cute_updater  # noqa: E402
+from utility import cache_helper  # noqa: E402
+from utility import cassette_helper  # noqa: E402
+from utility import http_helper  # noqa: E402
+from utility import image_helper  # noqa: E402
+from utility import mixpanel_helper  # noqa: E402
+
+cassettes_dir = join(root_dir, 'cassettes')
+scenarios = [
+    ('caribbeancom', 'Carib-070116-197', caribbeancom_searcher, caribbeancom_updater),
+    ('caribbeancom_pr', 'CaribPR-091616-007', caribbeancom_pr_searcher, caribbeancom_pr_updater),
+    ('fanza', 'SSNI-558', fanza_searcher, fanza_updater),
+    ('heyzo', 'Heyzo-2272', heyzo_searcher, heyzo_updater),
+    ('ichi_pondo', '1Pon-100616_399', ichi_pondo_searcher, ichi_pondo_updater),
+    ('knights_visual', 'KV-094', knights_visual_searcher, knights_visual_updater),
+    ('s_cute', 's-cute-734_reona_01', s_cute_searcher, s_cute_updater),
+]
+
+
+def run_scenario(service, keyword, service_searcher, service_updater):
+    """
+    Runs search and then update of the first result, with a fresh cache so every request is made.
+    :rtype: list[(str, float, int, int)]
+    """
+    cache_helper.close()
+    cache_helper.database_path = join(tempfile.mkdtemp(), 'cache.db')
+    measurements = []
+    with cassette_helper.use_cassette(join(cassettes_dir, service, "{}.json".format(keyword.lower())), args.record):
+        http_helper.reset_stats()
+        start_time_in_seconds = time.time()
+        results = ObjectContainer()
+        service_searcher.search(results, None, keyword)
+        measurements.append(('search', time.time() - start_time_in_seconds) + count_stats())
+
+        if len(results) > 0:
+            http_helper.reset_stats()
+            start_time_in_seconds = time.time()
+            metadata = Movie()
+            metadata.id = results[0].id
+            service_updater.update(metadata, True)
+            measurements.append(('update', time.time() - start_time_in_seconds) + count_stats())
+    cache_helper.close()
+    shutil.rmtree(dirname(cache_helper.database_path))
+    return measurements
+
+
+def count_stats():
+    """
+    :rtype: (int, int)
+    """
+    stats = http_helper.get_stats().values()
+    return sum(host_stats['requests'] for host_stats in stats), sum(host_stats['bytes'] for host_stats in stats)
+
+
+parser = argparse.ArgumentParser("benchmark-services.py")
+parser.add_argument('-s', '--service', help="only run the given service", action='append')
+parser.add_argument('-r', '--runs', help="number of runs of each scenario, the fastest one is reported", type=int, default=3)
+parser.add_argument('--record', help="record missing cassettes from the live sites", action='store_true')
+args = parser.parse_args()
+
+mixpanel_helper.initialize('benchmark', test_mode=True)
+image_helper.load_image_libraries()
+print '{:<16} {:<8} {:>10} {:>9} {:>12}'.format('service', 'phase', 'seconds', 'requests', 'bytes')
+for service, keyword, service_searcher, service_updater in scenarios:
+    if args.service and service not in args.service:
+        continue
+    try:
+        runs = [run_scenario(service, keyword, service_searcher, service_updater) for _ in range(args.runs)]
+    except Exception as exception:
+        print '{:<16} failed: {}'.format(service, exception)
+        continue
+    for index, (phase, _, requests, size) in enumerate(runs[0]):
+        seconds = min(measurements[index][1] for measurements in runs)
+        print '{:<16} {:<8} {:>10.3f} {:>9} {:>12}'.format(service, phase, seconds, requests, size)
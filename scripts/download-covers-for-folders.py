@@ -16,22 +16,21 @@ import service.heyzo.api as heyzo_api
 import service.ichi_pondo.api as ichi_pondo_api
 import service.idea_pocket.api as idea_pocket_api
 import service.knights_visual.api as knights_visual_api
-import service.s1.api as s1_api
 import service.s_cute.api as s_cute_api
+import service.classifier as classifier
 
 
 def get_cover_url(product_id):
-    function_calls = [
-        fanza_dvd_cover_url,
-        fanza_digital_cover_url,
-        caribbeancom_cover_url,
-        caribbeancom_pr_cover_url,
-        heyzo_cover_url,
-        ichi_pondo_cover_url,
-        knights_visual_cover_url,
-        s_cute_cover_url,
-    ]
-    for call in function_calls:
+    function_calls = {
+        'fanza': [fanza_dvd_cover_url, fanza_digital_cover_url],
+        'caribbeancom': [caribbeancom_cover_url],
+        'caribbeancom_pr': [caribbeancom_pr_cover_url],
+        'heyzo': [heyzo_cover_url],
+        'ichi_pondo': [ichi_pondo_cover_url],
+        'knights_visual': [knights_visual_cover_url],
+        's_cute': [s_cute_cover_url],
+    }
+    for call in [call for service in classifier.classify(product_id) for call in function_calls[service]]:
         url = call(product_id)
         if url is not None:
             print 'found cover: ' + url
@@ -0,0 +1,104 @@
+"""
+Resolves every video of a library folder tree through the services, the same way the agent searches and updates it,
+so pages, api responses and image hashes are in the agent's cache before plex scans the library.
+Requests are paced per host and unhealthy services are skipped, as in the agent.
+
+Padded and cropped posters are not persisted, they are made on a stub movie and thrown away. Plex downloads and
+makes them again on its first update, the warm-up only saves it the pages, api responses and hashes behind them.
+
+    python scripts/warm-up-library.py /volume/JAVs
+    python scripts/warm-up-library.py --workers 16 --cache /var/lib/plex/.javplexagent/cache.db /volume/JAVs
+"""
+import argparse
+import os
+import sys
+import time
+from collections import OrderedDict
+from os.path import dirname, abspath, join, splitext
+
+from concurrent.futures import as_completed
+
+root_dir = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, join(root_dir, 'src'))
+sys.path.insert(0, join(root_dir, 'libs'))
+
+import agent  # noqa: E402
+from plex.metadata import Movie, RoleList  # noqa: E402
+from utility import cache_helper  # noqa: E402
+from utility import circuit_helper  # noqa: E402
+from utility import concurrent_helper  # noqa: E402
+from utility import fingerprint_helper  # noqa: E402
+from utility import http_helper  # noqa: E402
+from utility import image_helper  # noqa: E402
+from utility import mixpanel_helper  # noqa: E402
+
+video_extensions = {'.avi', '.flv', '.iso', '.m2ts', '.m4v', '.mkv', '.mov', '.mp4', '.mpeg', '.mpg', '.rmvb', '.ts', '.wmv'}
+
+
+def find_videos(directory):
+    """
+    :rtype: list[str]
+    """
+    paths = []
+    for parent, _, filenames in os.walk(directory):
+        paths.extend(join(parent, filename) for filename in filenames if splitext(filename)[1].lower() in video_extensions)
+    return sorted(paths)
+
+
+def warm_up(path, search_only):
+    """
+    Searches the video as the agent does, and updates the result plex would match.
+    :rtype: str
+    """
+    calls = agent.plan_searches(*agent.get_keywords(path))
+    containers = concurrent_helper.run_all(calls, agent.search_timeout_in_seconds, pool='search')
+    best_result = agent.get_best_result(agent.merge_results(containers))
+    if best_result is None:
+        return None
+    if not search_only:
+        concurrent_helper.run_safely(update, best_result.id)
+    return best_result.id
+
+
+def update(metadata_id):
+    """
+    Updates a stub movie, whose posters and artworks are discarded afterwards.
+    """
+    metadata = Movie()
+    metadata.id = metadata_id
+    metadata.genres, metadata.roles = set(), RoleList()  # the stub shares them between movies
+    metadata.posters, metadata.art = OrderedDict(), OrderedDict()
+    for service, id_prefix, service_updater in agent.updaters:
+        if metadata_id.startswith(id_prefix):
+            circuit_helper.call(service, service_updater.update, metadata)
+
+
+parser = argparse.ArgumentParser("warm-up-library.py")
+parser.add_argument('directory', help="root folder of the library")
+parser.add_argument('-w', '--workers', help="number of videos resolved at the same time", type=int, default=8)
+parser.add_argument('-c', '--cache', help="cache database of the agent", default=cache_helper.database_path)
+parser.add_argument('--search-only', help="only search, without fetching actresses and images of the results", action='store_true')
+args = parser.parse_args()
+
+concurrent_helper.process_pool_enabled = True  # a plain python process, unlike the plex script host
+image_helper.start_image_workers()
+mixpanel_helper.initialize('warm-up', test_mode=True)
+cache_helper.database_path = args.cache
+fingerprint_helper.save_fingerprints = False
+concurrent_helper.max_workers_by_pool['warm-up'] = args.workers
+
+start_time_in_seconds = time.time()
+paths = find_videos(args.directory)
+print 'found {} videos in {:.1f} seconds'.format(len(paths), time.time() - start_time_in_seconds)
+executor = concurrent_helper.get_executor('warm-up')
+futures = dict((executor.submit(concurrent_helper.run_safely, warm_up, path, args.search_only), path) for path in paths)
+resolved = 0
+for index, future in enumerate(as_completed(futures)):
+    metadata_id = future.result()
+    resolved += metadata_id is not None
+    print '[{}/{}] {} -> {}'.format(index + 1, len(paths), os.path.relpath(futures[future], args.directory), metadata_id or 'not found')
+stats = http_helper.get_stats().values()
+print 'resolved {} of {} videos in {:.1f} seconds, {} requests, {} bytes'.format(
+    resolved, len(paths), time.time() - start_time_in_seconds,
+    sum(host_stats['requests'] for host_stats in stats), sum(host_stats['bytes'] for host_stats in stats))
+cache_helper.close()
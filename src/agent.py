@@ -4,7 +4,9 @@ import sys
 import time
 
 import build_config
+from plex.container import ObjectContainer
 from plex.log import Log
+from service import classifier
 from service.caribbeancom import searcher as caribbeancom_searcher
 from service.caribbeancom import updater as caribbeancom_updater
 from service.caribbeancom_pr import searcher as caribbeancom_pr_searcher
@@ -19,12 +21,135 @@ from service.knights_visual import searcher as knights_visual_searcher
 from service.knights_visual import updater as knights_visual_updater
 from service.s_cute import searcher as s_cute_searcher
 from service.s_cute import updater as s_cute_updater
+from utility import circuit_helper
+from utility import concurrent_helper
 from utility import file_helper
 from utility import image_helper
 from utility import mixpanel_helper
 from utility import sentry_helper
 from utility import user_helper
 
+search_timeout_in_seconds = 60
+lazy_initialization = True
+searchers = [
+    ('caribbeancom', caribbeancom_searcher),
+    ('caribbeancom_pr', caribbeancom_pr_searcher),
+    ('fanza', fanza_searcher),
+    ('knights_visual', knights_visual_searcher),
+    ('heyzo', heyzo_searcher),
+    ('ichi_pondo', ichi_pondo_searcher),
+    ('s_cute', s_cute_searcher)]
+updaters = [
+    ('caribbeancom', 'carib-', caribbeancom_updater),
+    ('caribbeancom_pr', 'caribpr-', caribbeancom_pr_updater),
+    ('fanza', 'fanza-', fanza_updater),
+    ('knights_visual', 'knights-visual-', knights_visual_updater),
+    ('heyzo', 'heyzo-', heyzo_updater),
+    ('ichi_pondo', '1pon-', ichi_pondo_updater),
+    ('s_cute', 's-cute-', s_cute_updater)]
+
+
+def search_into_container(service, service_searcher, part_number, keyword):
+    """
+    Runs a searcher with its own container, so that concurrent searches do not write into the same one.
+    :type service: str
+    :type part_number: Optional[int]
+    :type keyword: str
+    :rtype: ObjectContainer
+    """
+    container = ObjectContainer()
+    circuit_helper.call(service, service_searcher.search, container, part_number, keyword)
+    return container
+
+
+def get_keywords(filename):
+    """
+    Generates the keywords from the directory and file name of a video.
+    :type filename: str
+    :return: the directory, product id and part number
+    :rtype: (str, str, Optional[int])
+    """
+    directory = os.path.basename(os.path.dirname(filename))
+    product_id, part_number = file_helper.extract_product_id_and_part_number(filename)
+    Log.Debug("directory: {}".format(directory))
+    Log.Debug("product_id: {}".format(product_id))
+    Log.Debug("part_number: {}".format(part_number))
+
+    # detect if there are extra info like "1PON-121015_001 (121015_3314)"
+    # TODO: do something with this info
+    partitioned_product_id = product_id.partition(' ')
+    if len(partitioned_product_id) > 2:
+        product_id = partitioned_product_id[0]
+        Log.Debug("it seems like there are more info after production id: {}".format(partitioned_product_id[2]))
+        Log.Debug("it is ignored for now, so it became: {}".format(product_id))
+    return directory, product_id, part_number
+
+
+def plan_searches(directory, product_id, part_number):
+    """
+    Returns the searches of the services which can match the keywords, services cooling down are skipped.
+    Both keywords are often the same id, like a single video in the library root, so each id is searched once.
+    :type directory: str
+    :type product_id: str
+    :type part_number: Optional[int]
+    :rtype: list[(function, tuple)]
+    """
+    directory_services = classifier.classify(directory)
+    product_id_services = classifier.classify(product_id)
+    calls = []
+    searched_ids = set()
+    for service, service_searcher in searchers:
+        if circuit_helper.is_open(service):
+            Log.Info("Skipping search of {}, it failed too often and is cooling down".format(service))
+            continue
+        for keyword, keyword_services in [(directory, directory_services), (product_id, product_id_services)]:
+            if service not in keyword_services:
+                continue
+            canonical_id = classifier.get_canonical_id(service, keyword)
+            if (service, canonical_id) in searched_ids:
+                Log.Debug("Skipping search of {} with '{}', its id is searched already".format(service, keyword))
+                continue
+            searched_ids.add((service, canonical_id))
+            calls.append((search_into_container, (service, service_searcher, part_number, keyword)))
+    return calls
+
+
+def merge_results(containers):
+    """
+    Merges results in a fixed order, searches failed or not finished in time are skipped.
+    :type containers: list[Optional[ObjectContainer]]
+    :rtype: list[MetadataSearchResult]
+    """
+    results = []
+    result_ids = set()
+    for container in containers:
+        if container is not None:
+            for result in container:
+                if result.id not in result_ids:
+                    result_ids.add(result.id)
+                    results.append(result)
+    return results
+
+
+def get_best_result(results):
+    """
+    Returns the result plex ranks first, the highest score wins and ties keep the merged order.
+    :type results: list[MetadataSearchResult]
+    :rtype: Optional[MetadataSearchResult]
+    """
+    return max(results, key=lambda result: result.score) if len(results) > 0 else None
+
+
+def report_initialized(time_spent_in_seconds):
+    """
+    Sends the startup telemetry, which needs network requests and loads the image libraries.
+    :type time_spent_in_seconds: float
+    """
+    mixpanel_helper.track.identify()
+    if user_helper.is_new_user_id: mixpanel_helper.track.installed()  # noqa
+    image_rocessing_capability = image_helper.is_image_analysis_available()
+    mixpanel_helper.track.initialized(image_rocessing_capability, time_spent_in_seconds)
+
 
 # noinspection PyMethodMayBeStatic,DuplicatedCode
 class JavMovieAgent:
@@ -49,19 +174,24 @@ class JavMovieAgent:
         Log.Debug("platform.win32_ver: {}".format(platform.win32_ver()))
         for i, path in enumerate(sys.path): Log.Debug("sys.path[{}]: {}".format(i, path))  # noqa
 
+        # image worker processes are opt-in, the image work runs in threads otherwise
+        image_helper.start_image_workers()
+
         # init user id
         user_id = user_helper.get_user_id()
         Log.Debug('user_id: {}'.format(user_id))
 
         # init mixpanel, sentry and then agent
         mixpanel_helper.initialize(user_id)
-        if user_helper.is_new_user_id: mixpanel_helper.track.installed()  # noqa
         sentry_helper.init_sentry(user_id)
 
-        # done
+        # done, the agent can serve searches before the startup telemetry is sent
         time_spent_in_seconds = time.time() - start_time_in_seconds
-        image_rocessing_capability = image_helper.can_analyze_images
-        mixpanel_helper.track.initialized(image_rocessing_capability, time_spent_in_seconds)
+        Log.Info("Agent is ready in {} seconds".format(time_spent_in_seconds))
+        if lazy_initialization:
+            concurrent_helper.get_executor().submit(concurrent_helper.run_safely, report_initialized, time_spent_in_seconds)
+        else:
+            report_initialized(time_spent_in_seconds)
 
     def search(self, results, media, lang, manual, primary):
         """
@@ -86,35 +216,13 @@ class JavMovieAgent:
 
         # generating keywords from directory and filename
         filename = media.items[0].parts[0].file
-        directory = os.path.basename(os.path.dirname(filename))
-        product_id, part_number = file_helper.extract_product_id_and_part_number(filename)
-        Log.Debug("directory: {}".format(directory))
-        Log.Debug("product_id: {}".format(product_id))
-        Log.Debug("part_number: {}".format(part_number))
-
-        # detect if there are extra info like "1PON-121015_001 (121015_3314)"
-        # TODO: do something with this info
-        partitioned_product_id = product_id.partition(' ')
-        if len(partitioned_product_id) > 2:
-            product_id = partitioned_product_id[0]
-            Log.Debug("it seems like there are more info after production id: {}".format(partitioned_product_id[2]))
-            Log.Debug("it is ignored for now, so it became: {}".format(product_id))
-
-        # query fanza api with keywords
-        caribbeancom_searcher.search(results, part_number, directory)
-        caribbeancom_searcher.search(results, part_number, product_id)
-        caribbeancom_pr_searcher.search(results, part_number, directory)
-        caribbeancom_pr_searcher.search(results, part_number, product_id)
-        fanza_searcher.search(results, part_number, directory)
-        fanza_searcher.search(results, part_number, product_id)
-        knights_visual_searcher.search(results, part_number, directory)
-        knights_visual_searcher.search(results, part_number, product_id)
-        heyzo_searcher.search(results, part_number, directory)
-        heyzo_searcher.search(results, part_number, product_id)
-        ichi_pondo_searcher.search(results, part_number, directory)
-        ichi_pondo_searcher.search(results, part_number, product_id)
-        s_cute_searcher.search(results, part_number, directory)
-        s_cute_searcher.search(results, part_number, product_id)
+        directory, product_id, part_number = get_keywords(filename)
+
+        # query services which can match the keywords concurrently
+        calls = plan_searches(directory, product_id, part_number)
+        containers = concurrent_helper.run_all(calls, search_timeout_in_seconds, pool='search')
+        for result in merge_results(containers):
+            results.Append(result)
 
         # done
         Log.Info("Search is done")
@@ -142,14 +250,12 @@ class JavMovieAgent:
         Log.Debug("periodic: {}".format(periodic))
         Log.Debug("prefs: {}".format(prefs))
 
-        # actual updating
-        caribbeancom_updater.update(metadata)
-        caribbeancom_pr_updater.update(metadata)
-        fanza_updater.update(metadata)
-        knights_visual_updater.update(metadata)
-        heyzo_updater.update(metadata)
-        ichi_pondo_updater.update(metadata)
-        s_cute_updater.update(metadata)
+        # actual updating, a service which failed too often raises CircuitOpenError until it is cooled down
+        # periodic refreshes only apply what has changed since the last update, unless they are forced
+        incremental = periodic and not force
+        for service, id_prefix, service_updater in updaters:
+            if metadata.id.startswith(id_prefix):
+                circuit_helper.call(service, service_updater.update, metadata, force, incremental)
 
         # done
         Log.Info("Update is done")
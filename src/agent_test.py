@@ -1,7 +1,132 @@
+import os
+import shutil
+import tempfile
+import time
 from unittest import TestCase
 
+import mock
+
+import agent
+from plex.container import ObjectContainer
+
+
+class FakeSearcher(object):
+
+    def __init__(self, name, delay_in_seconds=0.0, error=None, result_id=None):
+        self.name = name
+        self.delay_in_seconds = delay_in_seconds
+        self.error = error
+        self.result_id = result_id
+
+    def search(self, results, part_number, keyword):
+        time.sleep(self.delay_in_seconds)
+        if self.error is not None:
+            raise self.error
+        results.Append(mock.Mock(id=self.result_id or "{}:{}".format(self.name, keyword.lower())))
+
 
 class Test(TestCase):
 
+    def setUp(self):
+        self.media = mock.Mock(id=1, year=2019, filename='/library/SSNI-558/SSNI-558.mp4')
+        self.media.name = 'SSNI-558'
+        self.media.items = [mock.Mock(parts=[mock.Mock(file='/library/SSNI-558/SSNI-558.mp4')])]
+        with mock.patch.object(agent.JavMovieAgent, '__init__', lambda self, name: None):
+            self.agent = agent.JavMovieAgent('test')
+        self.track = mock.patch.object(agent.mixpanel_helper, 'track', mock.Mock())
+        self.track.start()
+
+    def tearDown(self):
+        self.track.stop()
+
     def test_agent(self):
         self.assertTrue(True)
+
+    def test_search___merges_results_of_matching_services_in_fixed_order(self):
+        searchers = [('fanza', FakeSearcher('slow', 0.3)), ('heyzo', FakeSearcher('skipped')), ('s_cute', FakeSearcher('fast'))]
+        self.media.items[0].parts[0].file = '/library/s-cute-734_reona_01/SSNI-558.mp4'
+        with mock.patch.object(agent, 'searchers', searchers):
+            results = ObjectContainer()
+            start_time_in_seconds = time.time()
+            self.agent.search(results, self.media, 'ja', True, True)
+            self.assertLess(time.time() - start_time_in_seconds, 0.6)
+        self.assertEqual(['slow:ssni-558', 'fast:s-cute-734_reona_01'], [result.id for result in results])
+
+    def test_search___skips_failed_searcher(self):
+        searchers = [('heyzo', FakeSearcher('broken', error=ValueError('expected'))), ('fanza', FakeSearcher('working'))]
+        self.media.items[0].parts[0].file = '/library/HEYZO-2272/SSNI-558.mp4'
+        with mock.patch.object(agent, 'searchers', searchers):
+            results = ObjectContainer()
+            self.agent.search(results, self.media, 'ja', True, True)
+        self.assertEqual(['working:ssni-558'], [result.id for result in results])
+
+    def test_search___searches_same_id_once(self):
+        searcher = mock.Mock(wraps=FakeSearcher('fanza'))
+        with mock.patch.object(agent, 'searchers', [('fanza', searcher)]):
+            results = ObjectContainer()
+            self.agent.search(results, self.media, 'ja', True, True)
+        self.assertEqual(1, searcher.search.call_count)
+        self.assertEqual(['fanza:ssni-558'], [result.id for result in results])
+
+    def test_search___dedupes_results_by_id(self):
+        searcher = mock.Mock(wraps=FakeSearcher('fanza', result_id='fanza-dvd-ssni558'))
+        self.media.items[0].parts[0].file = '/library/ssni-558 uncut/SSNI-558.mp4'
+        with mock.patch.object(agent, 'searchers', [('fanza', searcher)]):
+            results = ObjectContainer()
+            self.agent.search(results, self.media, 'ja', True, True)
+        self.assertEqual(2, searcher.search.call_count)
+        self.assertEqual(['fanza-dvd-ssni558'], [result.id for result in results])
+
+    def test_get_best_result___highest_score_across_services_then_merged_order(self):
+        containers = [[mock.Mock(id='carib-1', score=80)], None, [mock.Mock(id='fanza-1', score=100), mock.Mock(id='fanza-2', score=100)]]
+        self.assertEqual('fanza-1', agent.get_best_result(agent.merge_results(containers)).id)
+        self.assertIsNone(agent.get_best_result([]))
+
+    def test_search___skips_service_with_open_circuit(self):
+        error = agent.circuit_helper.requests.ConnectionError('down')
+        searchers = [('heyzo', FakeSearcher('down', error=error)), ('fanza', FakeSearcher('working'))]
+        self.media.items[0].parts[0].file = '/library/HEYZO-2272/SSNI-558.mp4'
+        with mock.patch.object(agent, 'searchers', searchers), mock.patch.object(agent.circuit_helper, 'breakers', {}):
+            for _ in range(agent.circuit_helper.failure_threshold):
+                self.agent.search(ObjectContainer(), self.media, 'ja', True, True)
+            with mock.patch.object(searchers[0][1], 'search') as search:
+                results = ObjectContainer()
+                self.agent.search(results, self.media, 'ja', True, True)
+        search.assert_not_called()
+        self.assertEqual(['working:ssni-558'], [result.id for result in results])
+
+    def test_update___incremental_on_periodic_refresh_only(self):
+        updater = mock.Mock()
+        metadata = mock.Mock(id='heyzo-2272', title='HEYZO-2272', year=2020)
+        with mock.patch.object(agent, 'updaters', [('fanza', 'fanza-', mock.Mock()), ('heyzo', 'heyzo-', updater)]), \
+                mock.patch.object(agent.circuit_helper, 'breakers', {}):
+            self.agent.update(metadata, self.media, 'ja', False, None, None, True, None)
+            self.agent.update(metadata, self.media, 'ja', True, None, None, True, None)
+            self.agent.update(metadata, self.media, 'ja', False, None, None, False, None)
+        self.assertEqual([mock.call(metadata, False, True), mock.call(metadata, True, False), mock.call(metadata, False, False)],
+                         updater.update.call_args_list)
+
+    def test_search_and_update___skips_fanza_while_it_is_down(self):
+        directory = tempfile.mkdtemp()
+        get = mock.Mock(side_effect=agent.circuit_helper.requests.ConnectionError('api.dmm.com is down'))
+        metadata = mock.Mock(id='fanza-dvd-ssni558', title='SSNI-558', year=2019)
+        try:
+            with mock.patch.object(agent, 'searchers', [('fanza', agent.fanza_searcher)]), \
+                    mock.patch.object(agent.circuit_helper, 'breakers', {}), \
+                    mock.patch.object(agent.fanza_updater.api.cache_helper, 'database_path', os.path.join(directory, 'cache.db')), \
+                    mock.patch.object(agent.fanza_updater.api.http_helper, 'get', get):
+                agent.fanza_updater.api.cache_helper.close()
+                for _ in range(agent.circuit_helper.failure_threshold - 1):
+                    self.agent.search(ObjectContainer(), self.media, 'ja', True, True)
+                self.assertRaises(agent.circuit_helper.requests.ConnectionError,
+                                  self.agent.update, metadata, self.media, 'ja', False, None, None, False, None)
+                requests = get.call_count
+                results = ObjectContainer()
+                self.agent.search(results, self.media, 'ja', True, True)
+                self.assertRaises(agent.circuit_helper.CircuitOpenError,
+                                  self.agent.update, metadata, self.media, 'ja', False, None, None, False, None)
+        finally:
+            agent.fanza_updater.api.cache_helper.close()
+            shutil.rmtree(directory)
+        self.assertEqual(requests, get.call_count)
+        self.assertEqual(0, len(results))
@@ -2,11 +2,15 @@
 import re
 from datetime import date, datetime, timedelta
 
-from pyquery import PyQuery
 from typing import List
 
+from utility import cache_helper
+from utility import http_helper
+from utility import scrape_helper
+
 base_url = "https://www.caribbeancom.com"
 resource_base_url = "https://smovie.caribbeancom.com"
+id_pattern = re.compile(r"Carib(bean|beancom)?-(?P<id>\d{6}-\d+)", re.IGNORECASE)
 
 
 def has_valid_id(filename):
@@ -23,66 +27,94 @@ def extract_id(filename):
     :type filename: str
     :rtype: str
     """
-    match = re.match("Carib(bean|beancom)?-(\d{6}-\d+)", filename, re.IGNORECASE)  # noqa: W605
+    match = id_pattern.match(filename)
     if match:
-        return match.group(2)
+        return match.group('id')
     return None
 
 
 # noinspection PyShadowingBuiltins
-def get_item(id):
+def get_item(id, force=False):
     """
     :type id: str
+    :type force: bool
     :rtype: CaribbeancomItem
     """
     url = "{}/moviepages/{}/index.html".format(base_url, id)
-    query = PyQuery(url)
+    content, encoding = cache_helper.get_or_revalidate('caribbeancom', id, http_helper.get_page_if_modified, (url,), force)
+    return parse_item(id, url, content, encoding)
+
+
+title_selector = scrape_helper.Selector("h1[itemprop='name']")
+description_selector = scrape_helper.Selector("p[itemprop='description']")
+actor_name_selector = scrape_helper.Selector("div.movie-info span[itemprop='name']")
+actor_selector = scrape_helper.Selector("a[itemprop='actor']")
+upload_date_selector = scrape_helper.Selector("span[itemprop='uploadDate']")
+duration_selector = scrape_helper.Selector("span[itemprop='duration']")
+rating_selector = scrape_helper.Selector("span.spec-content.rating.meta-rating")
+series_selector = scrape_helper.Selector("a[onclick*='Series Name']")
+tag_selector = scrape_helper.Selector("span.spec-content > a[itemprop='url']")
+genre_selector = scrape_helper.Selector("a[itemprop='genre']")
+sample_image_selector = scrape_helper.Selector("div.movie-gallery.section a.gallery-image-wrap.fancy-gallery")
+sample_image_thumbnail_selector = scrape_helper.Selector("img.gallery-image[itemprop='thumbnail']")
+
+
+# noinspection PyShadowingBuiltins
+def parse_item(id, url, content, encoding=None):
+    """
+    :type id: str
+    :type url: str
+    :type content: str
+    :type encoding: Optional[str]
+    :rtype: CaribbeancomItem
+    """
+    page = scrape_helper.parse(content, encoding)
     item = CaribbeancomItem()
     item.id = id
     item.url = url
-    item.title = query("h1[itemprop='name']").text()
-    item.description = query("p[itemprop='description']").text()
-    item.actor_name = query("div.movie-info span[itemprop='name']").text()
-    item.actor_id = int(query("a[itemprop='actor']").attr("href")
-                        .replace("/search_act/", "").replace("/1.html", ""))
-    item.actor_url = base_url + query("a[itemprop='actor']").attr("href")
+    item.title = title_selector.text(page)
+    item.description = description_selector.text(page)
+    item.actor_name = actor_name_selector.text(page)
+    actor_href = actor_selector.attr(page, "href")
+    item.actor_id = int(actor_href.replace("/search_act/", "").replace("/1.html", ""))
+    item.actor_url = base_url + actor_href
     item.actor_small_picture_url = "{}/images/actress/50x50/actor_{}.jpg".format(base_url, item.actor_id)
     item.actor_large_picture_url = "{}/box/search_act/{}/images/top.jpg".format(base_url, item.actor_id)
     item.sample_video_url = "{}/sample/movies/{}/480p.mp4".format(resource_base_url, id)
     item.poster_url = "{}/moviepages/{}/images/jacket.jpg".format(resource_base_url, id)
     item.background_url = "{}/moviepages/{}/images/l_l.jpg".format(resource_base_url, id)
-    item.upload_date = datetime.strptime(query("span[itemprop='uploadDate']").text(), '%Y/%m/%d').date()
-    item.duration = datetime.strptime(query("span[itemprop='duration']").text(), '%H:%M:%S').time()
+    item.upload_date = datetime.strptime(upload_date_selector.text(page), '%Y/%m/%d').date()
+    item.duration = datetime.strptime(duration_selector.text(page), '%H:%M:%S').time()
     item.duration_in_seconds = int(timedelta(hours=item.duration.hour, minutes=item.duration.minute,
                                              seconds=item.duration.second).total_seconds())
-    item.rating = len(query("span.spec-content.rating.meta-rating").text())
+    item.rating = len(rating_selector.text(page))
 
-    series = query("a[onclick*='Series Name']")
-    if series.length > 0:
-        item.series_name = series.text()
-        item.series_url = "{}{}".format(base_url, series.attr("href"))
-        item.series_id = int(series.attr("href").replace("/series/", "").replace("/index.html", ""))
+    series = series_selector.select(page)
+    if len(series) > 0:
+        item.series_name = series_selector.text(page)
+        item.series_url = "{}{}".format(base_url, series[0].get("href"))
+        item.series_id = int(series[0].get("href").replace("/series/", "").replace("/index.html", ""))
 
-    for element in query("span.spec-content > a[itemprop='url']"):
+    for element in tag_selector.select(page):
         tag = CaribbeancomItem.Tag()
         tag.name = element.text
         tag.url = base_url + element.attrib['href']
         tag.slug = element.attrib['href'].replace("/listpages/", "").replace("1.htm", "")
         item.tags.append(tag)
 
-    for element in query("a[itemprop='genre']"):
+    for element in genre_selector.select(page):
         genre = CaribbeancomItem.Genre()
         genre.name = element.text
         genre.url = base_url + element.attrib['href']
         genre.slug = element.attrib['href'].replace("/listpages/", "").replace("1.htm", "")
         item.genres.append(genre)
 
-    for element in query("div.movie-gallery.section a.gallery-image-wrap.fancy-gallery"):
+    for element in sample_image_selector.select(page):
         url = element.attrib['href']  # type: str
         if "member" not in url:
             item.sample_image_urls.append(base_url + element.attrib['href'])
 
-    for element in query("img.gallery-image[itemprop='thumbnail']"):
+    for element in sample_image_thumbnail_selector.select(page):
         item.sample_image_thumbnail_urls.append(base_url + element.attrib['src'])
 
     return item
@@ -3,8 +3,10 @@ from unittest import TestCase
 
 from plex.metadata import Movie
 from service.caribbeancom import updater
+from utility import cassette_helper
 
 
+@cassette_helper.use_cassettes
 class Test(TestCase):
 
     def test_update___not_run_if_not_carib(self):
@@ -2,14 +2,16 @@
 import re
 from datetime import date, datetime, timedelta
 
-import requests
 from pyquery import PyQuery
 from typing import List
 
 from plex.log import Log
+from utility import cache_helper
+from utility import http_helper
 
 base_url = "https://www.caribbeancompr.com"
 resource_base_url = "https://smovie.caribbeancompr.com"
+id_pattern = re.compile(r"Carib(bean|beancom)?PR-(?P<id>\d{6}[-_]\d+)", re.IGNORECASE)
 
 
 def has_valid_id(filename):
@@ -26,26 +28,33 @@ def extract_id(filename):
     :type filename: str
     :rtype: str
     """
-    match = re.match("Carib(bean|beancom)?PR-(\d{6}[-_]\d+)", filename, re.IGNORECASE)  # noqa: W605
+    match = id_pattern.match(filename)
     if match:
-        print match.group(2)
-        return match.group(2)
+        return match.group('id')
     return None
 
 
+def parse_as_page_id(product_id):
+    """
+    :type product_id: str
+    :rtype: str
+    """
+    return product_id.replace('-', '_')
+
+
 # noinspection PyShadowingBuiltins
-def get_item(product_id):
+def get_item(product_id, force=False):
     """
     :type id: str
+    :type force: bool
     :rtype: CaribbeancomPrItem
     """
-    id = product_id.replace('-', '_')
+    id = parse_as_page_id(product_id)
     url = "{}/moviepages/{}/index.html".format(base_url, id)
     Log.Info("Checking URL: {}".format(url))
-    request = requests.get(url)
-    request.encoding = 'euc-jp'
-    # Log.Debug(u"request.text: {}".format(request.text))
-    query = PyQuery(request.text)
+    html = cache_helper.get_or_revalidate('caribbeancom_pr', id, http_helper.get_text_if_modified, (url, 'euc-jp'), force)
+    # Log.Debug(u"html: {}".format(html))
+    query = PyQuery(html)
     item = CaribbeancomPrItem()
     item.id = product_id
     item.url = url
@@ -4,9 +4,11 @@ from unittest import TestCase
 from plex.agent import MetadataSearchResult
 from plex.container import ObjectContainer
 from service.caribbeancom import searcher
+from utility import cassette_helper
 from utility import mixpanel_helper
 
 
+@cassette_helper.use_cassettes
 class Test(TestCase):
 
     def setUp(self):
@@ -2,12 +2,16 @@ import api
 from plex.http import HTTP
 from plex.log import Log
 from plex.proxy import Proxy
+from utility import fingerprint_helper
 from utility import image_helper
 
 
-def update(metadata):
+def update(metadata, force=False, incremental=False):
     """
     :type metadata: Movie
+    :type force: bool
+    :param incremental: only apply what has changed since the last update
+    :type incremental: bool
     """
     if not metadata.id.startswith('caribpr-'):
         return
@@ -21,67 +25,80 @@ def update(metadata):
     part_number = split[1] if len(split) > 1 else None
 
     # query fanza api
-    item = api.get_item(product_id)
+    item = api.get_item(product_id, force)
     part_text = " (Part {})".format(part_number) if part_number is not None else ""
 
-    # fill in information
-    metadata.title = "CARIBPR-{}{}".format(item.id, part_text)
-    metadata.original_title = item.title
-    metadata.year = item.upload_date.year
-    metadata.rating = float(item.rating)
-    metadata.content_rating_age = 18
-    metadata.content_rating = "Adult"
-    metadata.originally_available_at = item.upload_date
-    metadata.summary = u"{}\n\n{}".format(item.title, item.description)
-    metadata.studio = "Caribbeancom"
-    metadata.tagline = item.title
+    # fingerprints of what is applied, a part is skipped on incremental updates if it has not changed
+    fingerprints = fingerprint_helper.Fingerprints(metadata.id, incremental)
 
-    # TODO: More details needed
-    # metadata.countries = {"Japan"}
-    # metadata.writers = {}
-    # metadata.directors = {}
-    # metadata.producers = {}
+    if fingerprints.changed('fields', item, part_number):
+        # fill in information
+        metadata.title = "CARIBPR-{}{}".format(item.id, part_text)
+        metadata.original_title = item.title
+        metadata.year = item.upload_date.year
+        metadata.rating = float(item.rating)
+        metadata.content_rating_age = 18
+        metadata.content_rating = "Adult"
+        metadata.originally_available_at = item.upload_date
+        metadata.summary = u"{}\n\n{}".format(item.title, item.description)
+        metadata.studio = "Caribbeancom"
+        metadata.tagline = item.title
 
-    # set up actress image
-    # metadata.roles.clear()
-    # Log.Info(u"Processing actress data: {}".format(item.actor_name))
-    # role = metadata.roles.new()
-    # role.name = item.actor_name
-    # if utility_image_helper.does_image_exist(item.actor_large_picture_url):
-    #     role.photo = item.actor_large_picture_url
-    # else:
-    #     role.photo = item.actor_small_picture_url
+        # TODO: More details needed
+        # metadata.countries = {"Japan"}
+        # metadata.writers = {}
+        # metadata.directors = {}
+        # metadata.producers = {}
 
-    # setting up genres
-    metadata.genres.clear()
-    for genre in item.genres:
-        Log.Info(u"Adding genre: {}".format(genre.name))
-        metadata.genres.add(genre.name)
-    for tag in item.tags:
-        Log.Info(u"Adding tag as genre: {}".format(tag.name))
-        metadata.genres.add(tag.name)
-    for index, genre in enumerate(metadata.genres):
-        Log.Debug(u"genres[{}]: {}".format(index, genre))
+        # set up actress image
+        # metadata.roles.clear()
+        # Log.Info(u"Processing actress data: {}".format(item.actor_name))
+        # role = metadata.roles.new()
+        # role.name = item.actor_name
+        # if utility_image_helper.does_image_exist(item.actor_large_picture_url):
+        #     role.photo = item.actor_large_picture_url
+        # else:
+        #     role.photo = item.actor_small_picture_url
 
-    # setting up artworks
-    for key in metadata.art.keys():
-        del metadata.art[key]
-    for index, image_url in enumerate(item.sample_image_urls):
-        Log.Debug("artwork_urls[{}]: {}".format(index, image_url))
-        metadata.art[image_url] = Proxy.Media(HTTP.Request(image_url))
+        # setting up genres
+        metadata.genres.clear()
+        for genre in item.genres:
+            Log.Info(u"Adding genre: {}".format(genre.name))
+            metadata.genres.add(genre.name)
+        for tag in item.tags:
+            Log.Info(u"Adding tag as genre: {}".format(tag.name))
+            metadata.genres.add(tag.name)
+        for index, genre in enumerate(metadata.genres):
+            Log.Debug(u"genres[{}]: {}".format(index, genre))
 
-    # setting up posters
-    for key in metadata.posters.keys():
-        del metadata.posters[key]
-    poster_url = None  # type: str
-    if image_helper.does_image_exist(item.poster_url):
-        Log.Debug("Got a decent poster: {}".format(item.poster_url))
-        poster_url = item.poster_url
-    if poster_url is None:
-        Log.Debug("No decent poster available, using banner as poster")
-        Log.Debug("Poster image: {}".format(item.background_url))
-        poster_url = item.background_url
-    poster = image_helper.add_padding_to_image_as_poster(poster_url)
-    poster_data = image_helper.convert_image_to_data(poster)
-    poster_key = "{}@padded".format(poster_url)
-    metadata.posters[poster_key] = Proxy.Media(poster_data)
+    if fingerprints.changed('images', item.poster_url, item.background_url, item.sample_image_urls):
+        # setting up artworks
+        for key in metadata.art.keys():
+            del metadata.art[key]
+        for image_url in item.sample_image_urls:
+            HTTP.PreCache(image_url)  # downloaded in the background while the poster is being resolved
+        for index, image_url in enumerate(item.sample_image_urls):
+            Log.Debug("artwork_urls[{}]: {}".format(index, image_url))
+            metadata.art[image_url] = Proxy.Media(HTTP.Request(image_url))
+
+        # setting up posters, the banner is downloaded at the same time in case there is no poster
+        for key in metadata.posters.keys():
+            del metadata.posters[key]
+        index, poster_data = image_helper.get_first_candidate([
+            (image_helper.get_existing_image_data, (item.poster_url,)),
+            (image_helper.get_data_from_image_url, (item.background_url,)),
+        ])
+        if index == 0:
+            Log.Debug("Got a decent poster: {}".format(item.poster_url))
+            poster_url = item.poster_url
+        elif index == 1:
+            Log.Debug("No decent poster available, using banner as poster")
+            Log.Debug("Poster image: {}".format(item.background_url))
+            poster_url = item.background_url
+        else:
+            raise IOError("Failed to get poster or banner: {}".format(item.background_url))
+        poster_data = image_helper.pad_poster_data(poster_data)
+        poster_key = "{}@padded".format(poster_url)
+        metadata.posters[poster_key] = Proxy.Media(poster_data)
+
+    fingerprints.save()
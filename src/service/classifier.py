@@ -0,0 +1,64 @@
+from plex.log import Log
+from service.caribbeancom import api as caribbeancom_api
+from service.caribbeancom_pr import api as caribbeancom_pr_api
+from service.fanza import api as fanza_api
+from service.heyzo import api as heyzo_api
+from service.ichi_pondo import api as ichi_pondo_api
+from service.knights_visual import api as knights_visual_api
+from service.s_cute import api as s_cute_api
+
+# services having their own product id format, most specific ones first
+id_patterns = [
+    ('caribbeancom_pr', caribbeancom_pr_api.id_pattern),
+    ('caribbeancom', caribbeancom_api.id_pattern),
+    ('ichi_pondo', ichi_pondo_api.id_pattern),
+    ('heyzo', heyzo_api.id_pattern),
+    ('s_cute', s_cute_api.id_pattern),
+    ('knights_visual', knights_visual_api.id_pattern),
+]
+
+# fanza covers most labels, so it is only used when no other service claims the product id
+fallback_id_patterns = [
+    ('fanza', fanza_api.id_pattern),
+]
+
+# services searching the whole keyword instead of the product id parsed from it
+whole_keyword_services = ['fanza']
+
+# services normalising the id before looking it up, other ids are only lowercased
+canonical_id_functions = {
+    'caribbeancom_pr': caribbeancom_pr_api.parse_as_page_id,
+    'fanza': fanza_api.parse_as_dvd_product_id,
+}
+
+
+def classify(keyword):
+    """
+    Returns the services worth querying for the keyword, ranked from the most specific one.
+    :type keyword: str
+    :rtype: list[str]
+    """
+    keyword = keyword.strip()
+    services = [service for service, id_pattern in id_patterns if id_pattern.match(keyword)]
+    if len(services) == 0:
+        services = [service for service, id_pattern in fallback_id_patterns if id_pattern.match(keyword)]
+    Log.Debug("services for keyword '{}': {}".format(keyword, services))
+    return services
+
+
+def get_canonical_id(service, keyword):
+    """
+    Returns what the service looks up for the keyword, keywords with the same canonical id give the same results.
+    :type service: str
+    :type keyword: str
+    :rtype: str
+    """
+    keyword = keyword.strip()
+    for name, id_pattern in id_patterns + fallback_id_patterns:
+        if name == service:
+            match = id_pattern.match(keyword)
+            if match is None:
+                return None
+            canonical_id = (keyword if service in whole_keyword_services else match.group('id')).lower()
+            return canonical_id_functions[service](canonical_id) if service in canonical_id_functions else canonical_id
+    return None
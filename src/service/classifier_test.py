@@ -0,0 +1,30 @@
+from unittest import TestCase
+
+from service import classifier
+
+
+class Test(TestCase):
+
+    def test_classify(self):
+        self.assertEqual(['caribbeancom'], classifier.classify('Carib-123456-123'))
+        self.assertEqual(['caribbeancom_pr'], classifier.classify('CaribPR-123456_123'))
+        self.assertEqual(['ichi_pondo'], classifier.classify('1Pon-123456_123'))
+        self.assertEqual(['heyzo'], classifier.classify('HEYZO-1234'))
+        self.assertEqual(['s_cute'], classifier.classify('s-cute-734_reona_01'))
+        self.assertEqual(['knights_visual'], classifier.classify('KV-094'))
+        self.assertEqual(['fanza'], classifier.classify('SSNI-558'))
+        self.assertEqual(['fanza'], classifier.classify('h_1133honb00165'))
+
+    def test_classify___unknown_keyword(self):
+        self.assertEqual([], classifier.classify('Some Movie'))
+
+    def test_get_canonical_id(self):
+        self.assertEqual('070116-197', classifier.get_canonical_id('caribbeancom', 'Carib-070116-197'))
+        self.assertEqual('070116-197', classifier.get_canonical_id('caribbeancom', 'Caribbeancom-070116-197 '))
+        self.assertEqual('2272', classifier.get_canonical_id('heyzo', 'HEYZO-2272'))
+        self.assertEqual('ssni558', classifier.get_canonical_id('fanza', 'SSNI-558'))
+        self.assertEqual('ssni558', classifier.get_canonical_id('fanza', 'ssni558'))
+        self.assertEqual('ssni558 uncut', classifier.get_canonical_id('fanza', 'SSNI-558 Uncut'))
+        self.assertEqual('091616_007', classifier.get_canonical_id('caribbeancom_pr', 'CaribPR-091616-007'))
+        self.assertEqual('091616_007', classifier.get_canonical_id('caribbeancom_pr', 'CaribbeancomPR-091616_007'))
+        self.assertEqual(None, classifier.get_canonical_id('heyzo', 'SSNI-558'))
@@ -1,15 +1,20 @@
-from urllib2 import HTTPError
+import re
 
-import requests
 from munch import munchify
 from pyquery import PyQuery
-from requests import get
+from requests import HTTPError
 from typing import List
 
+import helper
 from plex.log import Log
+from utility import cache_helper
+from utility import concurrent_helper
+from utility import http_helper
 
 api_id = "Ngdp9rsHvCZ9EWrv1LNU"
 affiliate_id = "chokomomo-990"
+id_pattern = re.compile(r"(?P<id>(h_\d+)?\d*[a-z]+-?\d+)", re.IGNORECASE)
+actress_timeout_in_seconds = 60
 
 
 def parse_as_dvd_product_id(product_id):
@@ -28,40 +33,7 @@ def parse_as_digital_product_id(product_id):
     :type product_id: str
     :rtype: str
     """
-    product_id = product_id.lower()
-    product_id = product_id.strip()
-    product_id = product_id.replace("-", "00")
-    product_id = replace_prefix(product_id, "dsvr", "13dsvr")
-    product_id = replace_prefix(product_id, "3dsvr", "13dsvr")
-    product_id = replace_prefix(product_id, "313dsvr", "13dsvr")
-    product_id = replace_prefix(product_id, "avopvr", "h_1158avopvr")
-    product_id = replace_prefix(product_id, "kmvr", "84kmvr")
-    product_id = replace_prefix(product_id, "bi84kmvr", "h_1285bikmvr")
-    product_id = replace_prefix(product_id, "bzvr", "84bzvr")
-    product_id = replace_prefix(product_id, "crvr", "h_1155crvr")
-    product_id = replace_prefix(product_id, "exvr", "84exvr")
-    product_id = replace_prefix(product_id, "vvvr", "84vvvr")
-    product_id = replace_prefix(product_id, "dtvr", "24dtvr")
-    product_id = replace_prefix(product_id, "scvr", "h_565scvr")
-    product_id = replace_prefix(product_id, "wpvr", "2wpvr")
-    product_id = replace_prefix(product_id, "mxvr", "h_1282mxvr")
-    product_id = replace_prefix(product_id, "tmavr", "55tmavr")
-    product_id = replace_prefix(product_id, "vovs", "h_1127vovs")
-    product_id = replace_prefix(product_id, "cafr", "h_1116cafr")
-    product_id = replace_prefix(product_id, "tpvr", "h_1256tpvr")
-    return product_id
-
-
-def replace_prefix(text, prefix, new_prefix):
-    """
-    :type text: str
-    :type prefix: str
-    :type new_prefix: str
-    :rtype: str
-    """
-    if text.startswith(prefix):
-        return text.replace(prefix, new_prefix, 1)
-    return text
+    return helper.convert_product_id_to_digital(product_id)
 
 
 def search_dvd_product(product_id):
@@ -70,7 +42,7 @@ def search_dvd_product(product_id):
     :rtype: ItemResponseBody
     """
     keyword = parse_as_dvd_product_id(product_id)
-    result = munchify(get("https://api.dmm.com/affiliate/v3/ItemList", params={
+    result = munchify(http_helper.get_json("https://api.dmm.com/affiliate/v3/ItemList", params={
         "api_id": api_id,
         "affiliate_id": affiliate_id,
         "site": "FANZA",
@@ -80,7 +52,7 @@ def search_dvd_product(product_id):
         "sort": "date",
         "keyword": keyword,
         "output": "json"
-    }).json())  # type: ItemResponseBody
+    }))  # type: ItemResponseBody
     result.result.items = result.result['items']
     return result
 
@@ -91,7 +63,7 @@ def search_digital_product(product_id):
     :rtype: ItemResponseBody
     """
     keyword = parse_as_digital_product_id(product_id)
-    result = munchify(get("https://api.dmm.com/affiliate/v3/ItemList", params={
+    result = munchify(http_helper.get_json("https://api.dmm.com/affiliate/v3/ItemList", params={
         "api_id": api_id,
         "affiliate_id": affiliate_id,
         "site": "FANZA",
@@ -101,78 +73,134 @@ def search_digital_product(product_id):
         "sort": "date",
         "keyword": keyword,
         "output": "json"
-    }).json())  # type: ItemResponseBody
+    }))  # type: ItemResponseBody
     result.result.items = result.result['items']
     return result
 
 
-def get_dvd_product(product_id):
+def get_dvd_product(product_id, force=False):
     """
     :type product_id: str
+    :type force: bool
     :rtype: ItemResponseBody
     """
-    content_id = parse_as_dvd_product_id(product_id)
-    result = munchify(get("https://api.dmm.com/affiliate/v3/ItemList", params={
-        "api_id": api_id,
-        "affiliate_id": affiliate_id,
-        "site": "FANZA",
-        "service": "mono",
-        "floor": "dvd",
-        "hits": "10",
-        "sort": "date",
-        "cid": content_id,
-        "output": "json"
-    }).json())  # type: ItemResponseBody
-    result.result.items = result.result['items']
-    return result
+    return get_product('dvd', parse_as_dvd_product_id(product_id), force)
 
 
-def get_digital_product(product_id):
+def get_digital_product(product_id, force=False):
     """
     :type product_id: str
+    :type force: bool
+    :rtype: ItemResponseBody
+    """
+    return get_product('digital', parse_as_digital_product_id(product_id), force)
+
+
+def get_product(type, content_id, force=False):
+    """
+    :type type: str
+    :type content_id: str
+    :type force: bool
     :rtype: ItemResponseBody
     """
-    content_id = parse_as_digital_product_id(product_id)
-    result = munchify(get("https://api.dmm.com/affiliate/v3/ItemList", params={
+    result = munchify(get_item_list(type, content_id, force))  # type: ItemResponseBody
+    result.result.items = result.result['items']
+    return result
+
+
+def get_item_list(type, content_id, force=False):
+    """
+    :type type: str
+    :type content_id: str
+    :type force: bool
+    :rtype: dict
+    """
+    params = {
         "api_id": api_id,
         "affiliate_id": affiliate_id,
         "site": "FANZA",
-        "service": "digital",
-        "floor": "videoa",
+        "service": "mono" if type == 'dvd' else "digital",
+        "floor": "dvd" if type == 'dvd' else "videoa",
         "hits": "10",
         "sort": "date",
         "cid": content_id,
         "output": "json"
-    }).json())  # type: ItemResponseBody
-    result.result.items = result.result['items']
-    return result
+    }
+    return cache_helper.get_or_fetch('fanza', "{}-{}".format(type, content_id), fetch_item_list, (params,), force, has_items)
+
+
+def has_items(body):
+    """
+    Empty item lists are not cached, a product missing for a moment would be hidden for the whole time to live.
+    :type body: dict
+    :rtype: bool
+    """
+    return len(body['result'].get('items', [])) > 0
+
+
+def fetch_item_list(params):
+    """
+    :type params: dict
+    :rtype: dict
+    """
+    return http_helper.get_json("https://api.dmm.com/affiliate/v3/ItemList", params=params)
 
 
-def get_product_description(url):
+def get_product_description(url, force=False):
     """
     :type url: str
+    :type force: bool
     :rtype: str
     """
     try:
-        cookies = {"age_check.done": "1", "cklg": "ja"}  # cklg=en for english
-        request = requests.get(url, cookies=cookies)
-        return PyQuery(request.text)(".mg-b20.lh4").text().rstrip()
+        html = cache_helper.get_or_revalidate('fanza', url, get_product_page, (url,), force)
+        return PyQuery(html)(".mg-b20.lh4").text().rstrip()
     except HTTPError as error:
-        Log.Debug(error.msg)
+        Log.Debug(str(error))
         return None
 
 
-def get_actress(actress_id):
+def get_product_page(validators, url):
+    """
+    :type validators: dict[str, str]
+    :type url: str
+    :rtype: (unicode, dict[str, str])
+    """
+    cookies = {"age_check.done": "1", "cklg": "ja"}  # cklg=en for english
+    return http_helper.get_text_if_modified(validators, url, cookies=cookies)
+
+
+def get_actress(actress_id, force=False):
     """
     :type actress_id: int
+    :type force: bool
     :rtype: ActressResponseBody
     """
-    return munchify(get("https://api.dmm.com/affiliate/v3/ActressSearch", params={
+    return munchify(cache_helper.get_or_fetch('fanza_actresses', str(actress_id), fetch_actress, (actress_id,), force))
+
+
+def fetch_actress(actress_id):
+    """
+    :type actress_id: int
+    :rtype: dict
+    """
+    return http_helper.get_json("https://api.dmm.com/affiliate/v3/ActressSearch", params={
         "api_id": api_id,
         "affiliate_id": affiliate_id,
         "actress_id": actress_id,
         "output": "json"
-    }).json())
+    })
+
+
+def get_actresses(actress_ids, force=False):
+    """
+    Gets the actresses concurrently, failed or timed out ones give None.
+    :type actress_ids: list[int]
+    :type force: bool
+    :rtype: list[ActressResponseBody]
+    """
+    calls = [(get_actress, (actress_id, force)) for actress_id in actress_ids]
+    return concurrent_helper.run_all(calls, actress_timeout_in_seconds, pool='fanza')
 
 
 class ActressResponseBody(object):
@@ -1,13 +1,19 @@
 # coding=utf-8
 import json
+import os
+import shutil
+import tempfile
 from unittest import TestCase
 
+import mock
 from munch import munchify
 
 from plex.log import Log
 from service.fanza import api
+from utility import cassette_helper
 
 
+@cassette_helper.use_cassettes
 class Test(TestCase):
 
     def test_parse_as_dvd_product_id(self):
@@ -139,6 +145,23 @@ class Test(TestCase):
         description = api.get_product_description(url)
         self.assertEqual("", description)
 
+    def test_get_actresses___fetches_each_actress_once(self):
+        directory = tempfile.mkdtemp()
+        bodies = {1: {u"result": {u"result_count": 1, u"actress": [{u"id": u"1", u"name": u"a"}]}},
+                  2: {u"result": {u"result_count": 0}}}
+        get_json = mock.Mock(side_effect=lambda url, params: bodies[params['actress_id']])
+        try:
+            with mock.patch.object(api.cache_helper, 'database_path', os.path.join(directory, 'cache.db')), \
+                    mock.patch.object(api.http_helper, 'get_json', get_json):
+                api.cache_helper.close()
+                self.assertEqual([u"a", 0], [body.result.actress[0].name if body.result.result_count > 0 else 0
+                                             for body in api.get_actresses([1, 2])])
+                self.assertEqual(u"a", api.get_actresses([1])[0].result.actress[0].name)
+                api.cache_helper.close()
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(2, get_json.call_count)
+
     def test_get_actress(self):
         actress_id = 1031805
         body = api.get_actress(actress_id)
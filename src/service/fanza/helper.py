@@ -1,5 +1,98 @@
 import re
 
+# labels whose digital content id has a different prefix than the dvd product id, the first dvd prefix is the canonical one
+label_prefixes = [
+    (["dsvr", "3dsvr", "313dsvr"], "13dsvr"),
+    (["avopvr"], "h_1158avopvr"),
+    (["kmvr"], "84kmvr"),
+    (["bi84kmvr", "bikmvr"], "h_1285bikmvr"),
+    (["bzvr"], "84bzvr"),
+    (["crvr"], "h_1155crvr"),
+    (["exvr"], "84exvr"),
+    (["vvvr"], "84vvvr"),
+    (["dtvr"], "24dtvr"),
+    (["scvr"], "h_565scvr"),
+    (["wpvr"], "2wpvr"),
+    (["mxvr"], "h_1282mxvr"),
+    (["tmavr"], "55tmavr"),
+    (["vovs"], "h_1127vovs"),
+    (["cafr"], "h_1116cafr"),
+    (["tpvr"], "h_1256tpvr"),
+]
+
+
+class PrefixTrie(object):
+    """
+    Finds the longest known prefix of a text by walking it once, character by character.
+    """
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, prefix, value):
+        """
+        :type prefix: str
+        :type value: str
+        """
+        node = self.root
+        for character in prefix:
+            node = node.setdefault(character, {})
+        node[None] = value
+
+    def match(self, text):
+        """
+        Returns the longest prefix of the text which has been added and its value, or (None, None).
+        :type text: str
+        :rtype: (str, str)
+        """
+        node = self.root
+        prefix, value = None, None
+        for index, character in enumerate(text):
+            node = node.get(character)
+            if node is None:
+                break
+            if None in node:
+                prefix, value = text[:index + 1], node[None]
+        return prefix, value
+
+
+dvd_to_digital_prefixes = PrefixTrie()
+digital_to_dvd_prefixes = PrefixTrie()
+for dvd_prefixes, digital_prefix in label_prefixes:
+    for dvd_prefix in dvd_prefixes:
+        dvd_to_digital_prefixes.add(dvd_prefix, digital_prefix)
+    digital_to_dvd_prefixes.add(digital_prefix, dvd_prefixes[0])
+
+
+def replace_prefix(product_id, prefixes):
+    """
+    :type product_id: str
+    :type prefixes: PrefixTrie
+    :rtype: str
+    """
+    prefix, new_prefix = prefixes.match(product_id)
+    if prefix is None:
+        return product_id
+    return new_prefix + product_id[len(prefix):]
+
+
+def convert_product_id_to_digital(product_id):
+    """
+    Converts a dvd product id like "SSNI-558" or "KMVR-579" into a digital content id like "ssni00558" or "84kmvr00579".
+    :type product_id: str
+    :rtype: str
+    """
+    return replace_prefix(product_id.lower().strip().replace("-", "00"), dvd_to_digital_prefixes)
+
+
+def convert_product_id_to_dvd(product_id):
+    """
+    Converts a digital content id like "ssni00558" or "84kmvr00579" into a dvd product id like "ssni558" or "kmvr579".
+    :type product_id: str
+    :rtype: str
+    """
+    return replace_prefix(product_id.lower().strip().replace("00", "", 1), digital_to_dvd_prefixes)
+
 
 def convert_product_id_to_bongo(product_id):
     """
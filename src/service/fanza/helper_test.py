@@ -19,3 +19,42 @@ class Test(TestCase):
         self.assertEqual('SHIC-179', helper.convert_product_id_to_bongo("H_839SHIC179"))
         self.assertEqual('ZEX-387', helper.convert_product_id_to_bongo("H_720ZEX387"))
         self.assertEqual('SQTE-200', helper.convert_product_id_to_bongo("SQTE00200"))
+
+    # dvd product id, digital content id, dvd product id converted back, bongo
+    product_ids = [
+        ("SSNI-558", "ssni00558", "ssni558", "SSNI-558"),
+        ("DSVR-796", "13dsvr00796", "dsvr796", "DSVR-796"),
+        ("3DSVR-796", "13dsvr00796", "dsvr796", "DSVR-796"),
+        ("313DSVR-796", "13dsvr00796", "dsvr796", "DSVR-796"),
+        ("AVOPVR-123", "h_1158avopvr00123", "avopvr123", "AVOPVR-123"),
+        ("KMVR-579", "84kmvr00579", "kmvr579", "KMVR-579"),
+        ("BIKMVR-001", "h_1285bikmvr00001", "bi84kmvr001", "BIKMVR-001"),
+        ("BZVR-001", "84bzvr00001", "bzvr001", "BZVR-001"),
+        ("CRVR-001", "h_1155crvr00001", "crvr001", "CRVR-001"),
+        ("EXVR-001", "84exvr00001", "exvr001", "EXVR-001"),
+        ("VVVR-001", "84vvvr00001", "vvvr001", "VVVR-001"),
+        ("DTVR-001", "24dtvr00001", "dtvr001", "DTVR-001"),
+        ("SCVR-001", "h_565scvr00001", "scvr001", "SCVR-001"),
+        ("WPVR-001", "2wpvr00001", "wpvr001", "WPVR-001"),
+        ("MXVR-001", "h_1282mxvr00001", "mxvr001", "MXVR-001"),
+        ("TMAVR-001", "55tmavr00001", "tmavr001", "TMAVR-001"),
+        ("VOVS-001", "h_1127vovs00001", "vovs001", "VOVS-001"),
+        ("CAFR-001", "h_1116cafr00001", "cafr001", "CAFR-001"),
+        ("TPVR-144", "h_1256tpvr00144", "tpvr144", "TPVR-144"),
+    ]
+
+    def test_convert_product_id___round_trip(self):
+        for dvd_product_id, digital_product_id, converted_dvd_product_id, bongo in self.product_ids:
+            self.assertEqual(digital_product_id, helper.convert_product_id_to_digital(dvd_product_id), dvd_product_id)
+            self.assertEqual(converted_dvd_product_id, helper.convert_product_id_to_dvd(digital_product_id), dvd_product_id)
+            self.assertEqual(digital_product_id, helper.convert_product_id_to_digital(bongo), dvd_product_id)
+            self.assertEqual(bongo, helper.convert_product_id_to_bongo(digital_product_id), dvd_product_id)
+            self.assertEqual(bongo, helper.convert_product_id_to_bongo(dvd_product_id.replace("-", "00")), dvd_product_id)
+
+    def test_prefix_trie___longest_prefix(self):
+        prefixes = helper.PrefixTrie()
+        prefixes.add("ab", "1")
+        prefixes.add("abcd", "2")
+        self.assertEqual(("abcd", "2"), prefixes.match("abcde"))
+        self.assertEqual(("ab", "1"), prefixes.match("abc"))
+        self.assertEqual((None, None), prefixes.match("a"))
@@ -6,12 +6,16 @@ from plex.http import HTTP
 from plex.log import Log
 from plex.proxy import Proxy
 from service.idea_pocket import api as idea_pocket_api
+from utility import fingerprint_helper
 from utility import image_helper
 
 
-def update(metadata):  # noqa: C901
+def update(metadata, force=False, incremental=False):  # noqa: C901
     """
     :type metadata: Movie
+    :type force: bool
+    :param incremental: only apply what has changed since the last update
+    :type incremental: bool
     """
     if not metadata.id.startswith('fanza-'):
         return
@@ -25,7 +29,7 @@ def update(metadata):  # noqa: C901
     part_number = split[1] if len(split) > 1 else None
 
     # query fanza api
-    body = api.get_dvd_product(product_id) if type == 'dvd' else api.get_digital_product(product_id)
+    body = api.get_dvd_product(product_id, force) if type == 'dvd' else api.get_digital_product(product_id, force)
     Log.Debug("body.result.status: {}".format(body.result.status))
     Log.Debug("body.result.total_count: {}".format(body.result.total_count))
     Log.Info("Found number of items: {}".format(body.result.total_count))
@@ -33,7 +37,7 @@ def update(metadata):  # noqa: C901
     # feed in information
     item = body.result.items[0]  # type: api.Item
     title = helper.convert_product_id_to_bongo(item.product_id)
-    summary = api.get_product_description(item.URL)
+    summary = api.get_product_description(item.URL, force)
     date = datetime.datetime.strptime(item.date, '%Y-%m-%d %H:%M:%S')
     part_text = " (Part {})".format(part_number) if part_number is not None else ""
     studio = item.iteminfo.maker[0]  # type: api.Item.ItemInfo.Info
@@ -41,124 +45,164 @@ def update(metadata):  # noqa: C901
     Log.Debug("studio.id: {}".format(studio.id))
     Log.Debug(u"studio.name: {}".format(studio.name))
 
-    # fill in information
-    metadata.title = "{}{}".format(title, part_text)
-    metadata.original_title = item.title
-    metadata.year = date.year
-    metadata.rating = float(item.review.average) if 'review' in item else 0.0
-    metadata.content_rating_age = 18
-    metadata.content_rating = "Adult"
-    metadata.originally_available_at = date
-    metadata.summary = u"{}\n\n{}".format(item.title, summary)
-    metadata.studio = studio.name
-    metadata.tagline = item.title
-
-    # TODO: More details needed
-    # metadata.countries = {"Japan"}
-    # metadata.writers = {}
-    # metadata.directors = {}
-    # metadata.producers = {}
-
-    # setting up genres
-    metadata.genres.clear()
-    for genre in item.iteminfo.genre:
-        Log.Info(u"Adding genre: {}".format(genre.name))
-        metadata.genres.add(genre.name)
-    if 'label' in item.iteminfo:
-        for tag in item.iteminfo.label:
-            Log.Info(u"Adding tag as genre: {}".format(tag.name))
-            metadata.genres.add(tag.name)
-    for index, genre in enumerate(metadata.genres):
-        Log.Debug(u"genres[{}]: {}".format(index, genre))
-
-    # set up actress image
-    metadata.roles.clear()
-    if 'actress' in item.iteminfo:
-        for actress in item.iteminfo.actress:  # type: api.Item.ItemInfo.Info
-            role = metadata.roles.new()
-            role.name = actress.name
-            Log.Info(u"Processing actress data: {}".format(actress.name))
-            actress_body = api.get_actress(actress.id)
-            if actress_body.result.result_count > 0:
-                actress_info = actress_body.result.actress[0]
-                if 'imageURL' in actress_info:
-                    Log.Info(u"Setting image from actress: {}".format(actress_info.imageURL.large))
-                    role.photo = actress_info.imageURL.large
+    # fingerprints of what is applied, a part is skipped on incremental updates if it has not changed
+    fingerprints = fingerprint_helper.Fingerprints(metadata.id, incremental)
+
+    if fingerprints.changed('fields', item, summary, part_number):
+        # fill in information
+        metadata.title = "{}{}".format(title, part_text)
+        metadata.original_title = item.title
+        metadata.year = date.year
+        metadata.rating = float(item.review.average) if 'review' in item else 0.0
+        metadata.content_rating_age = 18
+        metadata.content_rating = "Adult"
+        metadata.originally_available_at = date
+        metadata.summary = u"{}\n\n{}".format(item.title, summary)
+        metadata.studio = studio.name
+        metadata.tagline = item.title
+
+        # TODO: More details needed
+        # metadata.countries = {"Japan"}
+        # metadata.writers = {}
+        # metadata.directors = {}
+        # metadata.producers = {}
+
+        # setting up genres
+        metadata.genres.clear()
+        for genre in item.iteminfo.genre:
+            Log.Info(u"Adding genre: {}".format(genre.name))
+            metadata.genres.add(genre.name)
+        if 'label' in item.iteminfo:
+            for tag in item.iteminfo.label:
+                Log.Info(u"Adding tag as genre: {}".format(tag.name))
+                metadata.genres.add(tag.name)
+        for index, genre in enumerate(metadata.genres):
+            Log.Debug(u"genres[{}]: {}".format(index, genre))
+
+        # set up actress image
+        metadata.roles.clear()
+        if 'actress' in item.iteminfo:
+            actress_bodies = api.get_actresses([actress.id for actress in item.iteminfo.actress], force)
+            for actress, actress_body in zip(item.iteminfo.actress, actress_bodies):
+                role = metadata.roles.new()
+                role.name = actress.name
+                Log.Info(u"Processing actress data: {}".format(actress.name))
+                if actress_body is None:
+                    Log.Warn(u"Failed to get actress data: {}".format(actress.name))
+                elif actress_body.result.result_count > 0:
+                    actress_info = actress_body.result.actress[0]
+                    if 'imageURL' in actress_info:
+                        Log.Info(u"Setting image from actress: {}".format(actress_info.imageURL.large))
+                        role.photo = actress_info.imageURL.large
+                    else:
+                        Log.Info(u"Image for actress not available")
+
+    if fingerprints.changed('images', item.imageURL, item.get('sampleImageURL'), image_helper.is_image_analysis_available()):
+        # clean up posters
+        for key in metadata.posters.keys():
+            del metadata.posters[key]
+
+        # artworks are downloaded in the background while the poster is being resolved
+        max_artwork_count = 2  # TODO: make this configurable in preference
+        if 'sampleImageURL' in item:
+            for image_url in item.sampleImageURL.sample_s.image[:max_artwork_count]:
+                HTTP.PreCache(image_url.replace("-", "jp-"))
+
+        # fetch every poster candidate at once, ordered from the highest resolution, the first available one is used
+        image_context = image_helper.ImageContext()
+        candidates = []
+        if image_helper.is_image_analysis_available() and 'sampleImageURL' in item:
+            image_urls = item.sampleImageURL.sample_s.image
+            for image_url in image_urls[:min(len(image_urls), 3)]:  # only check the first 3 items
+                candidates.append((get_sample_image_poster, (image_url.replace("-", "jp-"), item.imageURL.small, image_context)))
+        if studio.id == idea_pocket_api.maker_id:
+            ip_id = idea_pocket_api.convert_product_id_from_digital_to_dvd(product_id) if type == 'digital' \
+                else product_id
+            candidates.append((get_idea_pocket_poster, (ip_id,)))
+        candidates.append((get_cropped_poster, (item.imageURL.large, item.imageURL.small, image_context)))
+        candidates.append((get_small_poster, (item.imageURL.small, image_context)))
+        _, poster = image_helper.get_first_candidate(candidates)
+        if poster is None:
+            raise IOError("Failed to get any poster: {}".format(item.imageURL.small))
+        poster_key, poster_data = poster
+
+        # set the image as poster
+        new_poster_data = image_helper.pad_poster_data(poster_data)
+        new_poster_key = "{}@padded".format(poster_key)
+        metadata.posters[new_poster_key] = Proxy.Media(new_poster_data)
+
+        # setting up artworks
+        Log.Debug("max_artwork_count: {}".format(max_artwork_count))
+        for key in metadata.art.keys():
+            del metadata.art[key]
+        if 'sampleImageURL' in item:
+            for index, image_url in enumerate(item.sampleImageURL.sample_s.image):
+                if index < max_artwork_count:
+                    image_url = image_url.replace("-", "jp-")
+                    Log.Debug("artwork_urls[{}]: {}".format(index, image_url))
+                    metadata.art[image_url] = Proxy.Media(HTTP.Request(image_url))
                 else:
-                    Log.Info(u"Image for actress not available")
-
-    # clean up posters
-    for key in metadata.posters.keys():
-        del metadata.posters[key]
-
-    # setup variables
-    poster_key = None
-    poster_data = None
-
-    # check posters from sample images, should have the highest resolution
-    if image_helper.can_analyze_images and 'sampleImageURL' in item:
-        image_urls = item.sampleImageURL.sample_s.image
-        for image_url in image_urls[:min(len(image_urls), 3)]:  # only check the first 3 items
-            image_url = image_url.replace("-", "jp-")
-            Log.Info("Checking sample image: {}".format(image_url))
-            if image_helper.are_similar(image_url, item.imageURL.small):
-                Log.Info("Found a better poster from sample images: {}".format(image_url))
-                poster_key = image_url
-                poster_data = image_helper.get_data_from_image_url(image_url)
-                break
-    if poster_key is None:
-        Log.Info("Within sample images it does not seem to have a poster")
-
-    # check pocket idea posters, should have the high resolution
-    if poster_key is None and studio.id == idea_pocket_api.maker_id:
-        Log.Info("Checking if there is a poster from Idea Pocket website")
-        ip_id = idea_pocket_api.convert_product_id_from_digital_to_dvd(product_id) if type == 'digital' \
-            else product_id
-        poster_url = idea_pocket_api.get_product_image(ip_id)
-        if poster_url is not None:
-            Log.Info("Using poster URL from Idea Pocket website: {}".format(poster_url))
-            poster_key = poster_url
-            poster_data = image_helper.get_data_from_image_url(poster_url)
-        else:
-            Log.Info("Idea Pocket website does not seem to have a poster for product id: {}".format(ip_id))
-
-    # try to crop poster out from cover, should have the medium resolution
-    if poster_key is None:
-        Log.Info("Checking if a poster can be cropped out from cover image")
-        cover_url = item.imageURL.large
-        small_poster_url = item.imageURL.small
-        poster_data = image_helper.crop_poster_data_from_cover_if_similar_to_small_poster(cover_url, small_poster_url)
-        if poster_data is not None:
-            poster_key = "{}@cropped".format(cover_url)
-            Log.Info("Using cropped poster from cover url: {}".format(cover_url))
-            Log.Info("New poster key: {}".format(poster_key))
-        else:
-            Log.Info("Cover image does not seem to have a poster")
-
-    # use small poster if no options, even it is low resolution
-    if poster_key is None:
-        Log.Info("No higher resolution poster can be used, using the lowest one")
-        poster_url = item.imageURL.small
-        Log.Debug("Small poster URL: {}".format(poster_url))
-        poster_key = poster_url
-        poster_data = image_helper.get_data_from_image_url(poster_url)
-
-    # set the image as poster
-    new_poster = image_helper.add_padding_to_image_data_as_poster(poster_data)
-    new_poster_data = image_helper.convert_image_to_data(new_poster)
-    new_poster_key = "{}@padded".format(poster_key)
-    metadata.posters[new_poster_key] = Proxy.Media(new_poster_data)
-
-    # setting up artworks
-    max_artwork_count = 2  # TODO: make this configurable in preference
-    Log.Debug("max_artwork_count: {}".format(max_artwork_count))
-    for key in metadata.art.keys():
-        del metadata.art[key]
-    if 'sampleImageURL' in item:
-        for index, image_url in enumerate(item.sampleImageURL.sample_s.image):
-            if index < max_artwork_count:
-                image_url = image_url.replace("-", "jp-")
-                Log.Debug("artwork_urls[{}]: {}".format(index, image_url))
-                metadata.art[image_url] = Proxy.Media(HTTP.Request(image_url))
-            else:
-                Log.Debug("artwork_urls (skipped): {}".format(image_url))
+                    Log.Debug("artwork_urls (skipped): {}".format(image_url))
+
+    fingerprints.save()
+
+
+def get_sample_image_poster(image_url, small_poster_url, image_context):
+    """
+    Sample images have the highest resolution, but only some of them are posters.
+    :type image_url: str
+    :type small_poster_url: str
+    :type image_context: image_helper.ImageContext
+    :rtype: (str, str)
+    """
+    Log.Info("Checking sample image: {}".format(image_url))
+    if image_helper.are_similar(image_url, small_poster_url, image_context):
+        Log.Info("Found a better poster from sample images: {}".format(image_url))
+        return image_url, image_helper.get_data_from_image_url(image_url, image_context)
+    Log.Info("Sample image does not seem to be a poster: {}".format(image_url))
+    return None
+
+
+def get_idea_pocket_poster(ip_id):
+    """
+    Idea Pocket website has posters with a high resolution.
+    :type ip_id: str
+    :rtype: (str, str)
+    """
+    Log.Info("Checking if there is a poster from Idea Pocket website")
+    poster_url = idea_pocket_api.get_product_image(ip_id)
+    if poster_url is None:
+        Log.Info("Idea Pocket website does not seem to have a poster for product id: {}".format(ip_id))
+        return None
+    Log.Info("Using poster URL from Idea Pocket website: {}".format(poster_url))
+    return poster_url, image_helper.get_data_from_image_url(poster_url)
+
+
+def get_cropped_poster(cover_url, small_poster_url, image_context):
+    """
+    Covers have the medium resolution, the poster is cropped out from the right side.
+    :type cover_url: str
+    :type small_poster_url: str
+    :type image_context: image_helper.ImageContext
+    :rtype: (str, str)
+    """
+    Log.Info("Checking if a poster can be cropped out from cover image")
+    poster_data = image_helper.crop_poster_data_from_cover_if_similar_to_small_poster(cover_url, small_poster_url, image_context)
+    if poster_data is None:
+        Log.Info("Cover image does not seem to have a poster")
+        return None
+    poster_key = "{}@cropped".format(cover_url)
+    Log.Info("Using cropped poster from cover url: {}".format(cover_url))
+    Log.Info("New poster key: {}".format(poster_key))
+    return poster_key, poster_data
+
+
+def get_small_poster(poster_url, image_context):
+    """
+    The small poster is always available, even it is low resolution.
+    :type poster_url: str
+    :type image_context: image_helper.ImageContext
+    :rtype: (str, str)
+    """
+    Log.Debug("Small poster URL: {}".format(poster_url))
+    return poster_url, image_helper.get_data_from_image_url(poster_url, image_context)
@@ -2,10 +2,14 @@
 import re
 from datetime import datetime
 
-from pyquery import PyQuery
 from typing import List
 
+from utility import cache_helper
+from utility import http_helper
+from utility import scrape_helper
+
 base_url = "https://www.heyzo.com"
+id_pattern = re.compile(r"Heyzo-(?P<id>\d{4})", re.IGNORECASE)
 
 
 # noinspection SpellCheckingInspection
@@ -14,40 +18,63 @@ def extract_id(filename):
     :type filename: str
     :rtype: str
     """
-    match = re.match("Heyzo-(\d{4})", filename, re.IGNORECASE)  # noqa: W605
+    match = id_pattern.match(filename)
     if match:
-        return match.group(1)
+        return match.group('id')
     return None
 
 
-def get_by_id(id):
+def get_by_id(id, force=False):
     """
     :type id: str
+    :type force: bool
     :rtype: HeyzoItem
     """
     url = "{}/moviepages/{}/index.html".format(base_url, id)
-    query = PyQuery(url)
+    content, encoding = cache_helper.get_or_revalidate('heyzo', id, http_helper.get_page_if_modified, (url,), force)
+    return parse_item(id, url, content, encoding)
+
+
+title_selector = scrape_helper.Selector('#movie h1')
+description_selector = scrape_helper.Selector('p.memo')
+actress_name_selector = scrape_helper.Selector('.table-actor span')
+actress_url_selector = scrape_helper.Selector('.table-actor a')
+release_date_selector = scrape_helper.Selector('.table-release-day td')
+rating_selector = scrape_helper.Selector("span[itemprop='ratingValue']")
+category_selector = scrape_helper.Selector(".table-actor-type a")
+tag_selector = scrape_helper.Selector(".table-tag-keyword-small .tag-keyword-list a")
+
+
+def parse_item(id, url, content, encoding=None):
+    """
+    :type id: str
+    :type url: str
+    :type content: str
+    :type encoding: Optional[str]
+    :rtype: HeyzoItem
+    """
+    page = scrape_helper.parse(content, encoding)
     item = HeyzoItem()
     item.id = id
     item.url = url
-    item.title = query('#movie h1').text().split('-')[0].strip()
-    item.description = query('p.memo').text().strip()
-    item.actress_name = query('.table-actor span').text()
-    item.actress_url = base_url + query('.table-actor a').attr('href')
+    item.title = title_selector.text(page).split('-')[0].strip()
+    item.description = description_selector.text(page).strip()
+    item.actress_name = actress_name_selector.text(page)
+    item.actress_url = base_url + actress_url_selector.attr(page, 'href')
     item.actress_id = int(item.actress_url.split('_')[1])
     item.actress_picture_url = "{}/actorprofile/3000/{}/profile.jpg".format(base_url, str(item.actress_id).zfill(4))
-    item.release_date = datetime.strptime(query('.table-release-day td')[1].text.strip(), '%Y-%m-%d').date()
-    item.rating = float(query("span[itemprop='ratingValue']").text())
+    item.release_date = datetime.strptime(release_date_selector.select(page)[1].text.strip(), '%Y-%m-%d').date()
+    item.rating = float(rating_selector.text(page))
     item.cover_url = "{}/contents/3000/{}/images/player_thumbnail.jpg".format(base_url, id)
 
-    for element in query(".table-actor-type a"):
+    for element in category_selector.select(page):
         category = HeyzoItem.Category()
         category.name = element.text
         category.url = base_url + element.attrib['href']
         category.id = int(category.url.split('_')[1])
         item.categories.append(category)
 
-    for element in query(".table-tag-keyword-small .tag-keyword-list a"):
+    for element in tag_selector.select(page):
         tag = HeyzoItem.Tag()
         tag.name = element.text
         tag.url = base_url + element.attrib['href']
@@ -3,8 +3,10 @@ import datetime
 from unittest import TestCase
 
 from service.heyzo import api
+from utility import cassette_helper
 
 
+@cassette_helper.use_cassettes
 class Test(TestCase):
 
     def test_get_by_id_2272(self):
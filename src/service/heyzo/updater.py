@@ -1,12 +1,16 @@
 import api
 from plex.log import Log
 from plex.proxy import Proxy
+from utility import fingerprint_helper
 from utility import image_helper
 
 
-def update(metadata):
+def update(metadata, force=False, incremental=False):
     """
     :type metadata: Movie
+    :type force: bool
+    :param incremental: only apply what has changed since the last update
+    :type incremental: bool
     """
     if not metadata.id.startswith('heyzo-'):
         return
@@ -20,51 +24,59 @@ def update(metadata):
     part_number = split[1] if len(split) > 1 else None
 
     # query heyzo api
-    item = api.get_by_id(product_id)
+    item = api.get_by_id(product_id, force)
     part_text = " (Part {})".format(part_number) if part_number is not None else ""
 
-    # fill in information
-    metadata.title = "HEYZO-{}{}".format(item.id, part_text)
-    metadata.original_title = item.title
-    metadata.year = item.release_date.year
-    metadata.rating = float(item.rating)
-    metadata.content_rating_age = 18
-    metadata.content_rating = "Adult"
-    metadata.originally_available_at = item.release_date
-    metadata.summary = u"{}\n\n{}".format(item.title, item.description)
-    metadata.studio = "Heyzo"
-    metadata.tagline = item.title
+    # fingerprints of what is applied, a part is skipped on incremental updates if it has not changed
+    fingerprints = fingerprint_helper.Fingerprints(metadata.id, incremental)
 
-    # TODO: More details needed
-    # metadata.countries = {"Japan"}
-    # metadata.writers = {}
-    # metadata.directors = {}
-    # metadata.producers = {}
+    if fingerprints.changed('fields', item, part_number):
+        # fill in information
+        metadata.title = "HEYZO-{}{}".format(item.id, part_text)
+        metadata.original_title = item.title
+        metadata.year = item.release_date.year
+        metadata.rating = float(item.rating)
+        metadata.content_rating_age = 18
+        metadata.content_rating = "Adult"
+        metadata.originally_available_at = item.release_date
+        metadata.summary = u"{}\n\n{}".format(item.title, item.description)
+        metadata.studio = "Heyzo"
+        metadata.tagline = item.title
 
-    # set up actress image
-    metadata.roles.clear()
-    Log.Info(u"Processing actress data: {}".format(item.actress_name))
-    role = metadata.roles.new()
-    role.name = item.actress_name
-    role.photo = item.actress_picture_url
+        # TODO: More details needed
+        # metadata.countries = {"Japan"}
+        # metadata.writers = {}
+        # metadata.directors = {}
+        # metadata.producers = {}
 
-    # cropping picture does not seem working
-    # picture = utility_image_helper.crop_square_from_top_left(item.actress_picture_url)
-    # picture_data = utility_image_helper.convert_image_to_data(picture)
-    # role.photo = Proxy.Media(picture_data)
+        # set up actress image
+        metadata.roles.clear()
+        Log.Info(u"Processing actress data: {}".format(item.actress_name))
+        role = metadata.roles.new()
+        role.name = item.actress_name
+        role.photo = item.actress_picture_url
 
-    # setting up genres
-    metadata.genres.clear()
-    for tag in item.tags:
-        Log.Info(u"Adding tag as genre: {}".format(tag.name))
-        metadata.genres.add(tag.name)
-    for index, genre in enumerate(metadata.genres):
-        Log.Debug(u"genres[{}]: {}".format(index, genre))
+        # cropping picture does not seem working
+        # picture = utility_image_helper.crop_square_from_top_left(item.actress_picture_url)
+        # picture_data = utility_image_helper.convert_image_to_data(picture)
+        # role.photo = Proxy.Media(picture_data)
 
-    # setting up posters
-    for key in metadata.posters.keys():
-        del metadata.posters[key]
-    poster = image_helper.add_padding_to_image_as_poster(item.cover_url)
-    poster_data = image_helper.convert_image_to_data(poster)
-    poster_key = "{}@padded".format(item.cover_url)
-    metadata.posters[poster_key] = Proxy.Media(poster_data)
+        # setting up genres
+        metadata.genres.clear()
+        for tag in item.tags:
+            Log.Info(u"Adding tag as genre: {}".format(tag.name))
+            metadata.genres.add(tag.name)
+        for index, genre in enumerate(metadata.genres):
+            Log.Debug(u"genres[{}]: {}".format(index, genre))
+
+    if fingerprints.changed('images', item.cover_url):
+        # setting up posters, an existing poster is kept if its image has not changed
+        poster_key = "{}@padded".format(item.cover_url)
+        poster_exists = not force and poster_key in metadata.posters.keys()
+        poster_data = image_helper.get_padded_poster_data_if_modified(item.cover_url, poster_exists)
+        if poster_data is not None:
+            for key in metadata.posters.keys():
+                del metadata.posters[key]
+            metadata.posters[poster_key] = Proxy.Media(poster_data)
+
+    fingerprints.save()
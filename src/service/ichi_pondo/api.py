@@ -1,13 +1,21 @@
 import re
+import threading
+import time
 
 import humps
-import requests
 from munch import munchify
 from typing import List, Dict
 
 from plex.log import Log
+from utility import cache_helper
+from utility import http_helper
 
 base_url = "https://www.1pondo.tv"
+id_pattern = re.compile(r"1Pon(do)?-(?P<id>\d{6}_\d+)", re.IGNORECASE)
+
+actress_index = None
+actress_index_loaded_at = 0.0
+actress_index_lock = threading.Lock()
 
 
 # noinspection SpellCheckingInspection
@@ -16,20 +24,20 @@ def extract_id(filename):
     :type filename: str
     :rtype: str
     """
-    match = re.match("1Pon(do)?-(\d{6}_\d+)", filename, re.IGNORECASE)  # noqa: W605
+    match = id_pattern.match(filename)
     if match:
-        return match.group(2)
+        return match.group('id')
     return None
 
 
-def get_by_id(id):
+def get_by_id(id, force=False):
     """
     :type id: str
+    :type force: bool
     :rtype: OnePondoItem
     """
     url = "{}/dyn/phpauto/movie_details/movie_id/{}.json".format(base_url, id)
-    request = requests.get(url)
-    json = request.json()
+    json = cache_helper.get_or_revalidate('ichi_pondo', id, http_helper.get_json_if_modified, (url,), force)
     humped = humps.depascalize(json)
 
     humped['uc'] = humped['UC']
@@ -57,16 +65,42 @@ def get_actress_by_id(id):
     :type id: int
     :rtype: OnePondoActress
     """
+    actress = get_actress_index().get(id)
+    if actress is None:
+        return None
+    return munchify(actress)  # type: OnePondoActress
+
+
+def get_actress_index(force=False):
+    """
+    Returns the actresses by id, the catalogue is downloaded once and shared until the refresh interval passes.
+    :type force: bool
+    :rtype: Dict[int, dict]
+    """
+    global actress_index, actress_index_loaded_at
+    with actress_index_lock:
+        refresh_interval_in_seconds = cache_helper.get_time_to_live_in_seconds('ichi_pondo_actresses')
+        if force or actress_index is None or time.time() - actress_index_loaded_at > refresh_interval_in_seconds:
+            actress_index = cache_helper.get_or_revalidate('ichi_pondo_actresses', 'index', fetch_actress_index, force=force)
+            actress_index_loaded_at = time.time()
+            Log.Debug("Loaded number of 1Pondo actresses: {}".format(len(actress_index)))
+        return actress_index
+
+
+def fetch_actress_index(validators):
+    """
+    :type validators: dict[str, str]
+    :rtype: (Dict[int, dict], dict[str, str])
+    """
     url = "{}/dyn/phpauto/actresses.json".format(base_url)
-    request = requests.get(url)
-    json = request.json()
+    json, validators = http_helper.get_json_if_modified(validators, url)
+    index = {}
     for column_key in json:
         for row_key in json[column_key]:
             for actress in json[column_key][row_key]:
-                if actress['id'] == id:
-                    actress['image_url'] = base_url + actress['image_url']
-                    return munchify(actress)  # type: OnePondoActress
-    return None
+                actress['image_url'] = base_url + actress['image_url']
+                index[actress['id']] = actress
+    return index, validators
 
 
 class OnePondoActress(object):
@@ -2,9 +2,13 @@
 
 from unittest import TestCase
 
+import mock
+
 from service.ichi_pondo import api
+from utility import cassette_helper
 
 
+@cassette_helper.use_cassettes
 class Test(TestCase):
 
     def test_get_by_id(self):
@@ -91,3 +95,14 @@ class Test(TestCase):
         self.assertEqual(u"うえはらあい", item.kana)
         self.assertEqual(u"上原亜衣", item.name)
         self.assertEqual(2470, item.site_id)
+
+    def test_get_actress_by_id___downloads_catalogue_once(self):
+        catalogue = {u"a": {u"1": [{u"id": 1937, u"image_url": u"/assets/thumbs/50x50/actor_6706.jpg", u"name": u"上原亜衣"}]},
+                     u"k": {u"2": [{u"id": 2470, u"image_url": u"/assets/thumbs/50x50/actor_2470.jpg", u"name": u"かすみ果穂"}]}}
+        with mock.patch.object(api, 'actress_index', None), \
+                mock.patch.object(api.cache_helper, 'get_or_revalidate', lambda namespace, key, function, args=(), force=False: function({}, *args)[0]), \
+                mock.patch.object(api.http_helper, 'get_json_if_modified', mock.Mock(return_value=(catalogue, {}))) as get_json:
+            self.assertEqual(u"https://www.1pondo.tv/assets/thumbs/50x50/actor_6706.jpg", api.get_actress_by_id(1937).image_url)
+            self.assertEqual(u"かすみ果穂", api.get_actress_by_id(2470).name)
+            self.assertIsNone(api.get_actress_by_id(1))
+        get_json.assert_called_once_with({}, "https://www.1pondo.tv/dyn/phpauto/actresses.json")
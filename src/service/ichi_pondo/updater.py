@@ -3,12 +3,16 @@ from datetime import datetime
 import api
 from plex.log import Log
 from plex.proxy import Proxy
+from utility import fingerprint_helper
 from utility import image_helper
 
 
-def update(metadata):
+def update(metadata, force=False, incremental=False):
     """
     :type metadata: Movie
+    :type force: bool
+    :param incremental: only apply what has changed since the last update
+    :type incremental: bool
     """
     if not metadata.id.startswith('1pon-'):
         return
@@ -22,56 +26,64 @@ def update(metadata):
     part_number = split[1] if len(split) > 1 else None
 
     # query fanza api
-    item = api.get_by_id(product_id)
+    item = api.get_by_id(product_id, force)
     part_text = " (Part {})".format(part_number) if part_number is not None else ""
 
-    # fill in information
-    metadata.title = "1PON-{}{}".format(item.movie_id, part_text)
-    metadata.original_title = item.title
-    metadata.year = int(item.year)
-    metadata.rating = item.avg_rating
-    metadata.content_rating_age = 18
-    metadata.content_rating = "Adult"
-    metadata.originally_available_at = datetime.strptime(item.release, '%Y-%m-%d').date()
-    metadata.summary = u"{}\n\n{}".format(item.title, item.desc)
-    metadata.studio = "Caribbeancom"
-    metadata.tagline = item.title
+    # fingerprints of what is applied, a part is skipped on incremental updates if it has not changed
+    fingerprints = fingerprint_helper.Fingerprints(metadata.id, incremental)
 
-    # TODO: More details needed
-    # metadata.countries = {"Japan"}
-    # metadata.writers = {}
-    # metadata.directors = {}
-    # metadata.producers = {}
+    if fingerprints.changed('fields', item, part_number):
+        # fill in information
+        metadata.title = "1PON-{}{}".format(item.movie_id, part_text)
+        metadata.original_title = item.title
+        metadata.year = int(item.year)
+        metadata.rating = item.avg_rating
+        metadata.content_rating_age = 18
+        metadata.content_rating = "Adult"
+        metadata.originally_available_at = datetime.strptime(item.release, '%Y-%m-%d').date()
+        metadata.summary = u"{}\n\n{}".format(item.title, item.desc)
+        metadata.studio = "Caribbeancom"
+        metadata.tagline = item.title
 
-    # set up actress image
-    metadata.roles.clear()
-    for actress_id in item.actresses_list:
-        actress = item.actresses_list[actress_id]
-        Log.Info(u"Processing actress data: {}".format(actress.name_ja))
-        role = metadata.roles.new()
-        role.name = actress.name_ja
-        role.photo = api.get_actress_by_id(int(actress_id)).image_url
+        # TODO: More details needed
+        # metadata.countries = {"Japan"}
+        # metadata.writers = {}
+        # metadata.directors = {}
+        # metadata.producers = {}
 
-    # setting up genres
-    metadata.genres.clear()
-    for tag in item.uc_name:
-        Log.Info(u"Adding tag as genre: {}".format(tag))
-        metadata.genres.add(tag)
-    for index, genre in enumerate(metadata.genres):
-        Log.Debug(u"genres[{}]: {}".format(index, genre))
+        # set up actress image
+        metadata.roles.clear()
+        for actress_id in item.actresses_list:
+            actress = item.actresses_list[actress_id]
+            Log.Info(u"Processing actress data: {}".format(actress.name_ja))
+            role = metadata.roles.new()
+            role.name = actress.name_ja
+            role.photo = api.get_actress_by_id(int(actress_id)).image_url
 
-    # TODO
-    # # setting up artworks
-    # for key in metadata.art.keys():
-    #     del metadata.art[key]
-    # for index, image_url in enumerate(item.sample_image_urls):
-    #     Log.Debug("artwork_urls[{}]: {}".format(index, image_url))
-    #     metadata.art[image_url] = Proxy.Media(HTTP.Request(image_url))
+        # setting up genres
+        metadata.genres.clear()
+        for tag in item.uc_name:
+            Log.Info(u"Adding tag as genre: {}".format(tag))
+            metadata.genres.add(tag)
+        for index, genre in enumerate(metadata.genres):
+            Log.Debug(u"genres[{}]: {}".format(index, genre))
 
-    # setting up posters
-    for key in metadata.posters.keys():
-        del metadata.posters[key]
-    poster = image_helper.add_padding_to_image_as_poster(item.thumb_high)
-    poster_data = image_helper.convert_image_to_data(poster)
-    poster_key = "{}@padded".format(item.thumb_high)
-    metadata.posters[poster_key] = Proxy.Media(poster_data)
+    if fingerprints.changed('images', item.thumb_high):
+        # TODO
+        # # setting up artworks
+        # for key in metadata.art.keys():
+        #     del metadata.art[key]
+        # for index, image_url in enumerate(item.sample_image_urls):
+        #     Log.Debug("artwork_urls[{}]: {}".format(index, image_url))
+        #     metadata.art[image_url] = Proxy.Media(HTTP.Request(image_url))
+
+        # setting up posters, an existing poster is kept if its image has not changed
+        poster_key = "{}@padded".format(item.thumb_high)
+        poster_exists = not force and poster_key in metadata.posters.keys()
+        poster_data = image_helper.get_padded_poster_data_if_modified(item.thumb_high, poster_exists)
+        if poster_data is not None:
+            for key in metadata.posters.keys():
+                del metadata.posters[key]
+            metadata.posters[poster_key] = Proxy.Media(poster_data)
+
+    fingerprints.save()
@@ -1,12 +1,28 @@
 # coding=utf-8
+import re
 from datetime import datetime, time
 from rfc822 import parsedate
 
-import requests
 from pyquery import PyQuery
 from typing import List
 
+from utility import cache_helper
+from utility import http_helper
+from utility import scrape_helper
+
 base_url = "https://www.knights-visual.com"
+id_pattern = re.compile(r"(?P<id>KV-.+)")
+
+
+def extract_id(keyword):
+    """
+    :type keyword: str
+    :rtype: str
+    """
+    match = id_pattern.match(keyword)
+    if match:
+        return match.group('id')
+    return None
 
 
 def search(product_id):
@@ -15,7 +31,7 @@ def search(product_id):
     :rtype: List[KnightVisualSearchResultItem]
     """
     url = "{}/?auth=ok&s={}".format(base_url, product_id)  # type: str
-    query = PyQuery(url)
+    query = http_helper.query(url)
     results = []
 
     posts = query("ul.hfeed > li.post")
@@ -35,15 +51,40 @@ def search(product_id):
     return results
 
 
-def get_by_id(product_id):
-    return get_by_url("{}/works/furasupi/{}".format(base_url, product_id))
+def get_by_id(product_id, force=False):
+    return get_by_url("{}/works/furasupi/{}".format(base_url, product_id), force)
+
+
+def get_by_url(product_url, force=False):
+    content, encoding = cache_helper.get_or_revalidate('knights_visual', product_url, http_helper.get_page_if_modified, (product_url,), force)
+    item = parse_item(product_url, content, encoding)
+    last_modified = cache_helper.get_or_fetch('knights_visual', item.poster_url, get_last_modified, (item.poster_url,), force)
+    item.upload_date = datetime(*parsedate(last_modified)[:7])
+    return item
+
 
+table_data_selector = scrape_helper.Selector("div.kvp_goods_info_table td.data")
+title_selector = scrape_helper.Selector("h1.entry-title > a")
+description_selector = scrape_helper.Selector("div.entry-content > p")
+poster_selector = scrape_helper.Selector("div.entry-content > p > a > img")
+cover_selector = scrape_helper.Selector("div.entry-content > p > a")
+sample_video_selector = scrape_helper.Selector("div.entry-content > video")
+sample_image_thumbnail_selector = scrape_helper.Selector(".gallery img")
+sample_image_selector = scrape_helper.Selector(".gallery a")
 
-def get_by_url(product_url):
-    query = PyQuery(product_url)
+
+def parse_item(product_url, content, encoding=None):
+    """
+    Parses everything but the upload date, which comes from the poster image.
+    :type product_url: str
+    :type content: str
+    :type encoding: Optional[str]
+    :rtype: KnightVisualItem
+    """
+    page = scrape_helper.parse(content, encoding)
     item = KnightVisualItem()
 
-    table_data = query("div.kvp_goods_info_table td.data")
+    table_data = table_data_selector.select(page)
     item.url = product_url
     item.id = table_data[0].text
     item.label = table_data[1].text
@@ -51,22 +92,24 @@ def get_by_url(product_url):
     item.author_name = table_data[3].text
     item.duration_in_minutes = int(table_data[4].text[:-1])
     item.duration = time(hour=item.duration_in_minutes / 60, minute=item.duration_in_minutes % 60)
-    item.title = query("h1.entry-title > a").text()
-    item.description = query("div.entry-content > p").text().strip()
-    item.poster_url = base_url + query("div.entry-content > p > a > img").attr("data-lazy-src")
-    item.cover_url = base_url + query("div.entry-content > p > a").attr("href")
-    item.sample_video_url = query("div.entry-content > video").attr("src")
-    item.sample_image_thumbnail_urls = query(".gallery img") \
-        .map(lambda i, e: PyQuery(this).attr("data-lazy-src"))  # noqa: this
-    item.sample_image_urls = query(".gallery a").map(lambda i, e: PyQuery(this).attr("href"))  # noqa: this
-
-    poster_url_head = requests.head(item.poster_url)
-    last_modified = poster_url_head.headers['Last-Modified']
-    item.upload_date = datetime(*parsedate(last_modified)[:7])
-
+    item.title = title_selector.text(page)
+    item.description = description_selector.text(page).strip()
+    item.poster_url = base_url + poster_selector.attr(page, "data-lazy-src")
+    item.cover_url = base_url + cover_selector.attr(page, "href")
+    item.sample_video_url = sample_video_selector.attr(page, "src")
+    item.sample_image_thumbnail_urls = sample_image_thumbnail_selector.attrs(page, "data-lazy-src")
+    item.sample_image_urls = sample_image_selector.attrs(page, "href")
     return item
 
 
+def get_last_modified(url):
+    """
+    :type url: str
+    :rtype: str
+    """
+    return http_helper.head(url).headers['Last-Modified']
+
+
 class KnightVisualSearchResultItem(object):
     def __init__(self):
         self.id = "Stub"
@@ -3,8 +3,10 @@ import datetime
 from unittest import TestCase
 
 from service.knights_visual import api
+from utility import cassette_helper
 
 
+@cassette_helper.use_cassettes
 class Test(TestCase):
 
     def test_search(self):
@@ -14,12 +14,8 @@ def search(results, part_number, keyword):
     :type part_number: Optional[int]
     :type keyword: str
     """
-    if not keyword.startswith("KV") or not keyword.startswith("KV-"):
-        return
-
-    product_id = keyword
-    if keyword.startswith("KV") and not keyword.startswith("KV-"):
-        product_id = product_id.replace("KV", "KV-")
+    product_id = api.extract_id(keyword)
+    if product_id is None: return  # noqa
 
     Log.Info("Search item with keyword: {}".format(product_id))
     items = api.search(product_id)
@@ -2,12 +2,16 @@ import api
 from plex.http import HTTP
 from plex.log import Log
 from plex.proxy import Proxy
+from utility import fingerprint_helper
 from utility import image_helper
 
 
-def update(metadata):
+def update(metadata, force=False, incremental=False):
     """
     :type metadata: Movie
+    :type force: bool
+    :param incremental: only apply what has changed since the last update
+    :type incremental: bool
     """
     if not metadata.id.startswith('knights-visual-'):
         return
@@ -21,61 +25,68 @@ def update(metadata):
     part_number = split[1] if len(split) > 1 else None
 
     # query fanza api
-    item = api.get_by_id(product_id)
+    item = api.get_by_id(product_id, force)
     part_text = " (Part {})".format(part_number) if part_number is not None else ""
 
-    # fill in information
-    metadata.title = "{}{}".format(item.id.replace("-", ""), part_text)
-    metadata.original_title = item.title
-    metadata.year = item.upload_date.year
-    metadata.content_rating_age = 18
-    metadata.content_rating = "Adult"
-    metadata.originally_available_at = item.upload_date
-    metadata.summary = u"{}\n\n{}".format(item.title, item.description)
-    metadata.studio = "Knights Visual"
-    metadata.tagline = item.title
+    # fingerprints of what is applied, a part is skipped on incremental updates if it has not changed
+    fingerprints = fingerprint_helper.Fingerprints(metadata.id, incremental)
 
-    # TODO: More details needed
-    # metadata.rating = float(item.rating)
-    # metadata.countries = {"Japan"}
-    # metadata.writers = {}
-    # metadata.directors = {}
-    # metadata.producers = {}
-    # metadata.tags = {}
-    # metadata.genres = {}
+    if fingerprints.changed('fields', item, part_number):
+        # fill in information
+        metadata.title = "{}{}".format(item.id.replace("-", ""), part_text)
+        metadata.original_title = item.title
+        metadata.year = item.upload_date.year
+        metadata.content_rating_age = 18
+        metadata.content_rating = "Adult"
+        metadata.originally_available_at = item.upload_date
+        metadata.summary = u"{}\n\n{}".format(item.title, item.description)
+        metadata.studio = "Knights Visual"
+        metadata.tagline = item.title
 
-    # clean up posters
-    for key in metadata.posters.keys():
-        del metadata.posters[key]
+        # TODO: More details needed
+        # metadata.rating = float(item.rating)
+        # metadata.countries = {"Japan"}
+        # metadata.writers = {}
+        # metadata.directors = {}
+        # metadata.producers = {}
+        # metadata.tags = {}
+        # metadata.genres = {}
 
-    # try to crop poster out from cover, should have the medium resolution
-    if len(metadata.posters) == 0:
-        Log.Info("Checking if a poster can be cropped out from cover image")
-        cover_url = item.cover_url
-        small_poster_url = item.poster_url
-        poster_data = image_helper.crop_poster_data_from_cover_if_similar_to_small_poster(cover_url,
-                                                                                          small_poster_url)
-        if poster_data is not None:
-            poster_key = "{}@cropped".format(cover_url)
-            Log.Info("Using cropped poster from cover url: {}".format(cover_url))
-            Log.Info("New poster key: {}".format(poster_key))
-            metadata.posters[poster_key] = Proxy.Media(poster_data)
+    if fingerprints.changed('images', item.cover_url, item.poster_url, item.sample_image_urls):
+        # clean up posters
+        for key in metadata.posters.keys():
+            del metadata.posters[key]
 
-    # use small poster if no options, even it is low resolution
-    if len(metadata.posters) == 0:
-        Log.Info("No higher resolution poster can be used, using the lowest one")
-        poster_url = item.poster_url
-        Log.Debug("Small poster URL: {}".format(poster_url))
-        metadata.posters[poster_url] = Proxy.Media(HTTP.Request(poster_url))
+        # try to crop poster out from cover, should have the medium resolution
+        if len(metadata.posters) == 0:
+            Log.Info("Checking if a poster can be cropped out from cover image")
+            cover_url = item.cover_url
+            small_poster_url = item.poster_url
+            poster_data = image_helper.crop_poster_data_from_cover_if_similar_to_small_poster(cover_url,
+                                                                                              small_poster_url)
+            if poster_data is not None:
+                poster_key = "{}@cropped".format(cover_url)
+                Log.Info("Using cropped poster from cover url: {}".format(cover_url))
+                Log.Info("New poster key: {}".format(poster_key))
+                metadata.posters[poster_key] = Proxy.Media(poster_data)
 
-    # setting up artworks
-    max_artwork_count = 2  # TODO: make this configurable in preference
-    Log.Debug("max_artwork_count: {}".format(max_artwork_count))
-    for key in metadata.art.keys():
-        del metadata.art[key]
-    for index, image_url in enumerate(item.sample_image_urls):
-        if index < max_artwork_count:
-            Log.Debug("artwork_urls[{}]: {}".format(index, image_url))
-            metadata.art[image_url] = Proxy.Media(HTTP.Request(image_url))
-        else:
-            Log.Debug("artwork_urls (skipped): {}".format(image_url))
+        # use small poster if no options, even it is low resolution
+        if len(metadata.posters) == 0:
+            Log.Info("No higher resolution poster can be used, using the lowest one")
+            poster_url = item.poster_url
+            Log.Debug("Small poster URL: {}".format(poster_url))
+            metadata.posters[poster_url] = Proxy.Media(HTTP.Request(poster_url))
+
+        # setting up artworks
+        max_artwork_count = 2  # TODO: make this configurable in preference
+        Log.Debug("max_artwork_count: {}".format(max_artwork_count))
+        for key in metadata.art.keys():
+            del metadata.art[key]
+        for index, image_url in enumerate(item.sample_image_urls):
+            if index < max_artwork_count:
+                Log.Debug("artwork_urls[{}]: {}".format(index, image_url))
+                metadata.art[image_url] = Proxy.Media(HTTP.Request(image_url))
+            else:
+                Log.Debug("artwork_urls (skipped): {}".format(image_url))
+
+    fingerprints.save()
@@ -1,10 +1,14 @@
 # coding=utf-8
 import datetime
 import re
-from pyquery import PyQuery
 from typing import List
 
+from utility import cache_helper
+from utility import http_helper
+from utility import scrape_helper
+
 base_url = "https://www.s-cute.com"
+id_pattern = re.compile(r".*?s-cute-(?P<id>.*?)$", re.IGNORECASE)
 
 
 def extract_id(filename):
@@ -12,50 +16,79 @@ def extract_id(filename):
     :type filename: str
     :rtype: str
     """
-    match = re.findall("s-cute-(.*?)$", filename, re.IGNORECASE)
-    if len(match) > 0: return match[0]  # noqa
+    match = id_pattern.match(filename)
+    if match:
+        return match.group('id')
     return None
 
 
-def get_by_id(product_id):
+def get_by_id(product_id, force=False):
     """
     :type product_id: str
+    :type force: bool
     """
     product_id = product_id.lower()
     url = "{}/contents/{}".format(base_url, product_id)
-    query = PyQuery(url)
+    content, encoding = cache_helper.get_or_revalidate('s_cute', product_id, http_helper.get_page_if_modified, (url,), force)
+    return parse_item(product_id, url, content, encoding)
+
+
+title_selector = scrape_helper.Selector('h3.h1')
+description_selector = scrape_helper.Selector('.blog-single > p')
+cover_selector = scrape_helper.Selector('.content-cover > img:first')
+duration_selector = scrape_helper.Selector(".blog-single .meta .comment")
+photo_count_selector = scrape_helper.Selector(".blog-single .meta .views")
+actress_id_and_name_selector = scrape_helper.Selector('.about-author h5')
+actress_description_selector = scrape_helper.Selector('.about-author p:last')
+actress_url_selector = scrape_helper.Selector('.about-author a:first')
+actress_photo_selector = scrape_helper.Selector('.about-author img')
+date_selector = scrape_helper.Selector(".blog-single .meta .date")
+tag_selector = scrape_helper.Selector(".tags a")
+photo_selector = scrape_helper.Selector(".photos a[data-lightbox='gallery']")
+photo_thumbnail_selector = scrape_helper.Selector('img', prefix='descendant::')
+
+
+def parse_item(product_id, url, content, encoding=None):
+    """
+    :type product_id: str
+    :type url: str
+    :type content: str
+    :type encoding: Optional[str]
+    :rtype: SCuteItem
+    """
+    page = scrape_helper.parse(content, encoding)
 
     item = SCuteItem()
     item.id = product_id
     item.url = url
-    item.title = query('h3.h1').text()
-    item.description = query('.blog-single > p').text()
-    item.cover_url = query('.content-cover > img:first').attr('src')
-    item.duration_in_min = int(re.findall(r"\d+", query(".blog-single .meta .comment").text())[0])
-    item.photo_count = int(re.findall(r"\d+", query(".blog-single .meta .views").text())[0])
+    item.title = title_selector.text(page)
+    item.description = description_selector.text(page)
+    item.cover_url = cover_selector.attr(page, 'src')
+    item.duration_in_min = int(re.findall(r"\d+", duration_selector.text(page))[0])
+    item.photo_count = int(re.findall(r"\d+", photo_count_selector.text(page))[0])
 
-    actress_id_and_name = query('.about-author h5').text()
+    actress_id_and_name = actress_id_and_name_selector.text(page)
     actress_id_and_name = re.findall(r"#(\d+)\s(.*?)$", actress_id_and_name)
     item.actress.id = int(actress_id_and_name[0][0])
     item.actress.name = actress_id_and_name[0][1]
-    item.actress.description = query('.about-author p:last').text()
-    item.actress.url = "{}{}".format(base_url, query('.about-author a:first').attr('href'))
-    item.actress.photo_url = query('.about-author img').attr('src')
+    item.actress.description = actress_description_selector.text(page)
+    item.actress.url = "{}{}".format(base_url, actress_url_selector.attr(page, 'href'))
+    item.actress.photo_url = actress_photo_selector.attr(page, 'src')
 
-    date = query(".blog-single .meta .date").text()
+    date = date_selector.text(page)
     date = re.findall(r"\d+/\d+/\d+", date)[0]
-    item.release_date = datetime.datetime.strptime(date, '%Y/%m/%d')  # query(".blog-single .meta .date").text()
+    item.release_date = datetime.datetime.strptime(date, '%Y/%m/%d')
 
-    for element in query(".tags a"):
+    for element in tag_selector.select(page):
         tag = SCuteItem.Tag()
         tag.name = element.text
         tag.url = element.attrib['href']
         item.tags.append(tag)
 
-    for element in query(".photos a[data-lightbox='gallery']"):
+    for element in photo_selector.select(page):
         photo = SCuteItem.Photo()
         photo.image_url = element.attrib['href']
-        photo.thumbnail_url = PyQuery(element).find('img').attr('src')
+        photo.thumbnail_url = photo_thumbnail_selector.attr(element, 'src')
         item.photos.append(photo)
 
     return item
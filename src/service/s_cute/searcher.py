@@ -1,4 +1,3 @@
-import re
 import time
 
 import api
@@ -13,9 +12,7 @@ def extract_id(filename):
     :type filename: str
     :rtype: str
     """
-    match = re.findall("s-cute-(.*?)$", filename, re.IGNORECASE)
-    if len(match) > 0: return match[0]  # noqa
-    return None
+    return api.extract_id(filename)
 
 
 def search(results, part_number, keyword):
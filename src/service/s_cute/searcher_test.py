@@ -4,8 +4,10 @@ from unittest import TestCase
 from plex.agent import MetadataSearchResult
 from plex.container import ObjectContainer
 import searcher
+from utility import cassette_helper
 
 
+@cassette_helper.use_cassettes
 class Test(TestCase):
 
     def test_extract_id(self):
@@ -3,12 +3,16 @@ from plex.http import HTTP
 from plex.log import Log
 from plex.proxy import Proxy
 from plex.metadata import Movie  # noqa
+from utility import fingerprint_helper
 from utility import image_helper
 
 
-def update(metadata):
+def update(metadata, force=False, incremental=False):
     """
     :type metadata: Movie
+    :type force: bool
+    :param incremental: only apply what has changed since the last update
+    :type incremental: bool
     """
     if not metadata.id.startswith('s-cute-'):
         return
@@ -22,49 +26,53 @@ def update(metadata):
     part_number = split[1] if len(split) > 1 else None
 
     # query s-cute api
-    item = api.get_by_id(product_id)
+    item = api.get_by_id(product_id, force)
     part_text = " (Part {})".format(part_number) if part_number is not None else ""
 
-    # fill in information
-    metadata.title = "S-CUTE-{}{}".format(item.id.upper(), part_text)
-    metadata.original_title = item.title
-    metadata.year = item.release_date.year
-    metadata.content_rating_age = 18
-    metadata.content_rating = "Adult"
-    metadata.originally_available_at = item.release_date
-    metadata.summary = u"{}\n\n{}".format(item.title, item.description)
-    metadata.studio = "S-Cute"
-    metadata.tagline = item.title
+    # fingerprints of what is applied, a part is skipped on incremental updates if it has not changed
+    fingerprints = fingerprint_helper.Fingerprints(metadata.id, incremental)
 
-    # TODO: More details needed
-    # metadata.rating = float(item.rating)
-    # metadata.countries = {"Japan"}
-    # metadata.writers = {}
-    # metadata.directors = {}
-    # metadata.producers = {}
-    # metadata.tags = {}
-    # metadata.genres = {}
+    if fingerprints.changed('fields', item, part_number):
+        # fill in information
+        metadata.title = "S-CUTE-{}{}".format(item.id.upper(), part_text)
+        metadata.original_title = item.title
+        metadata.year = item.release_date.year
+        metadata.content_rating_age = 18
+        metadata.content_rating = "Adult"
+        metadata.originally_available_at = item.release_date
+        metadata.summary = u"{}\n\n{}".format(item.title, item.description)
+        metadata.studio = "S-Cute"
+        metadata.tagline = item.title
 
-    # clean up posters
-    for key in metadata.posters.keys():
-        del metadata.posters[key]
+        # TODO: More details needed
+        # metadata.rating = float(item.rating)
+        # metadata.countries = {"Japan"}
+        # metadata.writers = {}
+        # metadata.directors = {}
+        # metadata.producers = {}
+        # metadata.tags = {}
+        # metadata.genres = {}
 
-    # setting up posters
-    for key in metadata.posters.keys():
-        del metadata.posters[key]
-    poster = image_helper.add_padding_to_image_as_poster(item.cover_url)
-    poster_data = image_helper.convert_image_to_data(poster)
-    poster_key = "{}@padded".format(item.cover_url)
-    metadata.posters[poster_key] = Proxy.Media(poster_data)
+    if fingerprints.changed('images', item.cover_url, [photo.image_url for photo in item.photos]):
+        # setting up posters, an existing poster is kept if its image has not changed
+        poster_key = "{}@padded".format(item.cover_url)
+        poster_exists = not force and poster_key in metadata.posters.keys()
+        poster_data = image_helper.get_padded_poster_data_if_modified(item.cover_url, poster_exists)
+        if poster_data is not None:
+            for key in metadata.posters.keys():
+                del metadata.posters[key]
+            metadata.posters[poster_key] = Proxy.Media(poster_data)
 
-    # setting up artworks
-    max_artwork_count = 2  # TODO: make this configurable in preference
-    Log.Debug("max_artwork_count: {}".format(max_artwork_count))
-    for key in metadata.art.keys():
-        del metadata.art[key]
-    for index, photo in enumerate(item.photos):
-        if index < max_artwork_count:
-            Log.Debug("artwork_urls[{}]: {}".format(index, photo.image_url))
-            metadata.art[photo.image_url] = Proxy.Media(HTTP.Request(photo.image_url))
-        else:
-            Log.Debug("artwork_urls (skipped): {}".format(photo.image_url))
+        # setting up artworks
+        max_artwork_count = 2  # TODO: make this configurable in preference
+        Log.Debug("max_artwork_count: {}".format(max_artwork_count))
+        for key in metadata.art.keys():
+            del metadata.art[key]
+        for index, photo in enumerate(item.photos):
+            if index < max_artwork_count:
+                Log.Debug("artwork_urls[{}]: {}".format(index, photo.image_url))
+                metadata.art[photo.image_url] = Proxy.Media(HTTP.Request(photo.image_url))
+            else:
+                Log.Debug("artwork_urls (skipped): {}".format(photo.image_url))
+
+    fingerprints.save()
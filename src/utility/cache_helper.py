@@ -0,0 +1,311 @@
+import os
+import sqlite3
+import threading
+import time
+from cPickle import dumps, loads, HIGHEST_PROTOCOL
+
+from plex.log import Log
+
+database_path = os.path.join(os.path.expanduser('~'), '.javplexagent', 'cache.db')
+time_to_live_in_seconds_by_namespace = {
+    'fanza': 7 * 24 * 60 * 60,
+    'fanza_actresses': 30 * 24 * 60 * 60,
+    'caribbeancom': 30 * 24 * 60 * 60,
+    'caribbeancom_pr': 30 * 24 * 60 * 60,
+    'heyzo': 30 * 24 * 60 * 60,
+    'ichi_pondo': 30 * 24 * 60 * 60,
+    'ichi_pondo_actresses': 24 * 60 * 60,
+    'knights_visual': 30 * 24 * 60 * 60,
+    's_cute': 30 * 24 * 60 * 60,
+    'image_hashes': 90 * 24 * 60 * 60,
+    'images': 90 * 24 * 60 * 60,  # validators of posters
+    'default': 24 * 60 * 60,
+}
+max_entries_by_namespace = {  # sized for libraries of 50k titles
+    'fanza': 200000,  # dvd and digital item lists and the product page of every title
+    'fanza_actresses': 50000,
+    'caribbeancom': 60000,
+    'caribbeancom_pr': 60000,
+    'heyzo': 60000,
+    'ichi_pondo': 60000,
+    'knights_visual': 120000,  # pages and the last modified date of their posters
+    's_cute': 60000,
+    'image_hashes': 300000,
+    'images': 60000,
+    'default': 10000,
+}
+eviction_interval_in_puts = 1000
+access_interval_in_seconds = 60 * 60  # the access time is only written again after this, so most hits do not write
+eviction_ratio = 0.9  # a full namespace is evicted down to this ratio of its cap, so it is not evicted again right away
+puts_since_eviction = 0
+
+connection = None
+connection_lock = threading.RLock()
+
+
+class NotModified(Exception):
+    """
+    Raised by revalidating functions when the server confirms that the cached value has not changed.
+    """
+    pass
+
+
+def get_connection():
+    """
+    Returns the shared connection to the cache database, the database is created on first use.
+    :rtype: sqlite3.Connection
+    """
+    global connection
+    with connection_lock:
+        if connection is None:
+            directory = os.path.dirname(database_path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            Log.Debug("Opening cache database: {}".format(database_path))
+            connection = sqlite3.connect(database_path, check_same_thread=False)
+            connection.execute("CREATE TABLE IF NOT EXISTS cache ("
+                               "namespace TEXT NOT NULL, "
+                               "key TEXT NOT NULL, "
+                               "value BLOB NOT NULL, "
+                               "created_at REAL NOT NULL, "
+                               "accessed_at REAL NOT NULL, "
+                               "PRIMARY KEY (namespace, key))")
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_namespace_accessed_at ON cache (namespace, accessed_at)")
+            connection.execute("CREATE TABLE IF NOT EXISTS validators ("
+                               "namespace TEXT NOT NULL, "
+                               "key TEXT NOT NULL, "
+                               "value BLOB NOT NULL, "
+                               "PRIMARY KEY (namespace, key))")
+            connection.execute("CREATE TABLE IF NOT EXISTS fingerprints ("
+                               "metadata_id TEXT NOT NULL PRIMARY KEY, "
+                               "value BLOB NOT NULL)")
+            connection.commit()
+        return connection
+
+
+def close():
+    global connection
+    with connection_lock:
+        if connection is not None:
+            connection.close()
+            connection = None
+
+
+def get_time_to_live_in_seconds(namespace):
+    """
+    :type namespace: str
+    :rtype: int
+    """
+    return time_to_live_in_seconds_by_namespace.get(namespace, time_to_live_in_seconds_by_namespace['default'])
+
+
+def get_max_entries(namespace):
+    """
+    :type namespace: str
+    :rtype: int
+    """
+    return max_entries_by_namespace.get(namespace, max_entries_by_namespace['default'])
+
+
+def get(namespace, key):
+    """
+    Returns the cached value, or None if it is missing or expired.
+    :type namespace: str
+    :type key: str
+    """
+    with connection_lock:
+        row = get_connection().execute("SELECT value, created_at, accessed_at FROM cache WHERE namespace = ? AND key = ?",
+                                       (namespace, key)).fetchone()
+        if row is None:
+            return None
+        value, created_at, accessed_at = row
+        now = time.time()
+        if now - created_at > get_time_to_live_in_seconds(namespace):
+            return None
+        if now - accessed_at >= access_interval_in_seconds:
+            get_connection().execute("UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?", (now, namespace, key))
+            get_connection().commit()
+    return loads(str(value))
+
+
+def get_stale(namespace, key):
+    """
+    Returns the cached value even if it is expired, or None if it is missing.
+    :type namespace: str
+    :type key: str
+    """
+    with connection_lock:
+        row = get_connection().execute("SELECT value FROM cache WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+    return loads(str(row[0])) if row is not None else None
+
+
+def refresh(namespace, key):
+    """
+    Makes the cached value fresh again, after it has been revalidated.
+    :type namespace: str
+    :type key: str
+    """
+    now = time.time()
+    with connection_lock:
+        get_connection().execute("UPDATE cache SET created_at = ?, accessed_at = ? WHERE namespace = ? AND key = ?", (now, now, namespace, key))
+        get_connection().commit()
+
+
+def get_validators(namespace, key):
+    """
+    Returns the ETag and Last-Modified headers of the response the value was made from, or an empty dict.
+    :type namespace: str
+    :type key: str
+    :rtype: dict[str, str]
+    """
+    with connection_lock:
+        row = get_connection().execute("SELECT value FROM validators WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+    return loads(str(row[0])) if row is not None else {}
+
+
+def put_validators(namespace, key, validators):
+    """
+    :type namespace: str
+    :type key: str
+    :type validators: dict[str, str]
+    """
+    with connection_lock:
+        if len(validators) > 0:
+            get_connection().execute("INSERT OR REPLACE INTO validators (namespace, key, value) VALUES (?, ?, ?)",
+                                     (namespace, key, sqlite3.Binary(dumps(validators, HIGHEST_PROTOCOL))))
+        else:
+            get_connection().execute("DELETE FROM validators WHERE namespace = ? AND key = ?", (namespace, key))
+        get_connection().commit()
+
+
+def get_fingerprints(metadata_id):
+    """
+    Returns the fingerprints of what was last applied to the title, or an empty dict.
+    They are kept apart from cached values, so they are not evicted however large the library is.
+    :type metadata_id: str
+    :rtype: dict[str, str]
+    """
+    with connection_lock:
+        row = get_connection().execute("SELECT value FROM fingerprints WHERE metadata_id = ?", (metadata_id,)).fetchone()
+    return loads(str(row[0])) if row is not None else {}
+
+
+def put_fingerprints(metadata_id, fingerprints):
+    """
+    :type metadata_id: str
+    :type fingerprints: dict[str, str]
+    """
+    with connection_lock:
+        get_connection().execute("INSERT OR REPLACE INTO fingerprints (metadata_id, value) VALUES (?, ?)",
+                                 (metadata_id, sqlite3.Binary(dumps(fingerprints, HIGHEST_PROTOCOL))))
+        get_connection().commit()
+
+
+def put(namespace, key, value):
+    """
+    Stores the value, least recently used values are evicted every so many puts when there are too many of them.
+    :type namespace: str
+    :type key: str
+    """
+    global puts_since_eviction
+    now = time.time()
+    with connection_lock:
+        get_connection().execute("INSERT OR REPLACE INTO cache (namespace, key, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                                 (namespace, key, sqlite3.Binary(dumps(value, HIGHEST_PROTOCOL)), now, now))
+        puts_since_eviction += 1
+        if puts_since_eviction >= eviction_interval_in_puts:
+            puts_since_eviction = 0
+            evict()
+        get_connection().commit()
+
+
+def evict():
+    """
+    Evicts the least recently used values of every namespace which has more values than its cap.
+    """
+    with connection_lock:
+        counts = get_connection().execute("SELECT namespace, COUNT(*) FROM cache GROUP BY namespace").fetchall()
+        for namespace, count in counts:
+            if count <= get_max_entries(namespace):
+                continue
+            excess = count - int(get_max_entries(namespace) * eviction_ratio)
+            Log.Debug("Evicting {} least recently used cache entries of {}".format(excess, namespace))
+            get_connection().execute("DELETE FROM cache WHERE rowid IN "
+                                     "(SELECT rowid FROM cache WHERE namespace = ? ORDER BY accessed_at LIMIT ?)", (namespace, excess))
+        get_connection().execute("DELETE FROM validators WHERE NOT EXISTS "
+                                 "(SELECT 1 FROM cache WHERE cache.namespace = validators.namespace AND cache.key = validators.key)")
+
+
+def get_or_fetch(namespace, key, function, args=(), force=False, should_cache=None):
+    """
+    Returns the cached value if it is still fresh, otherwise calls the function and caches what it returns.
+    None is never cached, and errors of the cache itself fall back to calling the function.
+    :type namespace: str
+    :type key: str
+    :type function: function
+    :type args: tuple
+    :type force: bool
+    :param should_cache: values it rejects are returned without being cached, like answers which may be transient
+    :type should_cache: function
+    """
+    if not force:
+        try:
+            value = get(namespace, key)
+            if value is not None:
+                Log.Debug("Cache hit: {}/{}".format(namespace, key))
+                return value
+        except Exception as exception:
+            Log.Warn("Failed to read cache {}/{}: {}".format(namespace, key, exception))
+    Log.Debug("Cache {}: {}/{}".format('refresh' if force else 'miss', namespace, key))
+    value = function(*args)
+    if value is not None and (should_cache is None or should_cache(value)):
+        try:
+            put(namespace, key, value)
+        except Exception as exception:
+            Log.Warn("Failed to write cache {}/{}: {}".format(namespace, key, exception))
+    return value
+
+
+def get_or_revalidate(namespace, key, function, args=(), force=False):
+    """
+    Like get_or_fetch, but an expired value is revalidated instead of being fetched again.
+    The function is called with the validators of the cached value before the args. It returns the new value and
+    its validators, or raises NotModified so that the cached value is kept for another time to live.
+    :type namespace: str
+    :type key: str
+    :type function: function
+    :type args: tuple
+    :type force: bool
+    """
+    if not force:
+        try:
+            value = get(namespace, key)
+            if value is not None:
+                Log.Debug("Cache hit: {}/{}".format(namespace, key))
+                return value
+        except Exception as exception:
+            Log.Warn("Failed to read cache {}/{}: {}".format(namespace, key, exception))
+    stale_value, validators = None, {}
+    try:
+        stale_value = get_stale(namespace, key)
+        if stale_value is not None:
+            validators = get_validators(namespace, key)
+    except Exception as exception:
+        Log.Warn("Failed to read cache {}/{}: {}".format(namespace, key, exception))
+    Log.Debug("Cache {}: {}/{}".format('revalidate' if len(validators) > 0 else 'miss', namespace, key))
+    try:
+        value, validators = function(validators, *args)
+    except NotModified:
+        Log.Debug("Cache not modified: {}/{}".format(namespace, key))
+        try:
+            refresh(namespace, key)
+        except Exception as exception:
+            Log.Warn("Failed to write cache {}/{}: {}".format(namespace, key, exception))
+        return stale_value
+    if value is not None:
+        try:
+            put(namespace, key, value)
+            put_validators(namespace, key, validators)
+        except Exception as exception:
+            Log.Warn("Failed to write cache {}/{}: {}".format(namespace, key, exception))
+    return value
@@ -0,0 +1,114 @@
+# coding=utf-8
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+import mock
+
+from utility import cache_helper
+
+
+class Test(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.database_path = mock.patch.object(cache_helper, 'database_path', os.path.join(self.directory, 'cache.db'))
+        self.database_path.start()
+        cache_helper.close()
+
+    def tearDown(self):
+        cache_helper.close()
+        self.database_path.stop()
+        shutil.rmtree(self.directory)
+
+    def test_get_or_fetch___fetches_once(self):
+        fetch = mock.Mock(return_value={'title': u'テスト'})
+        self.assertEqual({'title': u'テスト'}, cache_helper.get_or_fetch('heyzo', '1234', fetch, ('a',)))
+        self.assertEqual({'title': u'テスト'}, cache_helper.get_or_fetch('heyzo', '1234', fetch, ('a',)))
+        fetch.assert_called_once_with('a')
+
+    def test_get_or_fetch___persists_across_connections(self):
+        cache_helper.put('heyzo', '1234', 'html')
+        cache_helper.close()
+        self.assertEqual('html', cache_helper.get('heyzo', '1234'))
+
+    def test_get_or_fetch___force_refreshes(self):
+        cache_helper.put('heyzo', '1234', 'old')
+        self.assertEqual('new', cache_helper.get_or_fetch('heyzo', '1234', lambda: 'new', force=True))
+        self.assertEqual('new', cache_helper.get('heyzo', '1234'))
+
+    def test_get_or_fetch___none_is_not_cached(self):
+        fetch = mock.Mock(return_value=None)
+        cache_helper.get_or_fetch('heyzo', '1234', fetch)
+        cache_helper.get_or_fetch('heyzo', '1234', fetch)
+        self.assertEqual(2, fetch.call_count)
+
+    def test_get___expired_by_namespace(self):
+        with mock.patch.object(cache_helper.time, 'time', return_value=1000.0):
+            cache_helper.put('fanza', 'ssni558', 'fanza')
+            cache_helper.put('heyzo', '1234', 'heyzo')
+        with mock.patch.object(cache_helper.time, 'time', return_value=1000.0 + 8 * 24 * 60 * 60):
+            self.assertIsNone(cache_helper.get('fanza', 'ssni558'))
+            self.assertEqual('heyzo', cache_helper.get('heyzo', '1234'))
+
+    def test_put___evicts_least_recently_used_by_namespace(self):
+        now = time.time()
+        with mock.patch.object(cache_helper, 'max_entries_by_namespace', {'heyzo': 2, 'default': 3}), \
+                mock.patch.object(cache_helper, 'eviction_interval_in_puts', 1), mock.patch.object(cache_helper, 'eviction_ratio', 1.0), \
+                mock.patch.object(cache_helper, 'access_interval_in_seconds', 0):
+            with mock.patch.object(cache_helper.time, 'time', side_effect=[now - 6, now - 5, now - 4, now - 3, now - 2, now - 1, now]):
+                cache_helper.put('heyzo', '1', 'a')
+                cache_helper.put('fanza', '1', 'x')
+                cache_helper.put('fanza', '2', 'y')
+                cache_helper.put('heyzo', '2', 'b')
+                cache_helper.get('heyzo', '1')
+                cache_helper.put('heyzo', '3', 'c')
+            self.assertEqual('a', cache_helper.get('heyzo', '1'))
+            self.assertIsNone(cache_helper.get('heyzo', '2'))
+            self.assertEqual('c', cache_helper.get('heyzo', '3'))
+            self.assertEqual('x', cache_helper.get('fanza', '1'))
+
+    def test_get___writes_access_time_only_after_interval(self):
+        now = time.time()
+        select_accessed_at = "SELECT accessed_at FROM cache WHERE namespace = 'heyzo' AND key = '1'"
+        with mock.patch.object(cache_helper.time, 'time', side_effect=[now, now + 60, now + 2 * 60 * 60]):
+            cache_helper.put('heyzo', '1', 'a')
+            self.assertEqual('a', cache_helper.get('heyzo', '1'))
+            self.assertEqual(now, cache_helper.get_connection().execute(select_accessed_at).fetchone()[0])
+            self.assertEqual('a', cache_helper.get('heyzo', '1'))
+            self.assertEqual(now + 2 * 60 * 60, cache_helper.get_connection().execute(select_accessed_at).fetchone()[0])
+
+    def test_put___evicts_in_batches(self):
+        with mock.patch.object(cache_helper, 'max_entries_by_namespace', {'default': 10}), \
+                mock.patch.object(cache_helper, 'eviction_interval_in_puts', 5), mock.patch.object(cache_helper, 'puts_since_eviction', 0):
+            for index in range(14):
+                cache_helper.put('heyzo', str(index), index)
+            self.assertEqual(14, cache_helper.get_connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0])
+            cache_helper.put('heyzo', '14', 14)
+            self.assertEqual(9, cache_helper.get_connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0])
+
+    def test_get_or_fetch___rejected_value_is_not_cached(self):
+        fetch = mock.Mock(return_value={'result': {'items': []}})
+        cache_helper.get_or_fetch('fanza', 'dvd-ssni558', fetch, should_cache=lambda body: len(body['result']['items']) > 0)
+        cache_helper.get_or_fetch('fanza', 'dvd-ssni558', fetch, should_cache=lambda body: len(body['result']['items']) > 0)
+        self.assertEqual(2, fetch.call_count)
+
+    def test_get_or_revalidate___keeps_value_not_modified(self):
+        with mock.patch.object(cache_helper.time, 'time', return_value=1000.0):
+            cache_helper.get_or_revalidate('fanza', 'ssni558', lambda validators: ('html', {'ETag': '"1"'}))
+        fetch = mock.Mock(side_effect=cache_helper.NotModified())
+        with mock.patch.object(cache_helper.time, 'time', return_value=1000.0 + 8 * 24 * 60 * 60):
+            self.assertEqual('html', cache_helper.get_or_revalidate('fanza', 'ssni558', fetch, ('a',)))
+            self.assertEqual('html', cache_helper.get('fanza', 'ssni558'))
+        fetch.assert_called_once_with({'ETag': '"1"'}, 'a')
+
+    def test_get_or_revalidate___stores_modified_value(self):
+        cache_helper.put('heyzo', '1234', 'old')
+        cache_helper.put_validators('heyzo', '1234', {'Last-Modified': 'Mon, 01 Jun 2020 00:00:00 GMT'})
+        fetch = mock.Mock(return_value=('new', {}))
+        self.assertEqual('new', cache_helper.get_or_revalidate('heyzo', '1234', fetch, force=True))
+        fetch.assert_called_once_with({'Last-Modified': 'Mon, 01 Jun 2020 00:00:00 GMT'})
+        self.assertEqual('new', cache_helper.get('heyzo', '1234'))
+        self.assertEqual({}, cache_helper.get_validators('heyzo', '1234'))
@@ -0,0 +1,196 @@
+import base64
+import functools
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from unittest import SkipTest
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3 import HTTPResponse
+
+from plex.log import Log
+from utility import cache_helper
+
+cassette_version = 1
+source_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+cassettes_dir = os.path.join(os.path.dirname(source_dir), 'cassettes')
+record_cassettes = os.environ.get('RECORD_CASSETTES') == '1'  # missing cassettes are only recorded from the sites if set
+active_cassette = None  # type: Cassette
+active_cassette_lock = threading.Lock()
+
+
+class CassetteError(Exception):
+    pass
+
+
+class Cassette(object):
+    """
+    Recorded http interactions of one scenario. A cassette which does not exist yet records real responses if
+    recording is allowed, otherwise it replays them and unknown requests fail instead of reaching the network.
+    """
+
+    def __init__(self, path, record=False):
+        """
+        :type path: str
+        :param record: records a missing cassette, otherwise it replays nothing and every request fails
+        :type record: bool
+        """
+        self.path = path
+        self.missing = not os.path.exists(path)
+        self.recording = self.missing and record
+        self.interactions = {}
+        self.lock = threading.Lock()
+        if not self.missing:
+            with open(path) as cassette_file:
+                content = json.load(cassette_file)
+            if content['version'] != cassette_version:
+                raise CassetteError("Cassette version {} is not supported: {}".format(content['version'], path))
+            for interaction in content['interactions']:
+                self.interactions[interaction['request']] = interaction['response']
+
+    @staticmethod
+    def get_key(request):
+        """
+        :type request: requests.PreparedRequest
+        :rtype: str
+        """
+        key = u"{} {}".format(request.method, request.url)
+        if 'Range' in request.headers:
+            key += u" Range={}".format(request.headers['Range'])
+        return key
+
+    def play(self, request, adapter):
+        """
+        :type request: requests.PreparedRequest
+        :rtype: Response
+        """
+        key = self.get_key(request)
+        if self.missing:
+            raise CassetteError("Cassette is not recorded, run with RECORD_CASSETTES=1 to record it: {}".format(self.path))
+        if key not in self.interactions:
+            raise CassetteError("Request is not recorded in {}: {}".format(self.path, key))
+        recorded = self.interactions[key]
+        response = Response()
+        response.status_code = recorded['status']
+        response.reason = recorded['reason']
+        response.headers = CaseInsensitiveDict(recorded['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        # the body is recorded as it was read, already decoded, so it is replayed without the content encoding
+        response.raw = HTTPResponse(body=io.BytesIO(base64.b64decode(recorded['body'])), status=recorded['status'],
+                                    preload_content=False)
+        response.url = request.url
+        response.request = request
+        response.connection = adapter
+        return response
+
+    def record(self, request, response):
+        """
+        Records the response without reading it. Its body is recorded as far as the caller reads it,
+        so a streamed probe which stops after the header records only the header.
+        :type request: requests.PreparedRequest
+        :type response: Response
+        :return: the recorded body, which the read bytes are appended to
+        :rtype: bytearray
+        """
+        body = bytearray()
+        with self.lock:
+            self.interactions[self.get_key(request)] = {
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': dict(response.headers),
+                'body': body,
+            }
+        return body
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        interactions = [{'request': key, 'response': dict(self.interactions[key], body=base64.b64encode(bytes(self.interactions[key]['body'])))}
+                        for key in sorted(self.interactions)]
+        with open(self.path, 'w') as cassette_file:
+            json.dump({'version': cassette_version, 'interactions': interactions}, cassette_file, indent=2, sort_keys=True)
+        Log.Info("Recorded {} interactions into cassette: {}".format(len(interactions), self.path))
+
+
+def get_active_cassette():
+    """
+    :rtype: Cassette
+    """
+    return active_cassette
+
+
+@contextmanager
+def use_cassette(path, record=None):
+    """
+    Routes all requests of http_helper through the cassette, a new cassette is saved when the block exits
+    without an error and something was requested.
+    :type path: str
+    :param record: whether a missing cassette is recorded from the sites, record_cassettes by default
+    :type record: Optional[bool]
+    """
+    global active_cassette
+    with active_cassette_lock:
+        if active_cassette is not None:
+            raise CassetteError("Another cassette is in use: {}".format(active_cassette.path))
+        active_cassette = Cassette(path, record_cassettes if record is None else record)
+        cassette = active_cassette
+    Log.Info("{} cassette: {}".format('Recording' if cassette.recording else 'Replaying', path))
+    try:
+        yield cassette
+        if cassette.recording and len(cassette.interactions) > 0:
+            cassette.save()
+    finally:
+        with active_cassette_lock:
+            active_cassette = None
+
+
+def use_cassettes(test_class):
+    """
+    Runs every test of a test case in its own cassette, cassettes/tests/<module>/<test>.json.
+    Tests never reach the sites unless RECORD_CASSETTES=1 is set to record their missing cassettes,
+    tests which fail because their cassette is missing are skipped.
+    :type test_class: type
+    :rtype: type
+    """
+    for name, function in list(vars(test_class).items()):
+        if name.startswith('test') and callable(function):
+            setattr(test_class, name, in_cassette(function))
+    return test_class
+
+
+def in_cassette(function):
+    """
+    Wraps a test, it runs with an empty cache so a recorded cassette holds every request the test makes.
+    :type function: function
+    :rtype: function
+    """
+    @functools.wraps(function)
+    def run_in_cassette(test):
+        test_path = os.path.splitext(os.path.abspath(sys.modules[type(test).__module__].__file__))[0]
+        path = os.path.join(cassettes_dir, 'tests', os.path.relpath(test_path, source_dir), function.__name__ + '.json')
+        directory = tempfile.mkdtemp()
+        database_path = cache_helper.database_path
+        cache_helper.close()
+        cache_helper.database_path = os.path.join(directory, 'cache.db')
+        try:
+            with use_cassette(path) as cassette:
+                try:
+                    return function(test)
+                except Exception:
+                    if cassette.missing and not cassette.recording:
+                        raise SkipTest("Cassette is not recorded: {}".format(path))
+                    raise
+        finally:
+            cache_helper.close()
+            cache_helper.database_path = database_path
+            shutil.rmtree(directory)
+
+    return run_in_cassette
@@ -0,0 +1,94 @@
+# coding=utf-8
+import io
+import os
+import shutil
+import tempfile
+from unittest import SkipTest, TestCase
+
+import mock
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+
+from utility import cassette_helper
+from utility import http_helper
+
+
+def send(adapter, request, body=u"<h1>テスト</h1>".encode('utf-8'), **kwargs):
+    body = body if request.method == 'GET' else b''
+    response = Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.headers = CaseInsensitiveDict({'Content-Type': 'text/html; charset=utf-8', 'Transfer-Encoding': 'chunked'})
+    response.raw = HTTPResponse(body=io.BytesIO(body), status=200, preload_content=False)
+    response.url = request.url
+    response.request = request
+    return response
+
+
+class Test(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'heyzo', 'test.json')
+        http_helper.reset_stats()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_use_cassette___replays_recorded_responses(self):
+        url = "https://www.heyzo.com/moviepages/0001/index.html"
+        with mock.patch.object(HTTPAdapter, 'send', send):
+            with cassette_helper.use_cassette(self.path, record=True) as cassette:
+                self.assertTrue(cassette.recording)
+                self.assertEqual(u"<h1>テスト</h1>", http_helper.get_text(url))
+                http_helper.head(url)
+        self.assertTrue(os.path.exists(self.path))
+
+        with cassette_helper.use_cassette(self.path) as cassette:
+            self.assertFalse(cassette.recording)
+            self.assertEqual(u"<h1>テスト</h1>", http_helper.get_text(url))
+            self.assertEqual(u"テスト", http_helper.query(url)('h1').text())
+            self.assertEqual('chunked', http_helper.head(url).headers['Transfer-Encoding'])
+        self.assertEqual({'www.heyzo.com': {'requests': 5, 'bytes': 18 * 3}}, http_helper.get_stats())
+
+    def test_use_cassette___unknown_request_fails(self):
+        with mock.patch.object(HTTPAdapter, 'send', send):
+            with cassette_helper.use_cassette(self.path, record=True):
+                http_helper.get("https://www.heyzo.com/moviepages/0001/index.html")
+        with cassette_helper.use_cassette(self.path):
+            self.assertRaises(cassette_helper.CassetteError, http_helper.get, "https://www.heyzo.com/moviepages/0002/index.html")
+
+    def test_use_cassette___missing_cassette_fails_without_recording(self):
+        with mock.patch.object(HTTPAdapter, 'send', side_effect=send) as live_send:
+            with cassette_helper.use_cassette(self.path) as cassette:
+                self.assertFalse(cassette.recording)
+                self.assertRaises(cassette_helper.CassetteError, http_helper.get, "https://www.heyzo.com/moviepages/0001/index.html")
+        self.assertFalse(live_send.called)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_use_cassette___records_and_counts_only_what_is_read(self):
+        url = "https://www.heyzo.com/contents/3000/2272/images/player_thumbnail.jpg"
+        body = b'\xff\xd8' + b'\0' * 9998
+        with mock.patch.object(HTTPAdapter, 'send', lambda adapter, request, **kwargs: send(adapter, request, body)):
+            with cassette_helper.use_cassette(self.path, record=True):
+                response = http_helper.get(url, stream=True)
+                self.assertEqual(body[:1000], next(response.iter_content(1000)))
+                response.close()
+        with cassette_helper.use_cassette(self.path):
+            self.assertEqual(body[:1000], http_helper.get(url).content)
+        self.assertEqual({'www.heyzo.com': {'requests': 2, 'bytes': 1000 * 2}}, http_helper.get_stats())
+
+    def test_use_cassettes___records_each_test_once_then_replays_it(self):
+        @cassette_helper.use_cassettes
+        class ServiceTest(TestCase):
+            def test_get(self):
+                self.assertEqual(u"<h1>テスト</h1>", http_helper.get_text("https://www.heyzo.com/moviepages/0001/index.html"))
+
+        with mock.patch.object(cassette_helper, 'cassettes_dir', self.directory):
+            self.assertRaises(SkipTest, ServiceTest('test_get').test_get)
+            with mock.patch.object(HTTPAdapter, 'send', send), mock.patch.object(cassette_helper, 'record_cassettes', True):
+                ServiceTest('test_get').test_get()
+            ServiceTest('test_get').test_get()
+        self.assertTrue(os.path.exists(os.path.join(self.directory, 'tests', 'utility', 'cassette_helper_test', 'test_get.json')))
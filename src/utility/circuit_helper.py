@@ -0,0 +1,138 @@
+import threading
+import time
+
+import requests
+from typing import Optional
+
+from plex.log import Log
+
+failure_threshold = 3  # consecutive failures which open the circuit of a service
+cool_down_in_seconds = 5 * 60
+
+breakers = {}
+breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a service which is skipped until its cool-down has passed.
+    """
+    pass
+
+
+class CircuitBreaker(object):
+    """
+    Counts consecutive failures of a service. After too many of them the circuit opens and calls fail fast,
+    until the cool-down has passed and a single probe call succeeds.
+    """
+
+    def __init__(self, service):
+        """
+        :type service: str
+        """
+        self.service = service
+        self.failures = 0
+        self.opened_at = None  # type: Optional[float]
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def is_open(self):
+        """
+        Returns whether calls would fail fast now, without taking the probe.
+        :rtype: bool
+        """
+        with self.lock:
+            return self.opened_at is not None and (self.probing or time.time() - self.opened_at < cool_down_in_seconds)
+
+    def allow(self):
+        """
+        Returns whether a call may be made, once the cool-down has passed only the first call is allowed as a probe.
+        :rtype: bool
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.time() - self.opened_at < cool_down_in_seconds:
+                return False
+            Log.Info("Probing service '{}' after its cool-down".format(self.service))
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                Log.Info("Closing circuit of service '{}'".format(self.service))
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def release(self):
+        """
+        Ends a call which neither succeeded nor failed, a probe is then taken by the next call.
+        """
+        with self.lock:
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= failure_threshold):
+                Log.Warn("Opening circuit of service '{}' for {} seconds after {} failures".format(
+                    self.service, cool_down_in_seconds, self.failures))
+                self.opened_at = time.time()
+                self.probing = False
+
+
+def get_breaker(service):
+    """
+    Returns the shared breaker of the service, it is created on first use.
+    :type service: str
+    :rtype: CircuitBreaker
+    """
+    with breakers_lock:
+        if service not in breakers:
+            breakers[service] = CircuitBreaker(service)
+        return breakers[service]
+
+
+def is_open(service):
+    """
+    :type service: str
+    :rtype: bool
+    """
+    return get_breaker(service).is_open()
+
+
+def call(service, function, *args):
+    """
+    Calls the function through the circuit of the service.
+    Connection errors, timeouts and server errors of the service count as failures. Other errors, like a missing
+    item or a poster which could not be made, say nothing about the service and leave its circuit as it is.
+    :type service: str
+    :type function: function
+    """
+    breaker = get_breaker(service)
+    if not breaker.allow():
+        raise CircuitOpenError("Service '{}' is skipped until its cool-down has passed".format(service))
+    try:
+        result = function(*args)
+    except Exception as exception:
+        if is_failure(exception):
+            breaker.record_failure()
+        else:
+            breaker.release()
+        raise
+    breaker.record_success()
+    return result
+
+
+def is_failure(exception):
+    """
+    :type exception: Exception
+    :rtype: bool
+    """
+    if isinstance(exception, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exception, requests.HTTPError):
+        return exception.response is not None and exception.response.status_code >= 500
+    return False
@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+import mock
+import requests
+
+from utility import circuit_helper
+
+
+class Test(TestCase):
+
+    def setUp(self):
+        self.breakers = mock.patch.object(circuit_helper, 'breakers', {})
+        self.breakers.start()
+
+    def tearDown(self):
+        self.breakers.stop()
+
+    def test_call___opens_after_consecutive_failures(self):
+        function = mock.Mock(side_effect=requests.ConnectionError('down'))
+        for _ in range(circuit_helper.failure_threshold):
+            self.assertRaises(requests.ConnectionError, circuit_helper.call, 's_cute', function)
+        self.assertTrue(circuit_helper.is_open('s_cute'))
+        self.assertRaises(circuit_helper.CircuitOpenError, circuit_helper.call, 's_cute', function)
+        self.assertEqual(circuit_helper.failure_threshold, function.call_count)
+        self.assertFalse(circuit_helper.is_open('heyzo'))
+
+    def test_call___other_errors_are_not_failures(self):
+        for _ in range(circuit_helper.failure_threshold):
+            self.assertRaises(ValueError, circuit_helper.call, 's_cute', mock.Mock(side_effect=ValueError('no item')))
+        self.assertFalse(circuit_helper.is_open('s_cute'))
+
+    def test_call___other_errors_do_not_reset_failures(self):
+        for _ in range(circuit_helper.failure_threshold):
+            self.assertRaises(IOError, circuit_helper.call, 'fanza', mock.Mock(side_effect=IOError('Failed to get any poster')))
+            self.assertRaises(requests.ConnectionError, circuit_helper.call, 'fanza', mock.Mock(side_effect=requests.ConnectionError('down')))
+        self.assertTrue(circuit_helper.is_open('fanza'))
+
+    def test_call___single_probe_after_cool_down(self):
+        breaker = circuit_helper.get_breaker('knights_visual')
+        with mock.patch.object(circuit_helper.time, 'time', return_value=1000.0):
+            for _ in range(circuit_helper.failure_threshold):
+                breaker.record_failure()
+        with mock.patch.object(circuit_helper.time, 'time', return_value=1000.0 + circuit_helper.cool_down_in_seconds):
+            self.assertFalse(circuit_helper.is_open('knights_visual'))
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+            breaker.record_failure()
+            self.assertTrue(circuit_helper.is_open('knights_visual'))
+        with mock.patch.object(circuit_helper.time, 'time', return_value=1000.0 + 2 * circuit_helper.cool_down_in_seconds):
+            self.assertEqual('item', circuit_helper.call('knights_visual', lambda: 'item'))
+            self.assertTrue(breaker.allow())
+            self.assertTrue(breaker.allow())
@@ -0,0 +1,181 @@
+import multiprocessing
+import os
+import threading
+import time
+from cPickle import dumps, PicklingError
+
+import sentry_sdk
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError, wait
+
+from plex.log import Log
+
+max_workers_by_pool = {
+    'search': 8,
+    'fanza': 4,
+    'images': 8,
+    'default': 4,
+}
+
+executors = {}
+executors_lock = threading.Lock()
+
+max_processes = max(1, min(4, multiprocessing.cpu_count() - 1))
+process_timeout_in_seconds = 60
+process_executor = None  # type: ProcessPoolExecutor
+process_pool_enabled = False  # opt-in until forking worker processes is shown to be safe inside the plex script host
+process_pool_available = hasattr(os, 'fork')  # worker processes must be forked, plex cannot start new interpreters
+picklable_by_function = {}
+process_executor_lock = threading.Lock()
+
+
+def get_executor(pool='default'):
+    """
+    Returns the shared thread pool with the given name, it is created on first use.
+    :type pool: str
+    :rtype: ThreadPoolExecutor
+    """
+    with executors_lock:
+        if pool not in executors:
+            max_workers = max_workers_by_pool.get(pool, max_workers_by_pool['default'])
+            Log.Debug("Creating thread pool '{}' with {} workers".format(pool, max_workers))
+            executors[pool] = ThreadPoolExecutor(max_workers=max_workers)
+        return executors[pool]
+
+
+def run_all(calls, timeout_in_seconds, pool='default'):
+    """
+    Runs all calls concurrently and waits until they are done or the deadline is reached.
+    Results are returned in the same order as the calls, failed or timed out calls give None.
+    :type calls: list[(function, tuple)]
+    :type timeout_in_seconds: float
+    :type pool: str
+    :rtype: list
+    """
+    executor = get_executor(pool)
+    futures = [executor.submit(run_safely, function, *args) for function, args in calls]
+    done, not_done = wait(futures, timeout=timeout_in_seconds)
+    if len(not_done) > 0:
+        Log.Warn("{} of {} calls did not finish within {} seconds".format(len(not_done), len(futures), timeout_in_seconds))
+        for future in not_done:
+            future.cancel()
+    return [future.result() if future in done else None for future in futures]
+
+
+def run_first(calls, timeout_in_seconds, pool='default'):
+    """
+    Runs all calls concurrently and returns the index and result of the first call, in the order of the calls,
+    which gives something other than None. It returns as soon as the calls before that one have failed,
+    the calls after it are cancelled if they have not started yet. Gives (None, None) if no call succeeds in time.
+    :type calls: list[(function, tuple)]
+    :type timeout_in_seconds: float
+    :type pool: str
+    :rtype: (int, object)
+    """
+    executor = get_executor(pool)
+    futures = [executor.submit(run_safely, function, *args) for function, args in calls]
+    deadline_in_seconds = time.time() + timeout_in_seconds
+    try:
+        for index, future in enumerate(futures):
+            try:
+                result = future.result(timeout=max(0.0, deadline_in_seconds - time.time()))
+            except TimeoutError:
+                Log.Warn("Call {} of {} did not finish within {} seconds".format(index + 1, len(futures), timeout_in_seconds))
+                continue
+            if result is not None:
+                return index, result
+        return None, None
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def run_safely(function, *args):
+    """
+    Runs the function and reports the exception instead of raising it, so one failure does not affect others.
+    :type function: function
+    """
+    try:
+        return function(*args)
+    except Exception as exception:
+        Log.Error("Failed to run {}: {}".format(getattr(function, '__name__', function), exception))
+        sentry_sdk.capture_exception()
+        return None
+
+
+def start_process_pool():
+    """
+    Starts the shared process pool for cpu bound work if it is enabled, otherwise cpu bound work runs in the calling
+    threads. The workers are forked from a process which already runs threads, whose locks they inherit in any state,
+    so everything the workers need must be imported before, and work sent to them must not import, log or report.
+    """
+    global process_executor, process_pool_available
+    with process_executor_lock:
+        if not process_pool_enabled or process_executor is not None or not process_pool_available:
+            return
+        try:
+            Log.Debug("Starting process pool with {} workers".format(max_processes))
+            process_executor = ProcessPoolExecutor(max_workers=max_processes)
+            process_executor.submit(int).result(timeout=process_timeout_in_seconds)  # forks the workers now, not on first use
+        except Exception as exception:
+            if process_executor is not None:
+                process_executor.shutdown(wait=False)
+            Log.Warn("Process pool is not available, work runs in threads instead: {}".format(exception))
+            process_executor = None
+            process_pool_available = False
+
+
+def get_process_executor():
+    """
+    Returns the shared process pool, or None if it has not been started or processes are not available on this system.
+    :rtype: ProcessPoolExecutor
+    """
+    with process_executor_lock:
+        return process_executor
+
+
+def disable_process_pool():
+    global process_executor, process_pool_available
+    with process_executor_lock:
+        process_pool_available = False
+        if process_executor is not None:
+            process_executor.shutdown(wait=False)
+            process_executor = None
+
+
+def is_picklable(function):
+    """
+    Module level functions are sent to the worker processes by name, any other function must run in the caller.
+    :type function: function
+    :rtype: bool
+    """
+    if function not in picklable_by_function:
+        try:
+            dumps(function)
+            picklable_by_function[function] = True
+        except (PicklingError, TypeError, AttributeError):
+            picklable_by_function[function] = False
+    return picklable_by_function[function]
+
+
+def run_in_process(function, *args):
+    """
+    Runs cpu bound work in the process pool, so it does not hold the interpreter lock of the agent threads.
+    The arguments and the result are pickled, keep them to plain data such as bytes and strings.
+    Falls back to running the function in the calling thread when the process pool cannot be used.
+    Exceptions raised by the function are raised to the caller.
+    :type function: function
+    """
+    executor = get_process_executor() if is_picklable(function) else None
+    if executor is None:
+        return function(*args)
+    try:
+        future = executor.submit(function, *args)
+    except RuntimeError as exception:  # the pool has been shut down
+        Log.Warn("Failed to submit {} to process pool: {}".format(function.__name__, exception))
+        return function(*args)
+    try:
+        return future.result(timeout=process_timeout_in_seconds)
+    except TimeoutError:
+        Log.Error("Process pool did not finish {} within {} seconds, it is disabled".format(function.__name__, process_timeout_in_seconds))
+        disable_process_pool()
+        return function(*args)
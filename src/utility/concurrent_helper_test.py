@@ -0,0 +1,85 @@
+import os
+import time
+from unittest import TestCase
+
+import mock
+
+from utility import concurrent_helper
+
+
+def sleep_and_return(seconds, value):
+    time.sleep(seconds)
+    return value
+
+
+def raise_error():
+    raise ValueError("expected")
+
+
+def get_process_id():
+    return os.getpid()
+
+
+class Test(TestCase):
+
+    def test_run_all___results_in_order(self):
+        calls = [(sleep_and_return, (0.2, 'a')), (sleep_and_return, (0.0, 'b')), (sleep_and_return, (0.1, 'c'))]
+        self.assertEqual(['a', 'b', 'c'], concurrent_helper.run_all(calls, 5))
+
+    def test_run_all___runs_concurrently(self):
+        start_time_in_seconds = time.time()
+        calls = [(sleep_and_return, (0.3, index)) for index in range(4)]
+        self.assertEqual([0, 1, 2, 3], concurrent_helper.run_all(calls, 5, pool='search'))
+        self.assertLess(time.time() - start_time_in_seconds, 1.0)
+
+    def test_run_all___failed_call_gives_none(self):
+        calls = [(raise_error, ()), (sleep_and_return, (0, 'b'))]
+        self.assertEqual([None, 'b'], concurrent_helper.run_all(calls, 5))
+
+    def test_run_all___timed_out_call_gives_none(self):
+        calls = [(sleep_and_return, (1.0, 'a')), (sleep_and_return, (0, 'b'))]
+        self.assertEqual([None, 'b'], concurrent_helper.run_all(calls, 0.3))
+
+    def test_get_executor___shared_by_name(self):
+        self.assertIs(concurrent_helper.get_executor('search'), concurrent_helper.get_executor('search'))
+        self.assertIsNot(concurrent_helper.get_executor('search'), concurrent_helper.get_executor('default'))
+
+    def test_run_first___first_available_in_order(self):
+        calls = [(raise_error, ()), (sleep_and_return, (0.2, None)), (sleep_and_return, (0.3, 'c')), (sleep_and_return, (0, 'd'))]
+        self.assertEqual((2, 'c'), concurrent_helper.run_first(calls, 5, pool='images'))
+
+    def test_run_first___does_not_wait_for_later_calls(self):
+        start_time_in_seconds = time.time()
+        calls = [(sleep_and_return, (0.1, 'a')), (sleep_and_return, (1.0, 'b'))]
+        self.assertEqual((0, 'a'), concurrent_helper.run_first(calls, 5, pool='images'))
+        self.assertLess(time.time() - start_time_in_seconds, 0.5)
+
+    def test_run_first___none_available(self):
+        calls = [(raise_error, ()), (sleep_and_return, (1.0, 'b'))]
+        self.assertEqual((None, None), concurrent_helper.run_first(calls, 0.3))
+
+    def test_run_in_process___runs_in_worker_process(self):
+        with mock.patch.object(concurrent_helper, 'process_pool_enabled', True):
+            concurrent_helper.start_process_pool()
+        self.assertNotEqual(os.getpid(), concurrent_helper.run_in_process(get_process_id))
+        self.assertEqual('a', concurrent_helper.run_in_process(sleep_and_return, 0, 'a'))
+
+    def test_run_in_process___raises_error_of_function(self):
+        with mock.patch.object(concurrent_helper, 'process_pool_enabled', True):
+            concurrent_helper.start_process_pool()
+        self.assertRaises(ValueError, concurrent_helper.run_in_process, raise_error)
+
+    def test_run_in_process___runs_unpicklable_function_in_caller(self):
+        self.assertEqual(os.getpid(), concurrent_helper.run_in_process(lambda: os.getpid()))
+
+    def test_run_in_process___runs_in_caller_without_process_pool(self):
+        with mock.patch.object(concurrent_helper, 'process_pool_available', False), \
+                mock.patch.object(concurrent_helper, 'process_executor', None):
+            self.assertEqual(os.getpid(), concurrent_helper.run_in_process(get_process_id))
+
+    def test_run_in_process___runs_in_caller_unless_process_pool_is_enabled(self):
+        with mock.patch.object(concurrent_helper, 'process_pool_available', True), \
+                mock.patch.object(concurrent_helper, 'process_executor', None):
+            concurrent_helper.start_process_pool()
+            self.assertEqual(os.getpid(), concurrent_helper.run_in_process(get_process_id))
+            self.assertIsNone(concurrent_helper.process_executor)
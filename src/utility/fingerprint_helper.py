@@ -0,0 +1,69 @@
+import hashlib
+
+from plex.log import Log
+from utility import cache_helper
+
+save_fingerprints = True  # disabled by the library warm-up, which resolves titles without applying them to plex
+
+
+class Fingerprints(object):
+    """
+    Fingerprints of the source records last applied to a title, so an incremental update only applies the parts
+    whose records have changed since. They are saved once the whole update is done.
+    """
+
+    def __init__(self, metadata_id, incremental):
+        """
+        :type metadata_id: str
+        :param incremental: parts are skipped only when this is set, otherwise every part counts as changed
+        :type incremental: bool
+        """
+        self.metadata_id = metadata_id
+        self.incremental = incremental
+        self.previous = {}
+        self.current = {}
+        if incremental:
+            try:
+                self.previous = cache_helper.get_fingerprints(metadata_id)
+            except Exception as exception:
+                Log.Warn("Failed to read fingerprints of {}: {}".format(metadata_id, exception))
+
+    def changed(self, part, *records):
+        """
+        :type part: str
+        :rtype: bool
+        """
+        fingerprint = get_fingerprint(records)
+        self.current[part] = fingerprint
+        if self.incremental and self.previous.get(part) == fingerprint:
+            Log.Info("Skipping {} of {}, they have not changed since the last update".format(part, self.metadata_id))
+            return False
+        return True
+
+    def save(self):
+        if not save_fingerprints:
+            return
+        try:
+            cache_helper.put_fingerprints(self.metadata_id, self.current)
+        except Exception as exception:
+            Log.Warn("Failed to save fingerprints of {}: {}".format(self.metadata_id, exception))
+
+
+def get_fingerprint(record):
+    """
+    :rtype: str
+    """
+    return hashlib.sha1(repr(to_plain_value(record))).hexdigest()
+
+
+def to_plain_value(value):
+    """
+    Converts objects into their attributes and dicts into sorted items, so equal records always have the same repr.
+    """
+    if isinstance(value, dict):
+        return sorted((key, to_plain_value(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return [to_plain_value(item) for item in value]
+    if hasattr(value, '__dict__'):
+        return [type(value).__name__, to_plain_value(vars(value))]
+    return value
@@ -0,0 +1,53 @@
+import datetime
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import mock
+from munch import munchify
+
+from utility import cache_helper
+from utility import fingerprint_helper
+
+
+class Item(object):
+    def __init__(self, title):
+        self.title = title
+        self.release_date = datetime.date(2020, 6, 1)
+        self.tags = [munchify({'name': u'tag', 'id': 1})]
+
+
+class Test(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.database_path = mock.patch.object(cache_helper, 'database_path', os.path.join(self.directory, 'cache.db'))
+        self.database_path.start()
+        cache_helper.close()
+
+    def tearDown(self):
+        cache_helper.close()
+        self.database_path.stop()
+        shutil.rmtree(self.directory)
+
+    def test_changed___skips_unchanged_parts_of_incremental_update(self):
+        fingerprints = fingerprint_helper.Fingerprints('heyzo-2272', False)
+        self.assertTrue(fingerprints.changed('fields', Item(u'title'), None))
+        self.assertTrue(fingerprints.changed('images', "https://www.heyzo.com/2272.jpg"))
+        fingerprints.save()
+        fingerprints = fingerprint_helper.Fingerprints('heyzo-2272', True)
+        self.assertFalse(fingerprints.changed('fields', Item(u'title'), None))
+        self.assertTrue(fingerprints.changed('images', "https://www.heyzo.com/2272_new.jpg"))
+        self.assertTrue(fingerprint_helper.Fingerprints('heyzo-2273', True).changed('fields', Item(u'title'), None))
+
+    def test_changed___every_part_changed_unless_incremental(self):
+        fingerprints = fingerprint_helper.Fingerprints('heyzo-2272', False)
+        fingerprints.changed('fields', Item(u'title'))
+        fingerprints.save()
+        self.assertTrue(fingerprint_helper.Fingerprints('heyzo-2272', False).changed('fields', Item(u'title')))
+
+    def test_get_fingerprint___by_value(self):
+        self.assertEqual(fingerprint_helper.get_fingerprint(Item(u'title')), fingerprint_helper.get_fingerprint(Item(u'title')))
+        self.assertNotEqual(fingerprint_helper.get_fingerprint(Item(u'title')), fingerprint_helper.get_fingerprint(Item(u'other')))
+        self.assertEqual(fingerprint_helper.get_fingerprint({'a': 1, 'b': 2}), fingerprint_helper.get_fingerprint({'b': 2, 'a': 1}))
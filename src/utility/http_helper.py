@@ -0,0 +1,256 @@
+import cgi
+import threading
+from urlparse import urlparse
+
+import requests
+from pyquery import PyQuery
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError
+
+from plex.log import Log
+from utility import cache_helper
+from utility import cassette_helper
+from utility import rate_limit_helper
+
+pool_connections = 4
+pool_maxsize = 16
+timeout_in_seconds = 30
+
+sessions = {}
+sessions_lock = threading.Lock()
+stats = {}
+stats_lock = threading.Lock()
+
+
+class Adapter(HTTPAdapter):
+    """
+    Counts requests and the bytes read from them by host, and records or replays them when a cassette is in use.
+    Requests sent to the network are paced by the rate limit of their host.
+    """
+
+    def send(self, request, **kwargs):
+        cassette = cassette_helper.get_active_cassette()
+        recorded_body = None
+        if cassette is not None and not cassette.recording:
+            response = cassette.play(request, self)
+        else:
+            rate_limit_helper.acquire(request.url)
+            try:
+                response = super(Adapter, self).send(request, **kwargs)
+            except requests.ConnectionError as error:
+                if len(error.args) > 0 and isinstance(error.args[0], ProtocolError):  # reset or aborted by the host
+                    rate_limit_helper.report_failure(request.url)
+                raise
+            rate_limit_helper.report_response(request.url, response.status_code, response.headers)
+            if cassette is not None:
+                recorded_body = cassette.record(request, response)
+        count(request.url, 1, 0)
+        response.raw = CountedStream(response.raw, request.url, recorded_body)
+        return response
+
+
+class CountedStream(object):
+    """
+    Wraps the raw stream of a response to count the bytes read from it, and to record them into a cassette.
+    Reading stops early for streamed probes and the body may be chunked, so the Content-Length says neither.
+    """
+
+    def __init__(self, raw, url, recorded_body=None):
+        """
+        :type raw: urllib3.HTTPResponse
+        :type url: str
+        :type recorded_body: Optional[bytearray]
+        """
+        self.raw = raw
+        self.url = url
+        self.recorded_body = recorded_body
+
+    def read(self, *args, **kwargs):
+        return self.consume(self.raw.read(*args, **kwargs))
+
+    def stream(self, *args, **kwargs):
+        for data in self.raw.stream(*args, **kwargs):
+            yield self.consume(data)
+
+    def consume(self, data):
+        count(self.url, 0, len(data))
+        if self.recorded_body is not None:
+            self.recorded_body.extend(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+def count(url, request_count, size):
+    """
+    :type url: str
+    :type request_count: int
+    :type size: int
+    """
+    host = urlparse(url).netloc.lower()
+    with stats_lock:
+        host_stats = stats.setdefault(host, {'requests': 0, 'bytes': 0})
+        host_stats['requests'] += request_count
+        host_stats['bytes'] += size
+
+
+def get_stats():
+    """
+    Returns the number of requests and bytes read from their responses by host since the last reset.
+    :rtype: dict[str, dict[str, int]]
+    """
+    with stats_lock:
+        return dict((host, host_stats.copy()) for host, host_stats in stats.items())
+
+
+def reset_stats():
+    with stats_lock:
+        stats.clear()
+
+
+def get_session(url):
+    """
+    Returns the shared session of the url's host, so connections are kept alive and reused between requests.
+    :type url: str
+    :rtype: requests.Session
+    """
+    host = urlparse(url).netloc.lower()
+    with sessions_lock:
+        if host not in sessions:
+            Log.Debug("Creating http session for '{}' with {} connections".format(host, pool_maxsize))
+            session = requests.Session()
+            adapter = Adapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            sessions[host] = session
+        return sessions[host]
+
+
+def get(url, **kwargs):
+    """
+    :type url: str
+    :rtype: requests.Response
+    """
+    kwargs.setdefault('timeout', timeout_in_seconds)
+    return get_session(url).get(url, **kwargs)
+
+
+def head(url, **kwargs):
+    """
+    :type url: str
+    :rtype: requests.Response
+    """
+    kwargs.setdefault('timeout', timeout_in_seconds)
+    return get_session(url).head(url, **kwargs)
+
+
+def query(url, **kwargs):
+    """
+    Loads the page like PyQuery(url) does, but through the shared session of the url's host.
+    :type url: str
+    :rtype: PyQuery
+    """
+    kwargs.setdefault('timeout', timeout_in_seconds)
+    return PyQuery(url, session=get_session(url), **kwargs)
+
+
+def get_text(url, encoding=None, **kwargs):
+    """
+    Returns the decoded body, failed responses raise an HTTPError instead of being returned.
+    :type url: str
+    :type encoding: Optional[str]
+    :rtype: unicode
+    """
+    response = get(url, **kwargs)
+    response.raise_for_status()
+    if encoding is not None:
+        response.encoding = encoding
+    return response.text
+
+
+def get_json(url, **kwargs):
+    """
+    Returns the parsed json body, failed responses raise an HTTPError instead of being returned.
+    :type url: str
+    :rtype: dict
+    """
+    response = get(url, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+
+def get_if_modified(validators, url, **kwargs):
+    """
+    Sends a conditional request with the validators of a cached response,
+    raises NotModified if the server answers that the response has not changed.
+    :type validators: dict[str, str]
+    :type url: str
+    :rtype: requests.Response
+    """
+    headers = dict(kwargs.pop('headers', None) or {})
+    if 'ETag' in validators:
+        headers['If-None-Match'] = validators['ETag']
+    if 'Last-Modified' in validators:
+        headers['If-Modified-Since'] = validators['Last-Modified']
+    response = get(url, headers=headers, **kwargs)
+    if response.status_code == 304:
+        response.close()
+        raise cache_helper.NotModified(url)
+    response.raise_for_status()
+    return response
+
+
+def get_validators(response):
+    """
+    Returns the headers which can be sent back to revalidate the response.
+    :type response: requests.Response
+    :rtype: dict[str, str]
+    """
+    return dict((name, response.headers[name]) for name in ('ETag', 'Last-Modified') if response.headers.get(name))
+
+
+def get_text_if_modified(validators, url, encoding=None, **kwargs):
+    """
+    Like get_text, for cache_helper.get_or_revalidate.
+    :type validators: dict[str, str]
+    :type url: str
+    :type encoding: Optional[str]
+    :rtype: (unicode, dict[str, str])
+    """
+    response = get_if_modified(validators, url, **kwargs)
+    if encoding is not None:
+        response.encoding = encoding
+    return response.text, get_validators(response)
+
+
+def get_page_if_modified(validators, url, **kwargs):
+    """
+    Like get_if_modified, for cache_helper.get_or_revalidate. The page is returned as the bytes of the response
+    with the charset the response declares, so it is parsed without being decoded into text first.
+    :type validators: dict[str, str]
+    :type url: str
+    :rtype: ((str, Optional[str]), dict[str, str])
+    """
+    response = get_if_modified(validators, url, **kwargs)
+    return (response.content, get_charset(response)), get_validators(response)
+
+
+def get_charset(response):
+    """
+    Returns the charset of the Content-Type header, or None if the page has to declare it itself.
+    :type response: requests.Response
+    :rtype: Optional[str]
+    """
+    return cgi.parse_header(response.headers.get('Content-Type', ''))[1].get('charset')
+
+
+def get_json_if_modified(validators, url, **kwargs):
+    """
+    Like get_json, for cache_helper.get_or_revalidate.
+    :type validators: dict[str, str]
+    :type url: str
+    :rtype: (dict, dict[str, str])
+    """
+    response = get_if_modified(validators, url, **kwargs)
+    return response.json(), get_validators(response)
@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+import mock
+
+from utility import cache_helper
+from utility import http_helper
+
+
+class Test(TestCase):
+
+    def test_get_session___shared_by_host(self):
+        session = http_helper.get_session("https://www.heyzo.com/moviepages/0001/index.html")
+        self.assertIs(session, http_helper.get_session("https://WWW.HEYZO.COM/listpages/all_1.html"))
+        self.assertIsNot(session, http_helper.get_session("https://api.dmm.com/affiliate/v3/ItemList"))
+
+    def test_get_session___pooled_adapter(self):
+        adapter = http_helper.get_session("https://pics.dmm.co.jp/digital/video/ssni00558/ssni00558pl.jpg").get_adapter("https://pics.dmm.co.jp")
+        self.assertEqual(http_helper.pool_maxsize, adapter._pool_maxsize)
+
+    def test_get___default_timeout(self):
+        url = "https://www.caribbeancompr.com/moviepages/123456_123/index.html"
+        with mock.patch.object(http_helper.get_session(url), 'get') as get:
+            http_helper.get(url)
+            http_helper.get(url, timeout=5)
+        self.assertEqual([mock.call(url, timeout=http_helper.timeout_in_seconds), mock.call(url, timeout=5)], get.call_args_list)
+
+    def test_get_if_modified___not_modified(self):
+        url = "https://www.heyzo.com/moviepages/2272/index.html"
+        validators = {'ETag': '"abc"', 'Last-Modified': 'Mon, 01 Jun 2020 00:00:00 GMT'}
+        with mock.patch.object(http_helper.get_session(url), 'get', return_value=mock.Mock(status_code=304)) as get:
+            self.assertRaises(cache_helper.NotModified, http_helper.get_if_modified, validators, url)
+        get.assert_called_once_with(url, timeout=http_helper.timeout_in_seconds,
+                                    headers={'If-None-Match': '"abc"', 'If-Modified-Since': 'Mon, 01 Jun 2020 00:00:00 GMT'})
+
+    def test_get_text_if_modified___returns_validators(self):
+        url = "https://www.heyzo.com/moviepages/2272/index.html"
+        response = mock.Mock(status_code=200, text=u'html', headers={'ETag': '"abc"', 'Content-Type': 'text/html'})
+        with mock.patch.object(http_helper.get_session(url), 'get', return_value=response):
+            self.assertEqual((u'html', {'ETag': '"abc"'}), http_helper.get_text_if_modified({}, url))
+
+    def test_get_page_if_modified___returns_bytes_and_charset(self):
+        url = "https://www.heyzo.com/moviepages/2272/index.html"
+        response = mock.Mock(status_code=200, content=b'html', headers={'ETag': '"abc"', 'Content-Type': 'text/html; charset=UTF-8'})
+        with mock.patch.object(http_helper.get_session(url), 'get', return_value=response):
+            self.assertEqual(((b'html', 'UTF-8'), {'ETag': '"abc"'}), http_helper.get_page_if_modified({}, url))
+        response.headers = {'Content-Type': 'text/html'}
+        with mock.patch.object(http_helper.get_session(url), 'get', return_value=response):
+            self.assertEqual(((b'html', None), {}), http_helper.get_page_if_modified({}, url))
@@ -1,30 +1,120 @@
 import io
 import struct
+import threading
 
-import requests
 import sentry_sdk
+from typing import Optional
 
 from plex.log import Log
+from utility import cache_helper
+from utility import concurrent_helper
+from utility import http_helper
 
-try:
-    from PIL import Image
-    from imagehash import average_hash
-except ImportError as error:
-    sentry_sdk.capture_exception(error)
-    Log.Warn(error)  # noqa
-    Image, average_hash = None, None
+Image, average_hash, hex_to_hash = None, None, None
+image_libraries_available = None  # type: Optional[bool]
+image_libraries_lock = threading.Lock()
+can_analyze_images = None  # type: Optional[bool]  # detected when the image libraries are loaded, unless overridden
 
-can_analyze_images = Image is not None and average_hash is not None
-Log.Info("Numpy and PIL are {}".format('working' if can_analyze_images else 'not working'))
+probe_chunk_size_in_bytes = 2048
+max_probe_size_in_bytes = 256 * 1024
+min_header_size_in_bytes = 24  # enough to recognize gif, png and jpeg headers
+candidate_timeout_in_seconds = 60
+hash_draft_size = (64, 64)  # jpegs are decoded at 1/2 to 1/8 of their size for hashing, but not smaller than this
 
 
-def add_padding_to_image_as_poster(image_url, background_color=(0, 0, 0)):
+def load_image_libraries():
     """
+    Imports PIL, numpy and imagehash on first use instead of on agent startup, as they take a while to load.
+    :rtype: bool
+    """
+    global Image, average_hash, hex_to_hash, image_libraries_available, can_analyze_images
+    if image_libraries_available is not None:  # no lock or logging once loaded, as in the image worker processes
+        return image_libraries_available
+    with image_libraries_lock:
+        if image_libraries_available is None:
+            try:
+                from PIL import Image
+                from imagehash import average_hash, hex_to_hash
+                image_libraries_available = True
+            except ImportError as error:
+                sentry_sdk.capture_exception(error)
+                Log.Warn(error)  # noqa
+                image_libraries_available = False
+            Log.Info("Numpy and PIL are {}".format('working' if image_libraries_available else 'not working'))
+            if can_analyze_images is None:
+                can_analyze_images = image_libraries_available
+        return image_libraries_available
+
+
+def start_image_workers():
+    """
+    Starts the image worker processes if the process pool is enabled. The image libraries are loaded before the
+    workers are forked, so the workers have them already and never import them, log or report on their own.
+    """
+    if concurrent_helper.process_pool_enabled and load_image_libraries():
+        concurrent_helper.start_process_pool()
+
+
+def is_image_analysis_available():
+    """
+    :rtype: bool
+    """
+    if can_analyze_images is None:
+        load_image_libraries()
+    return can_analyze_images
+
+
+def get_padded_poster_data_if_modified(image_url, poster_exists, background_color=(0, 0, 0)):
+    """
+    Downloads the image and pads it as a poster, or returns None if the poster exists and its image has not changed
+    since it was made.
+    The validators of the image are cached like any other value, so they are evicted with the rest of the cache.
     :type image_url: str
-    :rtype: Image.Image
+    :type poster_exists: bool
+    :rtype: Optional[str]
+    """
+    validators = {}
+    if poster_exists:
+        try:
+            validators = cache_helper.get('images', image_url) or {}
+        except Exception as exception:
+            Log.Warn("Failed to read validators of {}: {}".format(image_url, exception))
+    try:
+        response = http_helper.get_if_modified(validators, image_url)
+    except cache_helper.NotModified:
+        Log.Debug("Image not modified: {}".format(image_url))
+        return None
+    try:
+        cache_helper.put('images', image_url, http_helper.get_validators(response))
+    except Exception as exception:
+        Log.Warn("Failed to save validators of {}: {}".format(image_url, exception))
+    return pad_poster_data(response.content, background_color)
+
+
+def pad_poster_data(image_data, background_color=(0, 0, 0)):
+    """
+    Pads the image as a poster and encodes it as jpeg in the image worker processes.
+    Images which already have the ratio of a poster are returned as they are, without decoding them.
+    :type image_data: str
+    :rtype: str
     """
-    image_data = get_data_from_image_url(image_url)
-    return add_padding_to_image_data_as_poster(image_data, background_color)
+    content_type, width, height = get_image_info(image_data)
+    if content_type != '' and has_poster_ratio(width, height):
+        return image_data
+    return run_image_work(pad_poster_data_in_worker, image_data, background_color)
+
+
+def has_poster_ratio(width, height):
+    """
+    :type width: int
+    :type height: int
+    :rtype: bool
+    """
+    return width > 0 and float(height) / width == 1.5
+
+
+def pad_poster_data_in_worker(image_data, background_color):
+    return convert_image_to_data(add_padding_to_image_data_as_poster(image_data, background_color))
 
 
 def add_padding_to_image_data_as_poster(image_data, background_color=(0, 0, 0)):
@@ -32,9 +122,10 @@ def add_padding_to_image_data_as_poster(image_data, background_color=(0, 0, 0)):
     :type image_data: str
     :rtype: Image.Image
     """
+    load_image_libraries()
     image = Image.open(io.BytesIO(image_data))  # type: Image.Image
     width, height = image.size
-    if float(height) / width == 1.5:
+    if has_poster_ratio(width, height):
         return image
     elif float(height) / width < 1.5:
         expected_height = int(float(width) * 1.5)
@@ -53,7 +144,8 @@ def crop_square_from_top_left(image_url):
     :type image_url: str
     :rtype: Image.Image
     """
-    image_data = requests.get(image_url).content
+    load_image_libraries()
+    image_data = http_helper.get(image_url).content
     image = Image.open(io.BytesIO(image_data))  # type: Image.Image
     width, height = image.size
     if height == width:
@@ -78,12 +170,30 @@ def does_image_exist(image_url):
 
 def get_image_info_from_url(image_url):
     """
+    Streams the image and stops reading as soon as its header can be parsed, the connection is closed after that.
     Found this solution from https://stackoverflow.com/a/30685578
     :type image_url: str
     :rtype: (str, int, int)
     """
-    request = requests.get(image_url, headers={"Range": "bytes=0-166"})  # might need to adjust this
-    return get_image_info(request.content)
+    headers = {"Range": "bytes=0-{}".format(max_probe_size_in_bytes - 1)}  # some servers ignore this and send everything
+    response = http_helper.get(image_url, headers=headers, stream=True)
+    data = b''
+    info = ('', -1, -1)
+    try:
+        for chunk in response.iter_content(probe_chunk_size_in_bytes):
+            data += chunk
+            info = get_image_info(data)
+            content_type, width, height = info
+            if width != -1 and height != -1:
+                break
+            if content_type == '' and len(data) >= min_header_size_in_bytes:
+                break
+            if len(data) >= max_probe_size_in_bytes:
+                break
+    finally:
+        response.close()
+    Log.Debug("Probed {} bytes of image: {}".format(len(data), image_url))
+    return info
 
 
 def get_image_info(data):  # noqa: C901
@@ -152,52 +262,249 @@ def get_image_info(data):  # noqa: C901
             pass
         except ValueError:
             pass
+        except TypeError:  # data ends before the size is found
+            pass
 
     return content_type, width, height
 
 
-def are_similar(url_1, url_2):
-    if can_analyze_images:
-        type_1, width_1, height_1 = get_image_info_from_url(url_1)
-        type_2, width_2, height_2 = get_image_info_from_url(url_2)
+class ImageContext(object):
+    """
+    Keeps the images used within one update, so that each url is downloaded, decoded and hashed at most once.
+    Hashes are also persisted with the image's ETag or Last-Modified, later updates only revalidate them.
+    It can be shared by threads checking candidates concurrently, each url is handled by one thread at a time.
+    """
+
+    def __init__(self):
+        self.data_by_url = {}
+        self.validator_by_url = {}
+        self.image_by_url = {}
+        self.info_by_url = {}
+        self.hash_by_url = {}
+        self.loaded_urls = set()
+        self.lock_by_url = {}
+        self.lock = threading.Lock()
+
+    def get_lock(self, url):
+        """
+        :type url: str
+        :rtype: threading.RLock
+        """
+        with self.lock:
+            if url not in self.lock_by_url:
+                self.lock_by_url[url] = threading.RLock()
+            return self.lock_by_url[url]
+
+    def get_data(self, url):
+        """
+        :type url: str
+        :rtype: str
+        """
+        with self.get_lock(url):
+            if url not in self.data_by_url:
+                response = http_helper.get(url)
+                self.data_by_url[url] = response.content
+                self.validator_by_url[url] = get_validator(response.headers)
+            return self.data_by_url[url]
+
+    def get_image(self, url):
+        """
+        :type url: str
+        :rtype: Image.Image
+        """
+        with self.get_lock(url):
+            if url not in self.image_by_url:
+                load_image_libraries()
+                self.image_by_url[url] = Image.open(io.BytesIO(self.get_data(url)))
+            return self.image_by_url[url]
+
+    def get_info(self, url):
+        """
+        :type url: str
+        :rtype: (str, int, int)
+        """
+        with self.get_lock(url):
+            self.load_hash_record(url)
+            if url not in self.info_by_url:
+                self.info_by_url[url] = get_image_info(self.get_data(url))
+            return self.info_by_url[url]
+
+    def get_hash(self, url):
+        """
+        :type url: str
+        :rtype: imagehash.ImageHash
+        """
+        with self.get_lock(url):
+            self.load_hash_record(url)
+            if url not in self.hash_by_url:
+                self.hash_by_url[url] = hex_to_hash(run_image_work(get_hash_of_data_in_worker, self.get_data(url)))
+                self.save_hash_record(url)
+            return self.hash_by_url[url]
+
+    def load_hash_record(self, url):
+        """
+        Uses the persisted info and hash of the url if the image has not changed since it was analyzed.
+        :type url: str
+        """
+        if url in self.loaded_urls or url in self.data_by_url:
+            return
+        self.loaded_urls.add(url)
+        try:
+            record = cache_helper.get('image_hashes', url)
+            if record is None:
+                return
+            if record['validator'] is not None and record['validator'] != get_validator(http_helper.head(url).headers):
+                Log.Debug("Image has changed since it was analyzed: {}".format(url))
+                return
+            load_image_libraries()
+            self.info_by_url[url] = (record['content_type'], record['width'], record['height'])
+            self.hash_by_url[url] = hex_to_hash(record['average_hash'])
+        except Exception as exception:
+            Log.Warn("Failed to load image hash of {}: {}".format(url, exception))
+
+    def save_hash_record(self, url):
+        """
+        :type url: str
+        """
+        try:
+            content_type, width, height = self.get_info(url)
+            cache_helper.put('image_hashes', url, {
+                'validator': self.validator_by_url.get(url),
+                'content_type': content_type,
+                'width': width,
+                'height': height,
+                'average_hash': str(self.hash_by_url[url]),
+            })
+        except Exception as exception:
+            Log.Warn("Failed to save image hash of {}: {}".format(url, exception))
+
+
+def get_validator(headers):
+    """
+    :type headers: dict
+    :rtype: Optional[str]
+    """
+    return headers.get('ETag') or headers.get('Last-Modified')
+
+
+def are_similar(url_1, url_2, context=None):
+    """
+    :type url_1: str
+    :type url_2: str
+    :type context: ImageContext
+    :rtype: bool
+    """
+    if is_image_analysis_available():
+        context = context or ImageContext()
+        type_1, width_1, height_1 = context.get_info(url_1)
+        type_2, width_2, height_2 = context.get_info(url_2)
         is_horizontal_1 = (width_1 - height_1) > 0
         is_horizontal_2 = (width_2 - height_2) > 0
         if is_horizontal_1 == is_horizontal_2:
-            image_1 = Image.open(io.BytesIO(requests.get(url_1).content))
-            image_2 = Image.open(io.BytesIO(requests.get(url_2).content))
-            return images_are_similar(image_1, image_2)
+            return hashes_are_similar(context.get_hash(url_1), context.get_hash(url_2))
     return False
 
 
-def crop_poster_data_from_cover_if_similar_to_small_poster(cover_url, small_poster_url):
-    if can_analyze_images:
-        poster = crop_poster_from_cover(cover_url)
-        poster_to_check = Image.open(io.BytesIO(requests.get(small_poster_url).content))
-        if images_are_similar(poster, poster_to_check):
-            return convert_image_to_data(poster)
+def crop_poster_data_from_cover_if_similar_to_small_poster(cover_url, small_poster_url, context=None):
+    """
+    :type cover_url: str
+    :type small_poster_url: str
+    :type context: ImageContext
+    :rtype: str
+    """
+    if is_image_analysis_available():
+        context = context or ImageContext()
+        small_poster_hash = str(context.get_hash(small_poster_url))
+        return run_image_work(crop_poster_data_if_similar_in_worker, context.get_data(cover_url), small_poster_hash)
     return None
 
 
+def crop_poster_data_if_similar_in_worker(cover_data, small_poster_hash):
+    """
+    :type cover_data: str
+    :type small_poster_hash: str
+    :rtype: str
+    """
+    poster = crop_poster_from_cover_image(Image.open(io.BytesIO(cover_data)))
+    if hashes_are_similar(average_hash(poster), hex_to_hash(small_poster_hash)):
+        return convert_image_to_data(poster)
+    return None
+
+
+def run_image_work(function, *args):
+    """
+    Runs the image work in the worker processes, with bytes and strings in and out.
+    :type function: function
+    """
+    load_image_libraries()  # when it runs in the calling thread, the worker processes have them loaded already
+    return concurrent_helper.run_in_process(function, *args)
+
+
 def convert_image_to_data(image):
     bytes_io = io.BytesIO()
     image.save(bytes_io, format='jpeg')
     return bytes_io.getvalue()
 
 
+def open_image_for_hash(image_data):
+    """
+    Decodes the image only as large as hashing needs, jpegs are scaled down while they are decoded.
+    :type image_data: str
+    :rtype: Image.Image
+    """
+    load_image_libraries()
+    image = Image.open(io.BytesIO(image_data))  # type: Image.Image
+    image.draft('L', get_draft_size(image.size))  # other formats ignore this and are decoded in full size
+    return image
+
+
+def get_draft_size(size):
+    """
+    Returns the size to ask the jpeg decoder for, so that the bundled Pillow 1.7.8, which picks the scale by the
+    larger side, and newer versions, which pick it by the smaller side, both scale by the same factor.
+    :type size: (int, int)
+    :rtype: (int, int)
+    """
+    scale = min(size[0] // hash_draft_size[0], size[1] // hash_draft_size[1])
+    scale = next((factor for factor in [8, 4, 2] if scale >= factor), 1)
+    return size[0] // scale, size[1] // scale
+
+
+def get_hash_of_data_in_worker(image_data):
+    """
+    The image is released when it goes out of scope, Pillow 1.7.8 has no Image.close.
+    :type image_data: str
+    :rtype: str
+    """
+    image = open_image_for_hash(image_data)  # sets average_hash when it runs in the calling thread
+    return str(average_hash(image))
+
+
 def images_are_similar(image_1, image_2):
-    hash_1 = average_hash(image_1)
-    hash_2 = average_hash(image_2)
+    load_image_libraries()
+    return hashes_are_similar(average_hash(image_1), average_hash(image_2))
+
+
+def hashes_are_similar(hash_1, hash_2):
     return hash_1 - hash_2 <= 8
 
 
-def crop_poster_from_cover(cover_url):
+def crop_poster_from_cover(cover_url, context=None):
     """
     :type cover_url: str
+    :type context: ImageContext
+    :rtype: Image.Image
+    """
+    context = context or ImageContext()
+    return crop_poster_from_cover_image(context.get_image(cover_url))
+
+
+def crop_poster_from_cover_image(cover_image):
+    """
+    :type cover_image: Image.Image
     :rtype: Image.Image
     """
-    cover_image_data = requests.get(cover_url).content
-    cover_image = Image.open(io.BytesIO(cover_image_data))  # type: Image.Image
-    (cover_content_type, cover_width, cover_height) = get_image_info(cover_image_data)
+    cover_width, cover_height = cover_image.size
     default_poster_height = 538.0
     default_poster_width = 379.0
     poster_height = cover_height
@@ -210,8 +517,33 @@ def crop_poster_from_cover(cover_url):
     return poster_image
 
 
-def get_data_from_image_url(image_url):
+def get_existing_image_data(image_url, context=None):
+    """
+    Downloads the image, or returns None if it does not exist.
+    :type image_url: str
+    :type context: ImageContext
+    :rtype: str
+    """
+    image_data = get_data_from_image_url(image_url, context)
+    if get_image_info(image_data) == ('', -1, -1):
+        return None
+    return image_data
+
+
+def get_first_candidate(calls):
+    """
+    Fetches all candidates at once, and returns the index and result of the first available one in order of the calls.
+    :type calls: list[(function, tuple)]
+    :rtype: (int, object)
+    """
+    return concurrent_helper.run_first(calls, candidate_timeout_in_seconds, pool='images')
+
+
+def get_data_from_image_url(image_url, context=None):
     """
     :type image_url: str
+    :type context: ImageContext
     """
-    return requests.get(image_url).content
+    if context is not None:
+        return context.get_data(image_url)
+    return http_helper.get(image_url).content
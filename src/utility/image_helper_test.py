@@ -1,17 +1,48 @@
 import io
+import os
+import shutil
+import struct
+import tempfile
 from unittest import TestCase
 
+import mock
 import requests
 from PIL import Image
 
+from utility import cache_helper
 from utility import image_helper
 
 
 # import PIL
 # import requests
 
+def get_url_if_similar(url, poster_url, context):
+    return url if image_helper.are_similar(url, poster_url, context) else None
+
+
 class Test(TestCase):
 
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.database_path = mock.patch.object(cache_helper, 'database_path', os.path.join(self.directory, 'cache.db'))
+        self.database_path.start()
+        cache_helper.close()
+        self.data_by_url = {}
+        self.etag_by_url = {}
+        for url, size in [('https://a/poster.jpg', (100, 150)), ('https://a/sample.jpg', (200, 300)), ('https://a/cover.jpg', (300, 200))]:
+            data = io.BytesIO()
+            Image.new('RGB', size, (255, 255, 255)).save(data, format='jpeg')
+            self.data_by_url[url] = data.getvalue()
+            self.etag_by_url[url] = '"{}"'.format(len(self.data_by_url))
+
+    def tearDown(self):
+        cache_helper.close()
+        self.database_path.stop()
+        shutil.rmtree(self.directory)
+
+    def get_response(self, url):
+        return mock.Mock(content=self.data_by_url[url], headers={'ETag': self.etag_by_url[url]})
+
     def test_get_image_info_from_url(self):
         self.assertEqual(('image/jpeg', 1280, 860), image_helper.get_image_info_from_url(
             "https://www.manulife.com.hk/content/dam/insurance/hk/images/home/mlf_trio_homepage_banner_1920x1290.jpg"
@@ -90,3 +121,101 @@ class Test(TestCase):
         new_image_data = image_helper.convert_image_to_data(image)
         new_image = Image.open(io.BytesIO(new_image_data))
         self.assertEqual(True, image_helper.images_are_similar(image, new_image))
+
+    def test_image_context___downloads_each_url_once(self):
+        get = mock.Mock(side_effect=self.get_response)
+        with mock.patch.object(image_helper.http_helper, 'get', get):
+            context = image_helper.ImageContext()
+            self.assertEqual(True, image_helper.are_similar('https://a/sample.jpg', 'https://a/poster.jpg', context))
+            self.assertEqual(False, image_helper.are_similar('https://a/cover.jpg', 'https://a/poster.jpg', context))
+            image_helper.crop_poster_data_from_cover_if_similar_to_small_poster('https://a/cover.jpg', 'https://a/poster.jpg', context)
+            image_helper.get_data_from_image_url('https://a/sample.jpg', context)
+        self.assertEqual(['https://a/sample.jpg', 'https://a/poster.jpg', 'https://a/cover.jpg'], [call[0][0] for call in get.call_args_list])
+
+    def test_image_context___reuses_persisted_hashes(self):
+        get = mock.Mock(side_effect=self.get_response)
+        head = mock.Mock(side_effect=self.get_response)
+        with mock.patch.object(image_helper.http_helper, 'get', get), mock.patch.object(image_helper.http_helper, 'head', head):
+            self.assertEqual(True, image_helper.are_similar('https://a/sample.jpg', 'https://a/poster.jpg', image_helper.ImageContext()))
+            self.assertEqual(2, get.call_count)
+            self.assertEqual(True, image_helper.are_similar('https://a/sample.jpg', 'https://a/poster.jpg', image_helper.ImageContext()))
+            self.assertEqual(2, get.call_count)
+            self.assertEqual(2, head.call_count)
+            self.etag_by_url['https://a/poster.jpg'] = '"changed"'
+            self.assertEqual(True, image_helper.are_similar('https://a/sample.jpg', 'https://a/poster.jpg', image_helper.ImageContext()))
+            self.assertEqual(3, get.call_count)
+
+    def test_get_image_info_from_url___stops_after_header(self):
+        image = io.BytesIO()
+        Image.new('RGB', (120, 80)).save(image, format='jpeg')
+        comment = b'\xff\xfe' + struct.pack('>H', 30000 + 2) + b'\x00' * 30000  # large segment before the size
+        data = image.getvalue()[:2] + comment + image.getvalue()[2:]
+        chunks = [data[index:index + 2048] for index in range(0, len(data), 2048)]
+        read_chunks = []
+
+        def iter_content(chunk_size):
+            for chunk in chunks:
+                read_chunks.append(chunk)
+                yield chunk
+
+        response = mock.Mock(iter_content=iter_content)
+        with mock.patch.object(image_helper.http_helper, 'get', mock.Mock(return_value=response)):
+            self.assertEqual(('image/jpeg', 120, 80), image_helper.get_image_info_from_url('https://a/image.jpg'))
+        self.assertLess(len(read_chunks), len(chunks))
+        response.close.assert_called_once_with()
+
+    def test_get_image_info___truncated_jpeg(self):
+        image = io.BytesIO()
+        Image.new('RGB', (120, 80)).save(image, format='jpeg')
+        self.assertEqual(('image/jpeg', -1, -1), image_helper.get_image_info(image.getvalue()[:100]))
+
+    def test_open_image_for_hash___decodes_jpeg_in_reduced_size(self):
+        image = Image.new('RGB', (800, 1200), (255, 255, 255))
+        image.paste((0, 0, 0), (0, 0, 400, 600))
+        image.paste((128, 128, 128), (400, 600, 800, 1200))
+        data = io.BytesIO()
+        image.save(data, format='jpeg')
+        reduced_image = image_helper.open_image_for_hash(data.getvalue())
+        self.assertEqual((100, 150), reduced_image.size)
+        self.assertEqual(True, image_helper.images_are_similar(image, reduced_image))
+
+    def test_get_draft_size___same_scale_by_larger_and_smaller_side(self):
+        for size, draft_size in [((800, 538), (100, 67)), ((800, 100), (800, 100)), ((147, 200), (73, 100)), ((40, 40), (40, 40))]:
+            self.assertEqual(draft_size, image_helper.get_draft_size(size))
+            scale = size[0] // draft_size[0]
+            for pick_scale in [min, max]:  # newer Pillow versions pick by the smaller side, 1.7.8 by the larger one
+                picked_scale = pick_scale(size[0] // draft_size[0], size[1] // draft_size[1])
+                self.assertEqual(scale, next(factor for factor in [8, 4, 2, 1] if picked_scale >= factor))
+
+    def test_get_padded_poster_data_if_modified___revalidates_with_cached_validators(self):
+        url = 'https://a/poster.jpg'
+        with mock.patch.object(image_helper.http_helper, 'get_if_modified', return_value=self.get_response(url)) as get_if_modified:
+            self.assertEqual(self.data_by_url[url], image_helper.get_padded_poster_data_if_modified(url, True))
+            get_if_modified.side_effect = cache_helper.NotModified()
+            self.assertIsNone(image_helper.get_padded_poster_data_if_modified(url, True))
+            image_helper.get_padded_poster_data_if_modified(url, False)
+        self.assertEqual([{}, {'ETag': self.etag_by_url[url]}, {}], [call[0][0] for call in get_if_modified.call_args_list])
+        self.assertEqual({'ETag': self.etag_by_url[url]}, cache_helper.get('images', url))
+
+    def test_pad_poster_data(self):
+        padded_data = image_helper.pad_poster_data(self.data_by_url['https://a/cover.jpg'])
+        self.assertEqual(('image/jpeg', 300, 450), image_helper.get_image_info(padded_data))
+
+    def test_pad_poster_data___keeps_poster_data_as_it_is(self):
+        with mock.patch.object(image_helper, 'run_image_work') as run_image_work:
+            self.assertIs(self.data_by_url['https://a/poster.jpg'], image_helper.pad_poster_data(self.data_by_url['https://a/poster.jpg']))
+        run_image_work.assert_not_called()
+
+    def test_get_existing_image_data(self):
+        responses = {'https://a/poster.jpg': self.get_response('https://a/poster.jpg'), 'https://a/missing.jpg': mock.Mock(content=b'<html>Not Found</html>')}
+        with mock.patch.object(image_helper.http_helper, 'get', mock.Mock(side_effect=lambda url: responses[url])):
+            self.assertEqual(self.data_by_url['https://a/poster.jpg'], image_helper.get_existing_image_data('https://a/poster.jpg'))
+            self.assertEqual(None, image_helper.get_existing_image_data('https://a/missing.jpg'))
+
+    def test_image_context___shared_by_candidates(self):
+        get = mock.Mock(side_effect=self.get_response)
+        with mock.patch.object(image_helper.http_helper, 'get', get):
+            context = image_helper.ImageContext()
+            calls = [(get_url_if_similar, (url, 'https://a/poster.jpg', context)) for url in ['https://a/cover.jpg', 'https://a/sample.jpg']]
+            self.assertEqual((1, 'https://a/sample.jpg'), image_helper.get_first_candidate(calls))
+        self.assertEqual(3, get.call_count)
@@ -1,6 +1,9 @@
+import atexit
+import collections
 import datetime
+import threading
 
-from mixpanel import Mixpanel
+from mixpanel import BufferedConsumer, Mixpanel, MixpanelException
 from requests import get
 
 import build_config
@@ -21,12 +24,9 @@ class Track:
 
     def __init__(self, user_id, test_mode):
         Log.Info("Initializing Mixpanel")
-        ip = self.get_ip()
         Log.Debug("user_id: {}".format(user_id))
         Log.Debug("token: {}".format(build_config.mixpanel_token))
-        Log.Debug("ip: {}".format(ip))
         self.mixpanel = MixpanelExtended(build_config.mixpanel_token, test_mode)  # type: Mixpanel
-        self.mixpanel.people_set(user_id, {'$first_name': build_config.hostname}, {'$ip': ip})
         self.user_id = user_id  # type: str
         self.search = Track.Search(self)
         self.version_info = {
@@ -40,11 +40,24 @@ class Track:
             'OS Name': build_config.os_name,
             'OS Version': build_config.os_version,
             'System Hostname': build_config.hostname,
-            'IP Address': ip
+            'IP Address': None
         }
 
+    def identify(self):
+        """
+        Looks up the public ip of this server, it needs a network request so it should not run on the startup path.
+        """
+        try:
+            ip = self.get_ip()
+        except Exception as exception:
+            Log.Warn("Failed to look up ip: {}".format(exception))
+            ip = None
+        Log.Debug("ip: {}".format(ip))
+        self.version_info['IP Address'] = ip
+        self.mixpanel.people_set(self.user_id, {'$first_name': build_config.hostname}, {'$ip': ip})
+
     def get_ip(self):
-        ip = get('https://api.ipify.org').text
+        ip = get('https://api.ipify.org', timeout=30).text
         return ip
 
     def installed(self):
@@ -124,10 +137,67 @@ class Track:
                 "Time Spent In Seconds": time_spent_in_seconds})
 
 
+class AsyncConsumer(object):
+    """
+    Queues messages in memory and sends them in batches from a worker thread, so tracking never waits for the network.
+    When the queue is full the oldest messages are dropped, and whatever is left is flushed when the process exits.
+    """
+
+    def __init__(self, max_queue_size=1000, batch_size=50, flush_interval_in_seconds=5.0):
+        """
+        :type max_queue_size: int
+        :type batch_size: int
+        :type flush_interval_in_seconds: float
+        """
+        self.batch_size = batch_size
+        self.flush_interval_in_seconds = flush_interval_in_seconds
+        self.queue = collections.deque(maxlen=max_queue_size)
+        self.condition = threading.Condition()
+        self.send_lock = threading.Lock()
+        self.consumer = BufferedConsumer(max_size=batch_size)
+        self.worker = None
+        atexit.register(self.flush)
+
+    def send(self, endpoint, json_message, api_key=None):
+        with self.condition:
+            if len(self.queue) == self.queue.maxlen:
+                Log.Warn("Mixpanel queue is full, dropping the oldest message")
+            self.queue.append((endpoint, json_message, api_key))
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, name='mixpanel')
+                self.worker.daemon = True
+                self.worker.start()
+            if len(self.queue) >= self.batch_size:
+                self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                if len(self.queue) < self.batch_size:
+                    self.condition.wait(self.flush_interval_in_seconds)
+            self.flush()
+
+    def flush(self):
+        """
+        Sends all queued messages, batched by the buffered consumer of mixpanel.
+        """
+        with self.condition:
+            messages = list(self.queue)
+            self.queue.clear()
+        with self.send_lock:
+            try:
+                for endpoint, json_message, api_key in messages:
+                    self.consumer.send(endpoint, json_message, api_key)
+                self.consumer.flush()
+            except MixpanelException as exception:
+                Log.Warn("Failed to send mixpanel messages, they are dropped: {}".format(exception))
+                self.consumer = BufferedConsumer(max_size=self.batch_size)
+
+
 class MixpanelExtended(Mixpanel):
 
     def __init__(self, token, test_mode):
-        super(MixpanelExtended, self).__init__(token)
+        super(MixpanelExtended, self).__init__(token, consumer=AsyncConsumer())
         self.test_mode = test_mode
 
     def track(self, distinct_id, event_name, properties=None, meta=None):
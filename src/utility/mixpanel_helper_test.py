@@ -0,0 +1,37 @@
+import time
+from unittest import TestCase
+
+import mock
+
+from utility import mixpanel_helper
+
+
+class Test(TestCase):
+
+    def test_async_consumer___drops_oldest_when_full(self):
+        consumer = mixpanel_helper.AsyncConsumer(max_queue_size=2, flush_interval_in_seconds=60)
+        consumer.consumer = mock.Mock()
+        for message in ['1', '2', '3']:
+            consumer.send('events', message)
+        consumer.flush()
+        self.assertEqual([mock.call('events', '2', None), mock.call('events', '3', None)], consumer.consumer.send.call_args_list)
+        consumer.consumer.flush.assert_called_once_with()
+
+    def test_async_consumer___sends_in_background(self):
+        consumer = mixpanel_helper.AsyncConsumer(batch_size=2, flush_interval_in_seconds=60)
+        consumer.consumer = mock.Mock()
+        consumer.consumer.flush.side_effect = lambda: time.sleep(0.5)
+        start_time_in_seconds = time.time()
+        consumer.send('events', '1')
+        consumer.send('people', '2')
+        self.assertLess(time.time() - start_time_in_seconds, 0.3)
+        time.sleep(0.1)
+        self.assertEqual([mock.call('events', '1', None), mock.call('people', '2', None)], consumer.consumer.send.call_args_list)
+
+    def test_async_consumer___drops_failed_batch(self):
+        consumer = mixpanel_helper.AsyncConsumer(flush_interval_in_seconds=60)
+        consumer.consumer = mock.Mock()
+        consumer.consumer.flush.side_effect = mixpanel_helper.MixpanelException('expected')
+        consumer.send('events', '1')
+        consumer.flush()
+        self.assertIsInstance(consumer.consumer, mixpanel_helper.BufferedConsumer)
@@ -0,0 +1,133 @@
+import threading
+import time
+from urlparse import urlparse
+
+from plex.log import Log
+
+requests_per_second_by_host = {
+    'api.dmm.com': 5.0,
+    'www.dmm.co.jp': 2.0,
+    'pics.dmm.co.jp': 10.0,
+    'www.caribbeancom.com': 4.0,
+    'www.caribbeancompr.com': 4.0,
+    'www.1pondo.tv': 4.0,
+    'default': 8.0,
+}
+burst_size = 4  # requests which may be sent at once after a quiet period
+min_rate_ratio = 0.05  # the rate never shrinks below this ratio of the configured rate
+backoff_ratio = 0.5
+recovery_requests = 20  # successful responses it takes to grow back by one configured rate
+throttled_status_codes = (429, 503)
+max_retry_after_in_seconds = 60
+
+buckets = {}
+buckets_lock = threading.Lock()
+
+
+class TokenBucket(object):
+    """
+    Paces requests to a host, the rate is halved when the host throttles and grows back on every success.
+    """
+
+    def __init__(self, host, requests_per_second):
+        """
+        :type host: str
+        :type requests_per_second: float
+        """
+        self.host = host
+        self.max_rate = requests_per_second
+        self.rate = requests_per_second
+        self.tokens = float(burst_size)
+        self.updated_at = time.time()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Waits until a request may be sent, and returns how long it waited.
+        :rtype: float
+        """
+        waited_in_seconds = 0.0
+        while True:
+            with self.lock:
+                now = time.time()
+                self.tokens = min(float(burst_size), self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited_in_seconds
+                wait_in_seconds = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait_in_seconds)
+            waited_in_seconds += wait_in_seconds
+
+    def slow_down(self, retry_after_in_seconds=None):
+        """
+        :type retry_after_in_seconds: Optional[float]
+        """
+        with self.lock:
+            self.rate = max(self.max_rate * min_rate_ratio, self.rate * backoff_ratio)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after_in_seconds is not None:
+                self.paused_until = time.time() + min(retry_after_in_seconds, max_retry_after_in_seconds)
+            Log.Warn("Throttled by '{}', slowing down to {:.2f} requests per second".format(self.host, self.rate))
+
+    def speed_up(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / recovery_requests)
+
+
+def get_bucket(url):
+    """
+    Returns the shared bucket of the url's host, it is created on first use.
+    :type url: str
+    :rtype: TokenBucket
+    """
+    host = urlparse(url).netloc.lower()
+    with buckets_lock:
+        if host not in buckets:
+            requests_per_second = requests_per_second_by_host.get(host, requests_per_second_by_host['default'])
+            buckets[host] = TokenBucket(host, requests_per_second)
+        return buckets[host]
+
+
+def acquire(url):
+    """
+    Waits until a request to the url's host may be sent.
+    :type url: str
+    """
+    bucket = get_bucket(url)
+    waited_in_seconds = bucket.acquire()
+    if waited_in_seconds > 0:
+        Log.Debug("Waited {:.2f} seconds for '{}'".format(waited_in_seconds, bucket.host))
+
+
+def report_response(url, status_code, headers):
+    """
+    Adapts the rate of the url's host to its response.
+    :type url: str
+    :type status_code: int
+    :type headers: dict
+    """
+    if status_code in throttled_status_codes:
+        get_bucket(url).slow_down(get_retry_after_in_seconds(headers))
+    else:
+        get_bucket(url).speed_up()
+
+
+def report_failure(url):
+    """
+    Slows down the url's host after the connection was reset, which is how some hosts refuse requests that come too fast.
+    :type url: str
+    """
+    get_bucket(url).slow_down()
+
+
+def get_retry_after_in_seconds(headers):
+    """
+    :type headers: dict
+    :rtype: Optional[float]
+    """
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None  # missing, or given as a date which is not worth parsing for a short pause
@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+import mock
+
+from utility import rate_limit_helper
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class Test(TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.time = mock.patch.object(rate_limit_helper, 'time', self.clock)
+        self.time.start()
+
+    def tearDown(self):
+        self.time.stop()
+
+    def test_acquire___paces_after_burst(self):
+        bucket = rate_limit_helper.TokenBucket('www.1pondo.tv', 4.0)
+        waits = [bucket.acquire() for _ in range(rate_limit_helper.burst_size + 2)]
+        self.assertEqual([0.0] * rate_limit_helper.burst_size + [0.25, 0.25], waits)
+
+    def test_slow_down___recovers_gradually(self):
+        bucket = rate_limit_helper.TokenBucket('api.dmm.com', 4.0)
+        bucket.slow_down()
+        bucket.slow_down()
+        self.assertEqual(1.0, bucket.rate)
+        for _ in range(rate_limit_helper.recovery_requests / 2):
+            bucket.speed_up()
+        self.assertAlmostEqual(3.0, bucket.rate)
+        for _ in range(rate_limit_helper.recovery_requests):
+            bucket.speed_up()
+        self.assertEqual(4.0, bucket.rate)
+
+    def test_report_response___pauses_for_retry_after(self):
+        url = "https://www.dmm.co.jp/mono/dvd/-/detail/=/cid=ssni558/"
+        with mock.patch.object(rate_limit_helper, 'buckets', {}):
+            rate_limit_helper.report_response(url, 429, {'Retry-After': '3'})
+            bucket = rate_limit_helper.get_bucket(url)
+            self.assertEqual(rate_limit_helper.requests_per_second_by_host['www.dmm.co.jp'] * rate_limit_helper.backoff_ratio, bucket.rate)
+            self.assertEqual(3.0, bucket.acquire())
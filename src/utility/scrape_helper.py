@@ -0,0 +1,69 @@
+import lxml.html
+from lxml import etree
+from pyquery.cssselectpatch import JQueryTranslator
+from pyquery.text import extract_text
+
+translator = JQueryTranslator(xhtml=False)
+
+
+class Selector(object):
+    """
+    A css selector translated into xpath once, with the same matching and text extraction as PyQuery.
+    """
+
+    def __init__(self, css, prefix='descendant-or-self::'):
+        """
+        :type css: str
+        :param prefix: use 'descendant::' to select below the element only, like PyQuery.find
+        :type prefix: str
+        """
+        self.css = css
+        self.prefix = prefix
+        self.xpath = etree.XPath(translator.css_to_xpath(css, prefix))
+
+    def select(self, element):
+        """
+        :type element: lxml.html.HtmlElement
+        :rtype: list[lxml.html.HtmlElement]
+        """
+        return self.xpath(element)
+
+    def text(self, element):
+        """
+        Returns the text of all selected elements joined by spaces, or an empty string if none is selected.
+        :type element: lxml.html.HtmlElement
+        :rtype: str
+        """
+        return ' '.join(extract_text(selected) for selected in self.select(element))
+
+    def attr(self, element, name):
+        """
+        Returns the attribute of the first selected element, or None.
+        :type element: lxml.html.HtmlElement
+        :type name: str
+        :rtype: str
+        """
+        selected = self.select(element)
+        return selected[0].get(name) if len(selected) > 0 else None
+
+    def attrs(self, element, name):
+        """
+        Returns the attribute of every selected element which has it.
+        :type element: lxml.html.HtmlElement
+        :type name: str
+        :rtype: list[str]
+        """
+        return [value for value in (selected.get(name) for selected in self.select(element)) if value is not None]
+
+
+def parse(content, encoding=None):
+    """
+    Parses a page from the bytes of its response, the same way as PyQuery with the html parser.
+    :type content: str
+    :param encoding: the charset of the response, otherwise the one the page declares is used
+    :type encoding: Optional[str]
+    :rtype: lxml.html.HtmlElement
+    """
+    if encoding is None:
+        return lxml.html.fromstring(content)
+    return lxml.html.fromstring(content, parser=lxml.html.HTMLParser(encoding=encoding))
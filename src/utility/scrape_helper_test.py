@@ -0,0 +1,39 @@
+# coding=utf-8
+from unittest import TestCase
+
+from pyquery import PyQuery
+
+from utility import scrape_helper
+
+html = """
+<html><body>
+<div class="info"><h1 class="title">Title <small>subtitle</small></h1><p>first</p><p>second
+line</p></div>
+<ul class="gallery"><li><a href="/1.jpg"><img data-src="/1s.jpg"></a></li><li><a href="/2.jpg"><img></a></li></ul>
+</body></html>
+"""
+
+
+class Test(TestCase):
+
+    def test_selector___same_as_pyquery(self):
+        query = PyQuery(html, parser='html')
+        page = scrape_helper.parse(html)
+        for css in ['h1.title', '.info > p', '.info p:last', '.gallery img', 'span.missing']:
+            selector = scrape_helper.Selector(css)
+            self.assertEqual(query(css).text(), selector.text(page))
+            self.assertEqual([element.tag for element in query(css)], [element.tag for element in selector.select(page)])
+        self.assertEqual(query('.gallery a').attr('href'), scrape_helper.Selector('.gallery a').attr(page, 'href'))
+        self.assertEqual(None, scrape_helper.Selector('span.missing').attr(page, 'href'))
+        self.assertEqual(['/1s.jpg'], scrape_helper.Selector('.gallery img').attrs(page, 'data-src'))
+
+    def test_selector___below_element(self):
+        page = scrape_helper.parse(html)
+        images = scrape_helper.Selector('img', prefix='descendant::')
+        self.assertEqual(['/2.jpg'], [element.get('href') for element in scrape_helper.Selector('.gallery a').select(page)
+                                      if images.attr(element, 'data-src') is None])
+
+    def test_parse___bytes_with_charset(self):
+        content = u'<html><head><meta charset="shift_jis"></head><body><h1>タイトル</h1></body></html>'
+        self.assertEqual(u'タイトル', scrape_helper.Selector('h1').text(scrape_helper.parse(content.encode('euc-jp'), 'euc-jp')))
+        self.assertEqual(u'タイトル', scrape_helper.Selector('h1').text(scrape_helper.parse(content.replace('shift_jis', 'utf-8').encode('utf-8'))))
@@ -20,7 +20,7 @@ def init_sentry(user_id):
         dsn=build_config.sentry_dsn,
         environment=build_config.environment,
         traces_sample_rate=1.0,
-        debug=True,
+        debug=build_config.environment != 'release',
         before_send=before_send,
         release=build_config.full_version)
     sentry_utils.MAX_STRING_LENGTH = 4096